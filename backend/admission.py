@@ -0,0 +1,126 @@
+from typing import Dict, Optional, Tuple
+import logging
+import os
+
+import anyio.to_thread
+from starlette.responses import JSONResponse
+
+from database import is_serverless, pool_settings
+import metrics
+
+# Sync handlers and dependencies run on anyio's thread limiter (40 threads
+# by default). Past that, calls queue for a thread where nobody can see them,
+# and every request waits for the whole queue ahead of it. Admission control
+# answers with a fast 503 instead, so the requests that are let in stay quick.
+
+# Threads for sync handlers: a number, or "pool" for as many as the connection
+# pool hands out (DB_POOL_SIZE + DB_MAX_OVERFLOW). Each thread may hold a
+# connection, so with more threads than connections, requests holding a
+# connection can wait for a thread while threads wait for a connection.
+ANYIO_DEFAULT_THREADS = 40
+POOL_CAPACITY = pool_settings()["pool_size"] + pool_settings()["max_overflow"]
+
+
+def parse_threadpool_size(value: str) -> int:
+    """Thread count from THREADPOOL_SIZE ("" keeps anyio's default)"""
+    if value.strip().lower() == "pool":
+        return POOL_CAPACITY
+    return int(value or ANYIO_DEFAULT_THREADS)
+
+
+THREADPOOL_SIZE = parse_threadpool_size(os.getenv("THREADPOOL_SIZE", ""))
+# Requests allowed in flight beyond THREADPOOL_SIZE, i.e. queued for a thread,
+# before new ones are shed; 0 disables it
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", 100))
+# Seconds clients are told to wait before retrying a shed request
+ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", 1))
+# Requests one route may have in flight at once: login hashes with bcrypt,
+# payment initiate waits on the provider, search runs the heaviest query
+DEFAULT_ROUTE_LIMITS = "POST /api/auth/login=8,POST /api/payment/initiate=16,GET /api/teachers/search=16"
+
+# Never shed: scrapes must keep working exactly when the server is overloaded
+EXEMPT_PATHS = {"/metrics"}
+
+
+def parse_route_limits(value: str) -> Dict[Tuple[str, str], int]:
+    """Per-route limits from "POST /api/auth/login=8,GET /api/teachers/search=16" """
+    limits = {}
+    for part in filter(None, (part.strip() for part in value.split(","))):
+        route, _, limit = part.rpartition("=")
+        method, _, path = route.strip().partition(" ")
+        if not path or not limit.strip().isdigit():
+            raise ValueError(f"Invalid route limit {part!r}, expected e.g. 'GET /api/teachers/search=16'")
+        limits[(method.upper(), path.strip())] = int(limit)
+    return limits
+
+
+ROUTE_CONCURRENCY_LIMITS = parse_route_limits(os.getenv("ROUTE_CONCURRENCY_LIMITS", DEFAULT_ROUTE_LIMITS))
+
+logger = logging.getLogger(__name__)
+
+
+def configure_threadpool(size: int = THREADPOOL_SIZE):
+    """Size the running event loop's default thread limiter; call from startup"""
+    if size > POOL_CAPACITY and not is_serverless():
+        logger.warning("THREADPOOL_SIZE %d exceeds the connection pool's %d connections "
+                       "(DB_POOL_SIZE + DB_MAX_OVERFLOW); requests may stall waiting for a connection. "
+                       "Raise the pool or set THREADPOOL_SIZE=pool",
+                       size, POOL_CAPACITY)
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = size
+    metrics.watch_threadpool(limiter)
+    return limiter
+
+
+class AdmissionMiddleware:
+    """Shed requests with a 503 and Retry-After when their route or the threadpool is saturated
+
+    Queue depth is counted as admitted requests beyond the thread count rather
+    than read from the limiter: a burst is admitted in full before any of it
+    reaches the limiter's queue. A request counts until its dependencies are
+    torn down, which FastAPI does after the response is sent.
+    """
+
+    def __init__(self, app, route_limits: Optional[Dict[Tuple[str, str], int]] = None,
+                 threads: int = THREADPOOL_SIZE, max_queue: int = ADMISSION_MAX_QUEUE,
+                 retry_after: int = ADMISSION_RETRY_AFTER_SECONDS):
+        self.app = app
+        self.route_limits = ROUTE_CONCURRENCY_LIMITS if route_limits is None else route_limits
+        self.max_in_flight = threads + max_queue if max_queue else None
+        self.retry_after = retry_after
+        # Only touched on the event loop thread, so plain counters will do
+        self.in_flight = 0
+        self.route_in_flight = dict.fromkeys(self.route_limits, 0)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        key = (scope["method"], scope["path"])
+        limit = self.route_limits.get(key)
+        if limit is not None and self.route_in_flight[key] >= limit:
+            await self.reject(scope, receive, send, "route_limit")
+            return
+        if self.max_in_flight is not None and self.in_flight >= self.max_in_flight:
+            await self.reject(scope, receive, send, "queue_full")
+            return
+
+        self.in_flight += 1
+        if limit is not None:
+            self.route_in_flight[key] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+            if limit is not None:
+                self.route_in_flight[key] -= 1
+
+    async def reject(self, scope, receive, send, reason: str):
+        route = f"{scope['method']} {scope['path']}" if reason == "route_limit" else "*"
+        metrics.ADMISSION_REJECTED_TOTAL.labels(route, reason).inc()
+        response = JSONResponse(
+            {"detail": "Server is busy, please retry shortly"}, status_code=503,
+            headers={"Retry-After": str(self.retry_after)}
+        )
+        await response(scope, receive, send)
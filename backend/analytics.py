@@ -0,0 +1,126 @@
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+
+from sqlalchemy import BigInteger, Date, cast, delete, func, literal, select
+from sqlalchemy.orm import Session
+
+from database import advisory_xact_lock, LOCK_NAMESPACE_METRICS_AGGREGATOR
+import models
+
+INTERVALS = ["day", "week", "month"]
+
+# metric name -> (timestamp column, per-day value, filters)
+METRIC_SOURCES = {
+    # Revenue counts on the day the payment completed, which can be long after it was created
+    "revenue": (
+        models.Transaction.completed_at,
+        cast(func.round(func.sum(models.Transaction.amount) * 100), BigInteger),
+        [models.Transaction.status == models.PaymentStatus.COMPLETED,
+         models.Transaction.transaction_type == models.TransactionType.PAYMENT],
+    ),
+    "sessions_booked": (
+        models.Session.created_at,
+        func.count(),
+        # Materialized occurrences of a recurring series are not new bookings
+        [models.Session.parent_session_id == None],
+    ),
+    "signups": (models.User.created_at, func.count(), []),
+    "messages": (models.Message.created_at, func.count(), []),
+}
+
+METRICS = list(METRIC_SOURCES)
+
+# Metrics stored in paisa and reported in rupees
+CURRENCY_METRICS = {"revenue"}
+
+
+def aggregate_daily_metrics(db: Session, lookback_days: int = 2) -> int:
+    """Recompute daily buckets from the last aggregated day minus lookback_days onwards
+
+    Only the recent tail of each source table is scanned (through the index
+    on its timestamp), so the job stays cheap however large the tables grow.
+    The lookback picks up rows that landed in a day after it was aggregated.
+    Returns the number of buckets written.
+    """
+    advisory_xact_lock(db, LOCK_NAMESPACE_METRICS_AGGREGATOR, "daily")
+    last_days = _last_aggregated_days(db)
+
+    written = 0
+    for metric, (timestamp, value, filters) in METRIC_SOURCES.items():
+        last_day = last_days.get(metric)
+        since = last_day - timedelta(days=lookback_days) if last_day else None
+        day = cast(func.date_trunc("day", timestamp), Date)
+        source = select(literal(metric), day, value).where(*filters).group_by(day)
+        clear = delete(models.DailyMetric).where(models.DailyMetric.metric == metric)
+        if since:
+            source = source.where(timestamp >= since)
+            clear = clear.where(models.DailyMetric.day >= since)
+        db.execute(clear)
+        written += db.execute(
+            models.DailyMetric.__table__.insert().from_select(["metric", "day", "value"], source)
+        ).rowcount
+    db.commit()
+    return written
+
+
+def _last_aggregated_days(db: Session) -> Dict[str, date]:
+    """Latest bucket of each metric; empty before the first run
+
+    Each metric resumes from its own latest bucket, so a sparse metric does
+    not drag the others back to its last day. A metric with no buckets after
+    the first (full) run simply had no rows yet, and resumes from the latest
+    bucket of any metric.
+    """
+    latest = dict(db.query(
+        models.DailyMetric.metric, func.max(models.DailyMetric.day)
+    ).group_by(models.DailyMetric.metric).all())
+    if latest:
+        newest = max(latest.values())
+        for metric in METRICS:
+            latest.setdefault(metric, newest)
+    return latest
+
+
+def period_start(day: date, interval: str) -> date:
+    if interval == "week":
+        return day - timedelta(days=day.weekday())
+    if interval == "month":
+        return day.replace(day=1)
+    return day
+
+
+def periods(start: date, end: date, interval: str) -> List[date]:
+    """Start dates of every period overlapping [start, end]"""
+    result = []
+    current = period_start(start, interval)
+    while current <= end:
+        result.append(current)
+        if interval == "day":
+            current += timedelta(days=1)
+        elif interval == "week":
+            current += timedelta(days=7)
+        else:
+            current = (current + timedelta(days=32)).replace(day=1)
+    return result
+
+
+def timeseries(db: Session, metrics: List[str], interval: str,
+               start: date, end: date) -> Dict[str, List[Tuple[date, float]]]:
+    """Per-period totals of each metric over [start, end], zero-filled, from one query on the buckets"""
+    period = cast(func.date_trunc(interval, models.DailyMetric.day), Date)
+    rows = db.query(
+        models.DailyMetric.metric, period, func.sum(models.DailyMetric.value)
+    ).filter(
+        models.DailyMetric.metric.in_(metrics),
+        models.DailyMetric.day >= start,
+        models.DailyMetric.day <= end
+    ).group_by(models.DailyMetric.metric, period).all()
+
+    totals = {(metric, day): int(value) for metric, day, value in rows}
+    series = {}
+    for metric in metrics:
+        scale = 100 if metric in CURRENCY_METRICS else 1
+        series[metric] = [
+            (day, totals.get((metric, day), 0) / scale) for day in periods(start, end, interval)
+        ]
+    return series
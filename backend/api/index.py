@@ -1,24 +1,24 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Query, Request
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_, func, desc
-from typing import List, Optional
-from datetime import timedelta, datetime
+from fastapi.openapi.docs import get_swagger_ui_html
+from fastapi.responses import Response
+from datetime import datetime
+import threading
 import sys
 import os
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-import models
-import schemas
-import auth
-from database import get_db, engine
+# Serverless mode: NullPool engine (see database.py). The schema is managed by
+# the migrations (alembic upgrade head), not on cold start.
+os.environ.setdefault("SERVERLESS", "1")
 
-# Create tables
-models.Base.metadata.create_all(bind=engine)
+# Served as-is so /openapi.json and /docs don't import the routes.
+# Regenerate after changing api/routes.py: python api/index.py
+OPENAPI_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "openapi.json")
 
-app = FastAPI(title="Fast-Classified API", version="2.0.0")
+app = FastAPI(title="Fast-Classified API", version="2.0.0", openapi_url=None, docs_url=None, redoc_url=None)
 
 # CORS Configuration
 allowed_origins = [
@@ -50,353 +50,64 @@ def root():
 def api_root():
     return {"message": "Fast-Classified API is running", "version": "2.0.0"}
 
-# ==================== Authentication Endpoints ====================
-
-@app.post("/api/auth/signup", response_model=schemas.Token)
-def signup(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
-    if db_user:
-        raise HTTPException(status_code=400, detail="Email already registered")
-    
-    hashed_password = auth.get_password_hash(user.password)
-    new_user = models.User(
-        email=user.email,
-        password_hash=hashed_password,
-        role=models.UserRole(user.role)
-    )
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    
-    # Create wallet for user
-    wallet = models.Wallet(user_id=new_user.id)
-    db.add(wallet)
-    db.commit()
-    
-    access_token = auth.create_access_token(
-        data={"sub": new_user.email},
-        expires_delta=timedelta(days=7)
-    )
-    return {"access_token": access_token, "token_type": "bearer"}
-
-@app.post("/api/auth/login", response_model=schemas.Token)
-def login(user: schemas.UserLogin, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
-    if not db_user or not auth.verify_password(user.password, db_user.password_hash):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect email or password",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
-    access_token = auth.create_access_token(
-        data={"sub": db_user.email},
-        expires_delta=timedelta(days=7)
-    )
-    return {"access_token": access_token, "token_type": "bearer"}
-
-@app.get("/api/auth/me")
-def get_me(current_user: models.User = Depends(auth.get_current_user), db: Session = Depends(get_db)):
-    profile = None
-    if current_user.role == models.UserRole.STUDENT:
-        profile = db.query(models.StudentProfile).filter(
-            models.StudentProfile.user_id == current_user.id
-        ).first()
-    elif current_user.role == models.UserRole.TEACHER:
-        profile = db.query(models.TeacherProfile).filter(
-            models.TeacherProfile.user_id == current_user.id
-        ).first()
-    
-    return {
-        "id": str(current_user.id),
-        "email": current_user.email,
-        "role": current_user.role.value,
-        "is_active": current_user.is_active,
-        "is_verified": current_user.is_verified,
-        "profile": profile
-    }
-
-# ==================== Profile Endpoints ====================
-
-@app.post("/api/profiles/student", response_model=schemas.StudentProfileResponse)
-def create_student_profile(
-    profile: schemas.StudentProfileCreate,
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
-):
-    if current_user.role != models.UserRole.STUDENT:
-        raise HTTPException(status_code=403, detail="Only students can create student profiles")
-    
-    existing = db.query(models.StudentProfile).filter(
-        models.StudentProfile.user_id == current_user.id
-    ).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Profile already exists")
-    
-    new_profile = models.StudentProfile(
-        user_id=current_user.id,
-        **profile.model_dump()
-    )
-    db.add(new_profile)
-    db.commit()
-    db.refresh(new_profile)
-    return new_profile
-
-@app.post("/api/profiles/teacher", response_model=schemas.TeacherProfileResponse)
-def create_teacher_profile(
-    profile: schemas.TeacherProfileCreate,
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
-):
-    if current_user.role != models.UserRole.TEACHER:
-        raise HTTPException(status_code=403, detail="Only teachers can create teacher profiles")
-    
-    existing = db.query(models.TeacherProfile).filter(
-        models.TeacherProfile.user_id == current_user.id
-    ).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Profile already exists")
-    
-    new_profile = models.TeacherProfile(
-        user_id=current_user.id,
-        **profile.model_dump()
-    )
-    db.add(new_profile)
-    db.commit()
-    db.refresh(new_profile)
-    return new_profile
+# ==================== Health Check ====================
 
-@app.patch("/api/profiles/student/{profile_id}", response_model=schemas.StudentProfileResponse)
-def update_student_profile(
-    profile_id: str,
-    profile_update: schemas.StudentProfileCreate,
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
-):
-    profile = db.query(models.StudentProfile).filter(
-        models.StudentProfile.id == profile_id,
-        models.StudentProfile.user_id == current_user.id
-    ).first()
-    if not profile:
-        raise HTTPException(status_code=404, detail="Profile not found")
-    
-    for key, value in profile_update.model_dump().items():
-        setattr(profile, key, value)
-    
-    db.commit()
-    db.refresh(profile)
-    return profile
+@app.get("/api/health")
+def health_check():
+    return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
 
-@app.patch("/api/profiles/teacher/{profile_id}", response_model=schemas.TeacherProfileResponse)
-def update_teacher_profile(
-    profile_id: str,
-    profile_update: schemas.TeacherProfileCreate,
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
-):
-    profile = db.query(models.TeacherProfile).filter(
-        models.TeacherProfile.id == profile_id,
-        models.TeacherProfile.user_id == current_user.id
-    ).first()
-    if not profile:
-        raise HTTPException(status_code=404, detail="Profile not found")
-    
-    for key, value in profile_update.model_dump().items():
-        setattr(profile, key, value)
-    
-    db.commit()
-    db.refresh(profile)
-    return profile
+# ==================== API Docs ====================
 
-# ==================== Request Feed Endpoints ====================
+@app.get("/openapi.json", include_in_schema=False)
+def openapi_schema():
+    with open(OPENAPI_PATH, "rb") as f:
+        return Response(f.read(), media_type="application/json")
 
-@app.post("/api/requests", response_model=schemas.RequestResponse)
-def create_request(
-    request: schemas.RequestCreate,
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
-):
-    if current_user.role != models.UserRole.STUDENT:
-        raise HTTPException(status_code=403, detail="Only students can create requests")
-    
-    new_request = models.Request(
-        student_id=current_user.id,
-        **request.model_dump()
-    )
-    db.add(new_request)
-    db.commit()
-    db.refresh(new_request)
-    
-    student_profile = db.query(models.StudentProfile).filter(
-        models.StudentProfile.user_id == current_user.id
-    ).first()
-    
-    response = schemas.RequestResponse(
-        id=str(new_request.id),
-        student_id=str(new_request.student_id),
-        subject=new_request.subject,
-        topic=new_request.topic,
-        description=new_request.description,
-        preferred_format=new_request.preferred_format,
-        urgency_level=new_request.urgency_level,
-        hourly_rate=new_request.hourly_rate,
-        duration=new_request.duration,
-        status=new_request.status.value,
-        created_at=new_request.created_at,
-        student_name=student_profile.name if student_profile else "Anonymous"
-    )
-    return response
+@app.get("/docs", include_in_schema=False)
+def swagger_ui():
+    return get_swagger_ui_html(openapi_url="/openapi.json", title=f"{app.title} - Swagger UI")
 
-@app.get("/api/requests", response_model=List[schemas.RequestResponse])
-def get_requests(
-    page: int = Query(1, ge=1),
-    per_page: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db)
-):
-    offset = (page - 1) * per_page
-    requests = db.query(models.Request).filter(
-        models.Request.status == models.RequestStatus.ACTIVE
-    ).order_by(desc(models.Request.created_at)).offset(offset).limit(per_page).all()
-    
-    result = []
-    for req in requests:
-        student_profile = db.query(models.StudentProfile).filter(
-            models.StudentProfile.user_id == req.student_id
-        ).first()
-        
-        result.append(schemas.RequestResponse(
-            id=str(req.id),
-            student_id=str(req.student_id),
-            subject=req.subject,
-            topic=req.topic,
-            description=req.description,
-            preferred_format=req.preferred_format,
-            urgency_level=req.urgency_level,
-            hourly_rate=req.hourly_rate,
-            duration=req.duration,
-            status=req.status.value,
-            created_at=req.created_at,
-            student_name=student_profile.name if student_profile else "Anonymous"
-        ))
-    return result
+# ==================== Lazy Routes ====================
 
-@app.delete("/api/requests/{request_id}")
-def delete_request(
-    request_id: str,
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
-):
-    request = db.query(models.Request).filter(
-        models.Request.id == request_id,
-        models.Request.student_id == current_user.id
-    ).first()
-    if not request:
-        raise HTTPException(status_code=404, detail="Request not found")
-    
-    db.delete(request)
-    db.commit()
-    return {"message": "Request deleted successfully"}
+# Paths served above, without importing the models, schemas and auth stack
+EAGER_PATHS = {"/", "/api", "/api/health", "/openapi.json", "/docs"}
 
-# ==================== Teacher Search Endpoints ====================
+_routes_lock = threading.Lock()
+_routes_loaded = False
 
-@app.get("/api/teachers/search", response_model=List[schemas.TeacherProfileResponse])
-def search_teachers(
-    subject: Optional[str] = None,
-    min_rate: Optional[float] = None,
-    max_rate: Optional[float] = None,
-    min_rating: Optional[float] = None,
-    city: Optional[str] = None,
-    format: Optional[str] = None,
-    language: Optional[str] = None,
-    experience_level: Optional[str] = None,
-    verified_only: bool = False,
-    sort_by: Optional[str] = "rating",
-    page: int = Query(1, ge=1),
-    per_page: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db)
-):
-    query = db.query(models.TeacherProfile)
-    
-    if subject:
-        query = query.filter(models.TeacherProfile.subjects_taught.contains([subject]))
-    if min_rate:
-        query = query.filter(models.TeacherProfile.hourly_rate >= min_rate)
-    if max_rate:
-        query = query.filter(models.TeacherProfile.hourly_rate <= max_rate)
-    if min_rating:
-        query = query.filter(models.TeacherProfile.average_rating >= min_rating)
-    if city:
-        query = query.filter(models.TeacherProfile.city.ilike(f"%{city}%"))
-    if format:
-        query = query.filter(models.TeacherProfile.preferred_formats.contains([format]))
-    if language:
-        query = query.filter(models.TeacherProfile.languages.contains([language]))
-    if verified_only:
-        query = query.filter(models.TeacherProfile.is_verified == True)
-    
-    if experience_level:
-        if experience_level == "beginner":
-            query = query.filter(models.TeacherProfile.experience_years <= 2)
-        elif experience_level == "intermediate":
-            query = query.filter(
-                and_(models.TeacherProfile.experience_years > 2, 
-                     models.TeacherProfile.experience_years <= 5)
-            )
-        elif experience_level == "expert":
-            query = query.filter(models.TeacherProfile.experience_years > 5)
-    
-    if sort_by == "rating":
-        query = query.order_by(desc(models.TeacherProfile.average_rating))
-    elif sort_by == "rate_low":
-        query = query.order_by(models.TeacherProfile.hourly_rate)
-    elif sort_by == "rate_high":
-        query = query.order_by(desc(models.TeacherProfile.hourly_rate))
-    elif sort_by == "experience":
-        query = query.order_by(desc(models.TeacherProfile.experience_years))
-    elif sort_by == "sessions":
-        query = query.order_by(desc(models.TeacherProfile.total_sessions))
-    
-    offset = (page - 1) * per_page
-    teachers = query.offset(offset).limit(per_page).all()
-    
-    return teachers
+def load_routes():
+    """Import the API routes and add them to the app (once)"""
+    global _routes_loaded
+    with _routes_lock:
+        if not _routes_loaded:
+            from api import routes
+            app.include_router(routes.router)
+            _routes_loaded = True
 
-@app.get("/api/teachers/{teacher_id}", response_model=schemas.TeacherProfileResponse)
-def get_teacher(teacher_id: str, db: Session = Depends(get_db)):
-    teacher = db.query(models.TeacherProfile).filter(
-        models.TeacherProfile.id == teacher_id
-    ).first()
-    
-    if not teacher:
-        raise HTTPException(status_code=404, detail="Teacher not found")
-    
-    return teacher
+def build_openapi() -> dict:
+    load_routes()
+    app.openapi_schema = None
+    return FastAPI.openapi(app)
 
-# ==================== Reviews Endpoints ====================
+class LazyRoutesMiddleware:
+    """Load the routes on the first request for a path the eager routes don't serve"""
 
-@app.get("/api/reviews/teacher/{teacher_id}", response_model=List[schemas.ReviewResponse])
-def get_teacher_reviews(
-    teacher_id: str,
-    page: int = Query(1, ge=1),
-    per_page: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db)
-):
-    offset = (page - 1) * per_page
-    reviews = db.query(models.Review).filter(
-        models.Review.teacher_id == teacher_id
-    ).order_by(desc(models.Review.created_at)).offset(offset).limit(per_page).all()
-    
-    result = []
-    for review in reviews:
-        result.append(schemas.ReviewResponse.model_validate(review))
-    return result
+    def __init__(self, app):
+        self.app = app
 
-# ==================== Health Check ====================
+    async def __call__(self, scope, receive, send):
+        if not _routes_loaded and scope["type"] in ("http", "websocket") and scope["path"] not in EAGER_PATHS:
+            load_routes()
+        await self.app(scope, receive, send)
 
-@app.get("/api/health")
-def health_check():
-    return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
+app.add_middleware(LazyRoutesMiddleware)
 
 # Handler for Vercel
 handler = app
 
+if __name__ == "__main__":
+    import json
+    with open(OPENAPI_PATH, "w") as f:
+        json.dump(build_openapi(), f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"Wrote {OPENAPI_PATH}")
@@ -0,0 +1,133 @@
+from datetime import date, datetime
+from typing import Callable, Iterator, List, Optional
+import csv
+import enum
+import io
+import json
+import uuid
+
+from sqlalchemy import Select, func, select, union
+from sqlalchemy.orm import Session
+
+import models
+
+# Rows fetched per round trip from the server-side cursor, and written per chunk
+EXPORT_BATCH_SIZE = 2000
+
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+TRANSACTION_EXPORT_COLUMNS = [
+    models.Transaction.id,
+    models.Transaction.created_at,
+    models.Transaction.user_id,
+    models.Transaction.wallet_id,
+    models.Transaction.session_id,
+    models.Transaction.transaction_type,
+    models.Transaction.status,
+    models.Transaction.amount,
+    models.Transaction.provider,
+    models.Transaction.provider_transaction_id,
+    models.Transaction.payment_reference,
+    models.Transaction.description,
+]
+
+
+def _plain(value):
+    """Convert a column value to something csv and json can write"""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def transactions_query(status: Optional[str] = None, transaction_type: Optional[str] = None,
+                       start: Optional[datetime] = None, end: Optional[datetime] = None) -> Select:
+    """Every transaction matching the filters, oldest first"""
+    query = select(*TRANSACTION_EXPORT_COLUMNS)
+    if status:
+        query = query.where(models.Transaction.status == status)
+    if transaction_type:
+        query = query.where(models.Transaction.transaction_type == transaction_type)
+    if start:
+        query = query.where(models.Transaction.created_at >= start)
+    if end:
+        query = query.where(models.Transaction.created_at < end)
+    return query.order_by(models.Transaction.created_at, models.Transaction.id)
+
+
+def _prefix_pattern(prefix: str) -> str:
+    """LIKE pattern matching values that start with prefix (case-insensitive, wildcards escaped)"""
+    escaped = prefix.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
+
+
+def matching_user_ids(search: str) -> Select:
+    """Ids of users whose email or profile name starts with search
+
+    Each branch of the UNION is a range scan on its lower(...) text_pattern_ops
+    index; an OR across the joined tables could not use them.
+    """
+    pattern = _prefix_pattern(search)
+    return union(
+        select(models.User.id).where(func.lower(models.User.email).like(pattern)),
+        select(models.StudentProfile.user_id).where(func.lower(models.StudentProfile.name).like(pattern)),
+        select(models.TeacherProfile.user_id).where(func.lower(models.TeacherProfile.name).like(pattern)),
+    )
+
+
+def users_query(role: Optional[str] = None, search: Optional[str] = None) -> Select:
+    """Users with their profile name, newest first, optionally filtered by role and search prefix"""
+    query = select(
+        models.User.id,
+        models.User.email,
+        models.User.role,
+        models.User.is_active,
+        models.User.is_verified,
+        models.User.created_at,
+        func.coalesce(models.StudentProfile.name, models.TeacherProfile.name).label("profile_name"),
+    ).outerjoin(
+        models.StudentProfile, models.StudentProfile.user_id == models.User.id
+    ).outerjoin(
+        models.TeacherProfile, models.TeacherProfile.user_id == models.User.id
+    )
+    if role:
+        query = query.where(models.User.role == role)
+    if search:
+        query = query.where(models.User.id.in_(matching_user_ids(search)))
+    return query.order_by(models.User.created_at.desc(), models.User.id)
+
+
+def _csv_chunk(rows: List) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([_plain(value) for value in row] for row in rows)
+    return buffer.getvalue()
+
+
+def _ndjson_chunk(columns: List[str], rows: List) -> str:
+    return "".join(
+        json.dumps(dict(zip(columns, (_plain(value) for value in row)))) + "\n" for row in rows
+    )
+
+
+def stream_export(session_factory: Callable[[], Session], query: Select, fmt: str,
+                  batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    """Yield an export of query as CSV or NDJSON text chunks
+
+    Rows come from a server-side cursor batch_size at a time, so memory use
+    does not depend on the number of rows. The generator opens its own
+    session because it keeps running after the request handler has returned.
+    """
+    db = session_factory()
+    try:
+        result = db.execute(query.execution_options(yield_per=batch_size))
+        columns = list(result.keys())
+        if fmt == "csv":
+            yield _csv_chunk([columns])
+        for rows in result.partitions():
+            yield _csv_chunk(rows) if fmt == "csv" else _ndjson_chunk(columns, rows)
+    finally:
+        db.close()
@@ -0,0 +1,56 @@
+import os
+from typing import Iterable, List
+
+from fastapi.responses import ORJSONResponse
+
+import models
+import schemas
+
+# Opt-in: list endpoints select plain column tuples and render them with
+# orjson, instead of building a pydantic model per ORM row that FastAPI then
+# validates again through response_model. The JSON is the same either way.
+FAST_JSON_LISTS = os.getenv("FAST_JSON_LISTS", "0").lower() in ("1", "true", "yes")
+
+RATING_COUNT_COLUMNS = [getattr(models.TeacherProfile, f"rating_count_{star}") for star in range(1, 6)]
+
+# Response fields in schema order, each read from the column of the same name
+TEACHER_FIELDS = [name for name in schemas.TeacherProfileResponse.model_fields if name != "rating_histogram"]
+TEACHER_COLUMNS = [getattr(models.TeacherProfile, name) for name in TEACHER_FIELDS] + RATING_COUNT_COLUMNS
+
+# Fields not on the request itself come from the joined student profile
+REQUEST_FIELDS = list(schemas.RequestResponse.model_fields)
+REQUEST_JOINED_COLUMNS = {
+    "student_name": models.StudentProfile.name,
+    "student_grade": models.StudentProfile.grade_level,
+}
+REQUEST_COLUMNS = [
+    REQUEST_JOINED_COLUMNS[name] if name in REQUEST_JOINED_COLUMNS else getattr(models.Request, name)
+    for name in REQUEST_FIELDS
+]
+
+MESSAGE_FIELDS = [name for name in schemas.MessageResponse.model_fields if name != "sender_name"]
+MESSAGE_COLUMNS = [getattr(models.Message, name) for name in MESSAGE_FIELDS]
+
+
+def teacher_list(rows: Iterable[tuple]) -> ORJSONResponse:
+    """TeacherProfileResponse list from rows of TEACHER_COLUMNS"""
+    split = len(TEACHER_FIELDS)
+    items: List[dict] = []
+    for row in rows:
+        item = dict(zip(TEACHER_FIELDS, row))
+        item["rating_histogram"] = {str(star): count or 0 for star, count in enumerate(row[split:], 1)}
+        items.append(item)
+    return ORJSONResponse(items)
+
+
+def request_list(rows: Iterable[tuple]) -> ORJSONResponse:
+    """RequestResponse list from rows of REQUEST_COLUMNS; orjson writes enums as their values"""
+    return ORJSONResponse([dict(zip(REQUEST_FIELDS, row)) for row in rows])
+
+
+def message_list(rows: Iterable[tuple]) -> ORJSONResponse:
+    """MessageResponse list from rows of MESSAGE_COLUMNS"""
+    items = [dict(zip(MESSAGE_FIELDS, row)) for row in rows]
+    for item in items:
+        item["sender_name"] = None
+    return ORJSONResponse(items)
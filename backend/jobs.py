@@ -0,0 +1,147 @@
+import argparse
+from datetime import datetime, timedelta
+
+from database import SessionLocal
+import analytics
+import ledger
+import models
+import ratings
+import recurrence
+import scheduling
+import stats
+import verification
+import votes
+
+
+def materialize_sessions(db, horizon_days: float = 7) -> int:
+    """Give recurring-series occurrences in the next horizon_days their own rows"""
+    return recurrence.materialize_upcoming(db, datetime.utcnow(), timedelta(days=horizon_days))
+
+
+def send_session_reminders(db, lead_hours: float = 24) -> int:
+    """Notify both participants of sessions starting within lead_hours, once per session"""
+    now = datetime.utcnow()
+    lead = timedelta(hours=lead_hours)
+    # Occurrences about to start need a row to carry reminder_sent_at
+    recurrence.materialize_upcoming(db, now, lead)
+
+    rows = db.query(
+        models.Session,
+        models.StudentProfile.user_id,
+        models.StudentProfile.name,
+        models.TeacherProfile.user_id,
+        models.TeacherProfile.name
+    ).join(
+        models.StudentProfile, models.Session.student_id == models.StudentProfile.id
+    ).join(
+        models.TeacherProfile, models.Session.teacher_id == models.TeacherProfile.id
+    ).filter(
+        models.Session.status.in_(recurrence.ACTIVE_SESSION_STATUSES),
+        models.Session.reminder_sent_at == None,
+        models.Session.scheduled_date >= now - timedelta(days=1),
+        models.Session.scheduled_date < now + lead + timedelta(days=1)
+    ).all()
+
+    sent = 0
+    for session, student_user_id, student_name, teacher_user_id, teacher_name in rows:
+        start, _ = scheduling.session_interval(session.scheduled_date, session.scheduled_time, session.duration)
+        if not now <= start < now + lead:
+            continue
+        for user_id, other_name in ((student_user_id, teacher_name), (teacher_user_id, student_name)):
+            db.add(models.Notification(
+                user_id=user_id,
+                type=models.NotificationType.SESSION_REMINDER,
+                title="Upcoming Session",
+                message=f"Your {session.subject} session with {other_name} starts at {start:%Y-%m-%d %H:%M}.",
+                data={"session_id": str(session.id)}
+            ))
+        session.reminder_sent_at = now
+        sent += 1
+
+    db.commit()
+    return sent
+
+
+def backfill_availability_masks(db) -> int:
+    """Compute availability_mask for teachers saved before it existed"""
+    teachers = db.query(models.TeacherProfile).filter(
+        models.TeacherProfile.availability_mask == None
+    ).all()
+    for teacher in teachers:
+        teacher.availability_mask = scheduling.availability_mask(teacher.availability)
+    db.commit()
+    return len(teachers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fast-Classified background jobs")
+    subparsers = parser.add_subparsers(dest="job", required=True)
+
+    materialize = subparsers.add_parser("materialize-sessions", help="Materialize upcoming recurring sessions")
+    materialize.add_argument("--horizon-days", type=float, default=7)
+
+    reminders = subparsers.add_parser("send-reminders", help="Send reminders for upcoming sessions")
+    reminders.add_argument("--lead-hours", type=float, default=24)
+
+    subparsers.add_parser("backfill-availability-masks", help="Compute missing teacher availability masks")
+
+    subparsers.add_parser("rebuild-rating-aggregates", help="Recompute teacher rating aggregates from reviews")
+
+    subparsers.add_parser("rebuild-helpful-votes", help="Recompute review helpful counters from stored votes")
+
+    subparsers.add_parser("check-wallet-ledger", help="Compare wallet balances with their ledger entries")
+
+    aggregate = subparsers.add_parser("aggregate-daily-metrics", help="Refresh the daily analytics buckets")
+    aggregate.add_argument("--lookback-days", type=int, default=2)
+
+    reconcile = subparsers.add_parser("reconcile-admin-stats", help="Compare admin dashboard counters with live counts")
+    reconcile.add_argument("--fix", action="store_true", help="Reset the counters to the live counts")
+
+    subparsers.add_parser("expire-verification-claims", help="Return documents with expired review leases to the queue")
+
+    args = parser.parse_args()
+    db = SessionLocal()
+    try:
+        if args.job == "materialize-sessions":
+            count = materialize_sessions(db, args.horizon_days)
+            print(f"Materialized {count} session occurrence(s)")
+        elif args.job == "send-reminders":
+            count = send_session_reminders(db, args.lead_hours)
+            print(f"Sent reminders for {count} session(s)")
+        elif args.job == "backfill-availability-masks":
+            count = backfill_availability_masks(db)
+            print(f"Backfilled availability masks for {count} teacher(s)")
+        elif args.job == "rebuild-rating-aggregates":
+            count = ratings.rebuild_rating_aggregates(db)
+            print(f"Rebuilt rating aggregates for {count} reviewed teacher(s)")
+        elif args.job == "rebuild-helpful-votes":
+            count = votes.rebuild_helpful_votes(db)
+            print(f"Corrected helpful votes on {count} review(s)")
+        elif args.job == "check-wallet-ledger":
+            mismatches = ledger.mismatched_wallets(db)
+            for wallet_id, snapshot, total in mismatches:
+                print(f"Wallet {wallet_id}: balance {snapshot} paisa, ledger {total} paisa")
+            print(f"Found {len(mismatches)} wallet(s) out of balance with the ledger")
+            if mismatches:
+                raise SystemExit(1)
+        elif args.job == "aggregate-daily-metrics":
+            count = analytics.aggregate_daily_metrics(db, args.lookback_days)
+            print(f"Wrote {count} daily metric bucket(s)")
+        elif args.job == "reconcile-admin-stats":
+            mismatches = stats.reconcile(db)
+            for name, values in mismatches.items():
+                print(f"{name}: stored {values['stored']}, live {values['live']}")
+            if mismatches and args.fix:
+                stats.rebuild(db)
+                print(f"Reset {len(mismatches)} drifted counter(s)")
+            else:
+                print(f"Found {len(mismatches)} drifted counter(s)")
+        elif args.job == "expire-verification-claims":
+            count = verification.expire_claims(db)
+            print(f"Released {count} expired verification claim(s)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+from decimal import Decimal, ROUND_HALF_UP
+from typing import List, Optional, Tuple
+import uuid
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+
+import models
+
+# System account holding withdrawals owed to users' bank accounts
+PAYOUTS_ACCOUNT = "payouts"
+
+# (account, wallet_id or None, signed amount in paisa)
+Entry = Tuple[str, Optional[uuid.UUID], int]
+
+
+class InsufficientFunds(ValueError):
+    """Raised when a posting would take a wallet below zero"""
+
+
+def to_paisa(amount: float) -> int:
+    """Convert a rupee amount to integer paisa, rounding half up"""
+    return int(Decimal(str(amount)).scaleb(2).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def wallet_account(wallet_id) -> str:
+    return f"wallet:{wallet_id}"
+
+
+def provider_account(provider: str) -> str:
+    return f"provider:{provider}"
+
+
+def post(db: Session, transaction_id: uuid.UUID, entries: List[Entry]):
+    """Append a balanced set of ledger entries and move the wallet snapshots with them
+
+    Each wallet leg is a single conditional UPDATE, so the balance check and the
+    change happen atomically and concurrent debits can never overdraw a wallet.
+    Raises InsufficientFunds without writing anything the caller must keep; the
+    caller rolls back.
+    """
+    if sum(amount for _, _, amount in entries) != 0:
+        raise ValueError("Ledger entries of a transaction must sum to zero")
+
+    wallet = models.Wallet
+    for _, wallet_id, amount in entries:
+        if wallet_id is None:
+            continue
+        balance = db.execute(
+            update(wallet)
+            .where(wallet.id == wallet_id, wallet.balance_paisa + amount >= 0)
+            .values({wallet.balance_paisa: wallet.balance_paisa + amount})
+            .returning(wallet.balance_paisa)
+            .execution_options(synchronize_session=False)
+        ).scalar()
+        if balance is None:
+            raise InsufficientFunds("Insufficient balance")
+
+    db.execute(insert(models.LedgerEntry), [
+        {"transaction_id": transaction_id, "account": account, "wallet_id": wallet_id, "amount_paisa": amount}
+        for account, wallet_id, amount in entries
+    ])
+
+
+def credit_wallet(db: Session, transaction_id: uuid.UUID, wallet_id: uuid.UUID,
+                  amount_paisa: int, source_account: str):
+    """Move amount_paisa from a system account into a wallet"""
+    post(db, transaction_id, [
+        (source_account, None, -amount_paisa),
+        (wallet_account(wallet_id), wallet_id, amount_paisa),
+    ])
+
+
+def debit_wallet(db: Session, transaction_id: uuid.UUID, wallet_id: uuid.UUID,
+                 amount_paisa: int, destination_account: str):
+    """Move amount_paisa out of a wallet into a system account"""
+    post(db, transaction_id, [
+        (wallet_account(wallet_id), wallet_id, -amount_paisa),
+        (destination_account, None, amount_paisa),
+    ])
+
+
+def mismatched_wallets(db: Session) -> List[Tuple[uuid.UUID, int, int]]:
+    """(wallet id, snapshot, ledger total) for every wallet whose snapshot disagrees with its entries"""
+    wallet = models.Wallet
+    entry = models.LedgerEntry
+    totals = select(
+        entry.wallet_id, func.sum(entry.amount_paisa).label("total")
+    ).where(entry.wallet_id != None).group_by(entry.wallet_id).subquery()
+    ledger_total = func.coalesce(totals.c.total, 0)
+    return db.execute(
+        select(wallet.id, wallet.balance_paisa, ledger_total)
+        .outerjoin(totals, totals.c.wallet_id == wallet.id)
+        .where(wallet.balance_paisa != ledger_total)
+    ).all()
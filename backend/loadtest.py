@@ -0,0 +1,393 @@
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import httpx
+import websockets
+
+from payment import PaymentGateway
+
+# Scripted marketplace journeys against a running server, run by concurrent
+# virtual users:
+#
+#   python loadtest.py --base-url http://localhost:8000 --users 200 --ramp 60 --duration 300
+#
+# Students sign up, post a help request, search, book one of a teacher's
+# free slots, pay, and review the session once it is marked completed. Teachers sign up, keep a
+# WebSocket open, answer requests from the feed, chat and mark their paid
+# sessions completed. Each step's latency and failures are reported per step.
+#
+# Payments: by default the harness plays the provider and posts the signed
+# callback itself, so the server needs the same JAZZCASH_*/EASYPAISA_*
+# secrets as this process (both empty by default). Point the provider URLs
+# on the server somewhere that answers quickly, or initiate waits on the
+# sandbox. With --callbacks provider the server talks to mockprovider.py,
+# which sends the callbacks; pay_settled then times initiate to confirmation.
+
+SUBJECTS = ["Math", "Physics", "Chemistry", "Biology", "English", "Computer Science"]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    return sorted_values[max(math.ceil(fraction * len(sorted_values)), 1) - 1]
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """Journey weights from "student=0.8,teacher=0.2" """
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in JOURNEYS:
+            raise ValueError(f"Unknown journey {name!r}, expected one of {', '.join(JOURNEYS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class StepFailed(Exception):
+    """Raised inside a journey when a step fails, ending that iteration"""
+
+
+class Recorder:
+    """Latencies and failures per journey step"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+        self.started = time.perf_counter()
+
+    def record(self, step: str, seconds: float, error: Optional[str] = None):
+        if error:
+            self.errors[(step, error)] += 1
+        else:
+            self.latencies[step].append(seconds * 1000)
+
+    def report(self) -> dict:
+        steps = {}
+        for step in sorted(set(self.latencies) | {step for step, _ in self.errors}):
+            latencies = sorted(self.latencies.get(step, []))
+            errors = sum(count for (name, _), count in self.errors.items() if name == step)
+            steps[step] = {"ok": len(latencies), "errors": errors}
+            if latencies:
+                steps[step].update({
+                    "p50_ms": round(percentile(latencies, 0.50), 1),
+                    "p95_ms": round(percentile(latencies, 0.95), 1),
+                    "p99_ms": round(percentile(latencies, 0.99), 1),
+                })
+        return {
+            "elapsed_s": round(time.perf_counter() - self.started, 1),
+            "steps": steps,
+            "errors": {f"{step}: {error}": count for (step, error), count in self.errors.most_common()},
+        }
+
+
+def print_report(report: dict):
+    print(f"\n{'step':<18} {'ok':>7} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for step, result in report["steps"].items():
+        print(f"{step:<18} {result['ok']:>7} {result['errors']:>7} {result.get('p50_ms', '-'):>8} "
+              f"{result.get('p95_ms', '-'):>8} {result.get('p99_ms', '-'):>8}")
+    requests = sum(result["ok"] + result["errors"] for result in report["steps"].values())
+    print(f"\n{requests} steps in {report['elapsed_s']}s ({requests / max(report['elapsed_s'], 0.001):.1f}/s)")
+    if report["errors"]:
+        print("\nErrors:")
+        for error, count in report["errors"].items():
+            print(f"  {count:>6}  {error}")
+
+
+class VirtualUser:
+    """One simulated person; journeys call step() for every request they make"""
+
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, rng: random.Random,
+                 base_url: str, think_time: float, provider_callbacks: bool = False):
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+        self.base_url = base_url
+        self.think_time = think_time
+        self.provider_callbacks = provider_callbacks
+        self.headers = {}
+        self.user_id = None
+
+    async def step(self, name: str, method: str, path: str, expect=(200,), **kwargs) -> httpx.Response:
+        """Make one request as a named step; non-expected statuses fail the step"""
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, path, headers=self.headers, **kwargs)
+        except httpx.HTTPError as error:
+            self.recorder.record(name, time.perf_counter() - started, type(error).__name__)
+            raise StepFailed(name) from error
+        elapsed = time.perf_counter() - started
+        if response.status_code not in expect:
+            self.recorder.record(name, elapsed, f"HTTP {response.status_code}")
+            raise StepFailed(name)
+        self.recorder.record(name, elapsed)
+        return response
+
+    async def think(self):
+        if self.think_time:
+            await asyncio.sleep(self.rng.expovariate(1 / self.think_time))
+
+    async def sign_up(self, role: str, profile: dict):
+        email = f"load-{role}-{uuid.uuid4().hex[:12]}@example.com"
+        response = await self.step("signup", "POST", "/api/auth/signup",
+                                   json={"email": email, "password": "load-test", "role": role})
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        await self.step("create_profile", "POST", f"/api/profiles/{role}", json=profile)
+        self.user_id = (await self.step("auth_me", "GET", "/api/auth/me")).json()["id"]
+
+
+async def student_journey(user: VirtualUser, deadline: float):
+    rng = user.rng
+    await user.sign_up("student", {"name": f"Load Student {rng.randrange(10**6)}", "city": "Lahore"})
+    while time.perf_counter() < deadline:
+        try:
+            subject = rng.choice(SUBJECTS)
+            await user.step("post_request", "POST", "/api/requests", json={
+                "subject": subject, "topic": "Exam preparation", "hourly_rate": 1000, "preferred_format": "online",
+            })
+            await user.think()
+
+            teachers = (await user.step("search", "GET", "/api/teachers/search",
+                                        params={"subject": subject, "per_page": 20})).json()
+            if not teachers:
+                teachers = (await user.step("search", "GET", "/api/teachers/search", params={"per_page": 20})).json()
+            if not teachers:
+                await user.think()
+                continue
+            teacher = rng.choice(teachers)
+            await user.step("teacher_profile", "GET", f"/api/teachers/{teacher['id']}")
+            slots = (await user.step("slots", "GET", f"/api/teachers/{teacher['id']}/slots")).json()
+            await user.think()
+            if not slots:
+                continue
+
+            slot = rng.choice(slots)
+            start, end = datetime.fromisoformat(slot["start"]), datetime.fromisoformat(slot["end"])
+            hours = max(int((end - start).total_seconds() // 3600), 1)
+            start = (start + timedelta(hours=rng.randrange(hours)) + timedelta(minutes=59)).replace(minute=0, second=0)
+            session = (await user.step("book", "POST", "/api/sessions/book", json={
+                "teacher_id": teacher["id"], "subject": subject, "duration": 1,
+                "scheduled_date": datetime.combine(start.date(), datetime.min.time()).isoformat(),
+                "scheduled_time": start.strftime("%H:%M"),
+            })).json()
+            await user.think()
+
+            await pay(user, session)
+            await user.think()
+
+            # The lesson happens and the teacher marks it completed; then the student reviews it
+            if not await wait_until_completed(user, session, deadline):
+                continue
+            await user.step("review", "POST", "/api/reviews", json={
+                "session_id": session["id"], "rating": rng.choices(range(1, 6), weights=[3, 4, 8, 25, 60])[0],
+                "review_text": "Helpful session",
+            })
+            await user.think()
+        except StepFailed:
+            await user.think()
+
+
+async def pay(user: VirtualUser, session: dict):
+    """Initiate a payment, deliver the provider's signed callback and check the session got confirmed"""
+    provider = user.rng.choice(["jazzcash", "easypaisa"])
+    started = time.perf_counter()
+    transaction = (await user.step("pay_initiate", "POST", "/api/payment/initiate", json={
+        "amount": session["total_amount"], "customer_email": "student@example.com",
+        "customer_mobile": "03001234567", "description": "Tutoring session",
+        "session_id": session["id"], "provider": provider,
+    })).json()
+    if user.provider_callbacks:
+        await wait_until_paid(user, session, started)
+        return
+
+    gateway = PaymentGateway(provider)
+    if provider == "jazzcash":
+        callback = {"pp_TxnRefNo": transaction["transaction_id"], "pp_ResponseCode": "000",
+                    "pp_Amount": str(int(session["total_amount"] * 100))}
+        callback["pp_SecureHash"] = gateway.calculate_hash_jazzcash(callback)
+        await user.step("pay_callback", "POST", "/api/payment/jazzcash/callback", data=callback)
+    else:
+        callback = {"orderRefNum": transaction["transaction_id"], "responseCode": "00",
+                    "amount": str(session["total_amount"]), "transactionId": f"EP{user.rng.randrange(10**9)}",
+                    "postBackURL": f"{user.base_url.rstrip('/')}/api/payment/easypaisa/callback"}
+        callback["merchantHashedReq"] = gateway.calculate_hash_easypaisa(callback)
+        await user.step("pay_callback", "POST", "/api/payment/easypaisa/callback", json=callback)
+
+    if not await is_paid(user, session):
+        user.recorder.record("pay_confirm", 0, "session not marked paid")
+        raise StepFailed("pay_confirm")
+
+
+async def find_session(user: VirtualUser, session: dict, step: str) -> Optional[dict]:
+    """The session as the user's session list shows it, fetched as a named step"""
+    day = datetime.fromisoformat(session["scheduled_date"])
+    sessions = (await user.step(step, "GET", "/api/sessions", params={
+        "from": day.isoformat(), "to": (day + timedelta(days=1)).isoformat(), "per_page": 100,
+    })).json()
+    return next((s for s in sessions if s["id"] == session["id"]), None)
+
+
+async def is_paid(user: VirtualUser, session: dict) -> bool:
+    found = await find_session(user, session, "pay_confirm")
+    return found is not None and found["payment_status"] == "completed"
+
+
+async def wait_until_paid(user: VirtualUser, session: dict, started: float, timeout: float = 30):
+    """Poll until the provider's callback confirmed the session, timing initiate to confirmation"""
+    while not await is_paid(user, session):
+        if time.perf_counter() - started > timeout:
+            user.recorder.record("pay_settled", time.perf_counter() - started, "not paid in time")
+            raise StepFailed("pay_settled")
+        await asyncio.sleep(0.2)
+    user.recorder.record("pay_settled", time.perf_counter() - started)
+
+
+async def wait_until_completed(user: VirtualUser, session: dict, deadline: float, timeout: float = 30) -> bool:
+    """Poll until the teacher marked the session completed; False when the run ends first"""
+    started = time.perf_counter()
+    while True:
+        found = await find_session(user, session, "session_status")
+        if found is not None and found["status"] == "completed":
+            return True
+        if time.perf_counter() >= deadline:
+            return False
+        if time.perf_counter() - started > timeout:
+            user.recorder.record("await_completion", time.perf_counter() - started, "not completed in time")
+            raise StepFailed("await_completion")
+        await asyncio.sleep(0.2)
+
+
+async def complete_paid_sessions(user: VirtualUser):
+    """Mark the teacher's paid, confirmed sessions completed: their lessons happened"""
+    sessions = (await user.step("teacher_sessions", "GET", "/api/sessions", params={"per_page": 100})).json()
+    for session in sessions:
+        if session["status"] == "confirmed" and session["payment_status"] == "completed":
+            await user.step("complete_session", "PATCH", f"/api/sessions/{session['id']}",
+                            json={"status": "completed"})
+
+
+async def teacher_journey(user: VirtualUser, deadline: float):
+    rng = user.rng
+    days = rng.sample(["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"], 5)
+    await user.sign_up("teacher", {
+        "name": f"Load Teacher {rng.randrange(10**6)}", "hourly_rate": rng.randint(5, 30) * 100,
+        "subjects_taught": rng.sample(SUBJECTS, 2), "city": "Lahore",
+        "availability": {day: [f"{hour:02d}:00" for hour in range(8, 21)] for day in days},
+    })
+    ws_url = user.base_url.replace("http", "ws", 1).rstrip("/") + f"/ws/{user.user_id}"
+    started = time.perf_counter()
+    try:
+        socket = await websockets.connect(ws_url, open_timeout=10)
+    except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as error:
+        user.recorder.record("ws_connect", time.perf_counter() - started, type(error).__name__)
+        return
+    user.recorder.record("ws_connect", time.perf_counter() - started)
+
+    try:
+        while time.perf_counter() < deadline:
+            try:
+                feed = (await user.step("feed", "GET", "/api/requests", params={"per_page": 20})).json()
+                await user.think()
+                if feed:
+                    request = rng.choice(feed)
+                    message = (await user.step("respond", "POST", "/api/messages", json={
+                        "receiver_id": request["student_id"], "content": f"I can help with {request['topic']}",
+                    })).json()
+                    await user.think()
+
+                    await ws_round_trip(user, socket, {
+                        "type": "typing", "conversation_id": message["conversation_id"],
+                        "receiver_id": request["student_id"], "is_typing": True,
+                    })
+                    await user.step("conversation", "GET", f"/api/conversations/{message['conversation_id']}/messages")
+                    await user.step("send_message", "POST", "/api/messages", json={
+                        "receiver_id": request["student_id"], "content": "When would suit you?",
+                    })
+                await user.step("conversations", "GET", "/api/conversations")
+                await complete_paid_sessions(user)
+                await user.think()
+            except StepFailed:
+                await user.think()
+            except websockets.WebSocketException:
+                return
+    finally:
+        await socket.close()
+
+
+async def ws_round_trip(user: VirtualUser, socket, message: dict):
+    """Send a chat event, then time a ping until its pong comes back"""
+    started = time.perf_counter()
+    try:
+        await socket.send(json.dumps(message))
+        await socket.send(json.dumps({"type": "ping"}))
+        while json.loads(await asyncio.wait_for(socket.recv(), timeout=10)).get("type") != "pong":
+            pass
+    except (asyncio.TimeoutError, websockets.WebSocketException) as error:
+        user.recorder.record("ws_round_trip", time.perf_counter() - started, type(error).__name__)
+        raise StepFailed("ws_round_trip") from error
+    user.recorder.record("ws_round_trip", time.perf_counter() - started)
+
+
+JOURNEYS = {"student": student_journey, "teacher": teacher_journey}
+
+
+async def run(base_url: str, users: int, duration: float, ramp: float = 0, mix: Dict[str, float] = None,
+              think_time: float = 1.0, seed: int = 0, timeout: float = 30, provider_callbacks: bool = False) -> dict:
+    """Run the virtual users against base_url and return the report"""
+    mix = mix or {"student": 0.8, "teacher": 0.2}
+    recorder = Recorder()
+    rng = random.Random(seed)
+    # Teachers start first so early students find someone to book
+    roles = sorted(rng.choices(list(mix), weights=list(mix.values()), k=users), key=lambda role: role != "teacher")
+    deadline = time.perf_counter() + ramp + duration
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        async def start(i: int, role: str):
+            await asyncio.sleep(ramp * i / users)
+            user = VirtualUser(client, recorder, random.Random(rng.random()), base_url, think_time,
+                               provider_callbacks)
+            try:
+                await JOURNEYS[role](user, deadline)
+            except StepFailed:
+                pass
+
+        await asyncio.gather(*(start(i, role) for i, role in enumerate(roles)))
+    report = recorder.report()
+    report.update({"users": users, "mix": mix, "ramp_s": ramp, "duration_s": duration})
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run marketplace user journeys against a running server")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--ramp", type=float, default=10, help="Seconds over which the users start")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds to run once all users started")
+    parser.add_argument("--mix", type=parse_mix, default="student=0.8,teacher=0.2",
+                        help="Journey weights, e.g. student=0.8,teacher=0.2")
+    parser.add_argument("--think-time", type=float, default=1.0, help="Mean pause between steps, in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=30, help="Per-request timeout, in seconds")
+    parser.add_argument("--callbacks", choices=["harness", "provider"], default="harness",
+                        help="Who sends payment callbacks: this harness, or the provider (mockprovider.py)")
+    parser.add_argument("--report", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.base_url, args.users, args.duration, args.ramp, args.mix,
+                             args.think_time, args.seed, args.timeout, args.callbacks == "provider"))
+    print_report(report)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,44 @@
 from fastapi import FastAPI, Depends, HTTPException, status, Query, WebSocket, WebSocketDisconnect, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_, func, desc
+from sqlalchemy import or_, and_, desc, cast
+from sqlalchemy.dialects.postgresql import BIT, JSONB
 from typing import List, Optional
-from datetime import timedelta, datetime
+from uuid import UUID
+from datetime import date, timedelta, datetime
+import asyncio
+import logging
 import models
 import schemas
 import auth
-from database import get_db, engine
+from database import get_db, SessionLocal, advisory_xact_lock, LOCK_NAMESPACE_TEACHER_BOOKING
 from payment import PaymentGateway
 from websocket import manager, websocket_endpoint
+import scheduling
+import recurrence
+import ratings
+import votes
+import ledger
+import exports
+import stats
+import analytics
+import verification
+import metrics
+import fastjson
+import admission
+from replicas import get_read_db, ReadAfterWriteMiddleware, READ_AFTER_WRITE_HEADER
+from sqlstats import SQLStatsMiddleware
 import os
 
-models.Base.metadata.create_all(bind=engine)
+# The schema is managed by the migrations (alembic upgrade head), not at startup
 
 app = FastAPI(title="Fast-Classified API", version="2.0.0")
+logger = logging.getLogger(__name__)
+
+# Innermost, so shed requests still get CORS headers and preflights are never shed
+app.add_middleware(admission.AdmissionMiddleware)
 
 # CORS Configuration
 allowed_origins = [
@@ -32,8 +56,43 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[READ_AFTER_WRITE_HEADER, "Retry-After"],
 )
 
+app.add_middleware(ReadAfterWriteMiddleware)
+app.add_middleware(SQLStatsMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
+
+@app.on_event("startup")
+async def size_threadpool():
+    admission.configure_threadpool()
+
+# ==================== Background Tasks ====================
+
+def flush_helpful_votes():
+    db = SessionLocal()
+    try:
+        return votes.helpful_vote_buffer.flush(db)
+    finally:
+        db.close()
+
+async def flush_helpful_votes_periodically():
+    while True:
+        await asyncio.sleep(votes.FLUSH_INTERVAL_SECONDS)
+        try:
+            await run_in_threadpool(flush_helpful_votes)
+        except Exception as e:
+            logger.warning("Failed to flush helpful votes: %s", e)
+
+@app.on_event("startup")
+async def start_background_tasks():
+    app.state.vote_flusher = asyncio.create_task(flush_helpful_votes_periodically())
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    app.state.vote_flusher.cancel()
+    await run_in_threadpool(flush_helpful_votes)
+
 # ==================== Authentication Endpoints ====================
 
 @app.post("/api/auth/signup", response_model=schemas.Token)
@@ -49,6 +108,7 @@ def signup(user: schemas.UserCreate, db: Session = Depends(get_db)):
         role=models.UserRole(user.role)
     )
     db.add(new_user)
+    stats.user_created(db, new_user.role)
     db.commit()
     db.refresh(new_user)
     
@@ -197,6 +257,7 @@ def update_teacher_profile(
     
     db.commit()
     db.refresh(profile)
+    scheduling.slot_cache.invalidate(profile.id)
     return profile
 
 # ==================== Request Feed Endpoints ====================
@@ -234,19 +295,24 @@ def create_request(
 def get_requests(
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     offset = (page - 1) * per_page
-    requests = db.query(models.Request).filter(
+    if fastjson.FAST_JSON_LISTS:
+        return fastjson.request_list(db.query(*fastjson.REQUEST_COLUMNS).outerjoin(
+            models.StudentProfile, models.StudentProfile.user_id == models.Request.student_id
+        ).filter(
+            models.Request.status == models.RequestStatus.ACTIVE
+        ).order_by(models.Request.created_at.desc()).offset(offset).limit(per_page))
+    # The student's profile comes from the same query, not one query per request
+    requests = db.query(models.Request, models.StudentProfile).outerjoin(
+        models.StudentProfile, models.StudentProfile.user_id == models.Request.student_id
+    ).filter(
         models.Request.status == models.RequestStatus.ACTIVE
     ).order_by(models.Request.created_at.desc()).offset(offset).limit(per_page).all()
     
     result = []
-    for req in requests:
-        student_profile = db.query(models.StudentProfile).filter(
-            models.StudentProfile.user_id == req.student_id
-        ).first()
-        
+    for req, student_profile in requests:
         req_response = schemas.RequestResponse.model_validate(req)
         if student_profile:
             req_response.student_name = student_profile.name
@@ -285,15 +351,17 @@ def search_teachers(
     language: Optional[str] = None,
     city: Optional[str] = None,
     experience_level: Optional[str] = None,
+    availability: Optional[str] = None,
     sort_by: Optional[str] = "rating",
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     query = db.query(models.TeacherProfile)
     
     if subject:
-        query = query.filter(models.TeacherProfile.subjects_taught.contains([subject]))
+        # JSON has no containment operator; the jsonb cast matches the GIN expression index
+        query = query.filter(cast(models.TeacherProfile.subjects_taught, JSONB).contains([subject]))
     
     if min_rate is not None:
         query = query.filter(models.TeacherProfile.hourly_rate >= min_rate)
@@ -323,6 +391,19 @@ def search_teachers(
         elif experience_level == "expert":
             query = query.filter(models.TeacherProfile.experience_years > 5)
     
+    if availability:
+        # Plain bitwise AND on the precomputed hour-of-week mask: a cheap per-row
+        # predicate that leaves the indexable filters above free to drive the plan
+        try:
+            wanted = scheduling.parse_availability_filter(availability)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid availability filter: {e}")
+        mask_type = BIT(scheduling.HOURS_PER_WEEK)
+        query = query.filter(
+            models.TeacherProfile.availability_mask.op("&")(cast(wanted, mask_type))
+            != cast("0" * scheduling.HOURS_PER_WEEK, mask_type)
+        )
+    
     # Sorting
     if sort_by == "rating":
         query = query.order_by(desc(models.TeacherProfile.average_rating))
@@ -334,12 +415,14 @@ def search_teachers(
         query = query.order_by(desc(models.TeacherProfile.total_reviews))
     
     offset = (page - 1) * per_page
+    if fastjson.FAST_JSON_LISTS:
+        return fastjson.teacher_list(query.with_entities(*fastjson.TEACHER_COLUMNS).offset(offset).limit(per_page))
     teachers = query.offset(offset).limit(per_page).all()
     
     return teachers
 
 @app.get("/api/teachers/{teacher_id}", response_model=schemas.TeacherProfileResponse)
-def get_teacher(teacher_id: str, db: Session = Depends(get_db)):
+def get_teacher(teacher_id: str, db: Session = Depends(get_read_db)):
     teacher = db.query(models.TeacherProfile).filter(
         models.TeacherProfile.id == teacher_id
     ).first()
@@ -349,6 +432,64 @@ def get_teacher(teacher_id: str, db: Session = Depends(get_db)):
     
     return teacher
 
+def _load_busy_intervals(db: Session, teacher_id, start: datetime, end: datetime):
+    """Intervals taken by pending or confirmed sessions of a teacher, including
+    occurrences of recurring series that have not been materialized"""
+    rows = db.query(
+        models.Session.scheduled_date,
+        models.Session.scheduled_time,
+        models.Session.duration
+    ).filter(
+        models.Session.teacher_id == teacher_id,
+        models.Session.status.in_(recurrence.ACTIVE_SESSION_STATUSES),
+        models.Session.scheduled_date >= start - timedelta(days=1),
+        models.Session.scheduled_date < end
+    ).all()
+    busy = [scheduling.session_interval(*row) for row in rows]
+    
+    occurrences = recurrence.virtual_occurrences(
+        db, [models.Session.teacher_id == teacher_id], start - timedelta(days=1), end
+    )
+    for rule, occurrence in occurrences:
+        busy.append((occurrence, occurrence + timedelta(hours=rule.duration)))
+    return busy
+
+def _teacher_free_slots(db: Session, teacher: models.TeacherProfile, start: datetime, end: datetime,
+                        cache: Optional[scheduling.SlotCache] = None):
+    return scheduling.free_slots(
+        teacher.id,
+        teacher.availability,
+        start,
+        end,
+        lambda range_start, range_end: _load_busy_intervals(db, teacher.id, range_start, range_end),
+        cache=cache
+    )
+
+@app.get("/api/teachers/{teacher_id}/slots", response_model=List[schemas.TimeSlot])
+def get_teacher_slots(
+    teacher_id: str,
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    db: Session = Depends(get_read_db)
+):
+    start = (start or datetime.utcnow()).replace(tzinfo=None)
+    end = (end or start + timedelta(days=28)).replace(tzinfo=None)
+    
+    if end <= start:
+        raise HTTPException(status_code=400, detail="'to' must be after 'from'")
+    if end - start > timedelta(days=62):
+        raise HTTPException(status_code=400, detail="Slot window cannot exceed 62 days")
+    
+    teacher = db.query(models.TeacherProfile).filter(
+        models.TeacherProfile.id == teacher_id
+    ).first()
+    
+    if not teacher:
+        raise HTTPException(status_code=404, detail="Teacher not found")
+    
+    slots = _teacher_free_slots(db, teacher, start, end)
+    return [schemas.TimeSlot(start=slot_start, end=slot_end) for slot_start, slot_end in slots]
+
 # ==================== Session Booking Endpoints ====================
 
 @app.post("/api/sessions/book", response_model=schemas.SessionResponse)
@@ -376,6 +517,36 @@ def book_session(
     if not teacher:
         raise HTTPException(status_code=404, detail="Teacher not found")
     
+    # Serialize bookings per teacher for the rest of this transaction so the
+    # conflict check below and the insert cannot interleave with another booking
+    advisory_xact_lock(db, LOCK_NAMESPACE_TEACHER_BOOKING, teacher.id)
+    
+    slot_start, slot_end = scheduling.session_interval(
+        session_data.scheduled_date, session_data.scheduled_time, session_data.duration
+    )
+    # A series has to be free at every occurrence, not only the first
+    starts = [slot_start]
+    if session_data.is_recurring:
+        starts = recurrence.booking_occurrences(
+            slot_start, session_data.recurring_frequency, session_data.recurring_until
+        )
+    length = slot_end - slot_start
+    window_end = starts[-1] + length
+    if teacher.availability:
+        # Bypass the shared cache, which may be stale for bookings made through other workers
+        open_slots = _teacher_free_slots(db, teacher, slot_start, window_end, cache=scheduling.SlotCache())
+        conflict = next((start for start in starts if not scheduling.is_slot_free(open_slots, start, start + length)), None)
+    else:
+        busy = _load_busy_intervals(db, teacher.id, slot_start, window_end)
+        conflict = next((start for start in starts if scheduling.overlaps(busy, start, start + length)), None)
+    if conflict == slot_start:
+        raise HTTPException(status_code=409, detail="Selected time slot is not available")
+    if conflict is not None:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Selected time slot is not available on {conflict.strftime('%Y-%m-%d')}"
+        )
+    
     # Calculate total amount
     total_amount = teacher.hourly_rate * session_data.duration
     
@@ -392,11 +563,12 @@ def book_session(
         total_amount=total_amount,
         is_recurring=session_data.is_recurring,
         recurring_frequency=session_data.recurring_frequency,
+        recurring_until=session_data.recurring_until if session_data.is_recurring else None,
         notes=session_data.notes
     )
     db.add(new_session)
-    db.commit()
-    db.refresh(new_session)
+    db.flush()
+    stats.sessions_created(db)
     
     # Create notification for teacher
     notification = models.Notification(
@@ -408,6 +580,8 @@ def book_session(
     )
     db.add(notification)
     db.commit()
+    db.refresh(new_session)
+    scheduling.slot_cache.invalidate(teacher.id)
     
     response = schemas.SessionResponse.model_validate(new_session)
     response.teacher_name = teacher.name
@@ -415,9 +589,32 @@ def book_session(
     
     return response
 
+def _session_response(session: models.Session, teacher_name: Optional[str] = None,
+                      student_name: Optional[str] = None) -> schemas.SessionResponse:
+    response = schemas.SessionResponse.model_validate(session)
+    response.teacher_name = teacher_name
+    response.student_name = student_name
+    if session.parent_session_id:
+        response.series_id = session.parent_session_id
+        response.occurrence_date = session.occurrence_date
+    return response
+
+def _virtual_session_response(rule: models.Session, occurrence: datetime, teacher_name: Optional[str],
+                              student_name: Optional[str]) -> schemas.SessionResponse:
+    response = schemas.SessionResponse.model_validate(
+        models.Session(created_at=rule.created_at, **recurrence.occurrence_values(rule, occurrence))
+    )
+    response.teacher_name = teacher_name
+    response.student_name = student_name
+    response.series_id = rule.id
+    response.is_materialized = False
+    return response
+
 @app.get("/api/sessions", response_model=List[schemas.SessionResponse])
 def get_sessions(
     status: Optional[str] = None,
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=100),
     current_user: models.User = Depends(auth.get_current_user),
@@ -430,29 +627,87 @@ def get_sessions(
         ).first()
         if not profile:
             return []
-        query = db.query(models.Session).filter(models.Session.student_id == profile.id)
+        criteria = [models.Session.student_id == profile.id]
     else:
         profile = db.query(models.TeacherProfile).filter(
             models.TeacherProfile.user_id == current_user.id
         ).first()
         if not profile:
             return []
-        query = db.query(models.Session).filter(models.Session.teacher_id == profile.id)
+        criteria = [models.Session.teacher_id == profile.id]
+    
+    query = db.query(models.Session, models.TeacherProfile.name, models.StudentProfile.name).join(
+        models.TeacherProfile, models.Session.teacher_id == models.TeacherProfile.id
+    ).join(
+        models.StudentProfile, models.Session.student_id == models.StudentProfile.id
+    ).filter(*criteria)
+    stored = query.filter(models.Session.status == status) if status else query
+    offset = (page - 1) * per_page
     
-    if status:
-        query = query.filter(models.Session.status == status)
+    if start is None and end is None:
+        rows = stored.order_by(desc(models.Session.scheduled_date)).offset(offset).limit(per_page).all()
+        return [_session_response(session, teacher_name, student_name) for session, teacher_name, student_name in rows]
     
-    offset = (page - 1) * per_page
-    sessions = query.order_by(desc(models.Session.scheduled_date)).offset(offset).limit(per_page).all()
+    # Window mode: stored sessions plus recurring occurrences expanded on the fly,
+    # in a constant number of queries however many occurrences the window holds
+    start = (start or datetime.utcnow() - timedelta(days=30)).replace(tzinfo=None)
+    end = (end or start + timedelta(days=90)).replace(tzinfo=None)
+    if end - start > timedelta(days=366):
+        raise HTTPException(status_code=400, detail="Session window cannot exceed 366 days")
     
-    result = []
-    for session in sessions:
-        response = schemas.SessionResponse.model_validate(session)
-        response.teacher_name = session.teacher.name if session.teacher else None
-        response.student_name = session.student.name if session.student else None
-        result.append(response)
+    rows = stored.filter(
+        models.Session.scheduled_date >= start,
+        models.Session.scheduled_date < end
+    ).all()
+    result = [_session_response(session, teacher_name, student_name) for session, teacher_name, student_name in rows]
+    
+    # Expanded occurrences are always pending until they get their own row
+    if not status or status == models.SessionStatus.PENDING.value:
+        rules = query.filter(
+            models.Session.is_recurring == True,
+            models.Session.parent_session_id == None,
+            models.Session.status != models.SessionStatus.CANCELLED,
+            models.Session.scheduled_date < end,
+            or_(models.Session.recurring_until == None, models.Session.recurring_until >= start)
+        ).all()
+        names = {session.id: (teacher_name, student_name) for session, teacher_name, student_name in rules}
+        series = [session for session, _, _ in rules]
+        materialized = recurrence.load_materialized(db, series, start, end)
+        for rule, occurrence in recurrence.expand_series(series, materialized, start, end):
+            result.append(_virtual_session_response(rule, occurrence, *names[rule.id]))
+    
+    result.sort(key=lambda response: response.scheduled_date, reverse=True)
+    return result[offset:offset + per_page]
+
+def _check_session_access(session: models.Session, current_user: models.User, db: Session):
+    # Verify user has access to this session
+    if current_user.role == models.UserRole.TEACHER:
+        profile = db.query(models.TeacherProfile).filter(
+            models.TeacherProfile.user_id == current_user.id
+        ).first()
+        if not profile or session.teacher_id != profile.id:
+            raise HTTPException(status_code=403, detail="Access denied")
+
+def _apply_session_update(
+    session: models.Session,
+    session_update: schemas.SessionUpdate,
+    db: Session
+) -> schemas.SessionResponse:
+    updates = {key: value for key, value in session_update.model_dump(exclude_unset=True).items() if value is not None}
+    if "status" in updates:
+        stats.session_status_changed(db, session.status, updates["status"])
+    for key, value in updates.items():
+        setattr(session, key, value)
     
-    return result
+    db.commit()
+    db.refresh(session)
+    scheduling.slot_cache.invalidate(session.teacher_id)
+    
+    return _session_response(
+        session,
+        session.teacher.name if session.teacher else None,
+        session.student.name if session.student else None
+    )
 
 @app.patch("/api/sessions/{session_id}", response_model=schemas.SessionResponse)
 def update_session(
@@ -466,26 +721,40 @@ def update_session(
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    # Verify user has access to this session
-    if current_user.role == models.UserRole.TEACHER:
-        profile = db.query(models.TeacherProfile).filter(
-            models.TeacherProfile.user_id == current_user.id
-        ).first()
-        if not profile or session.teacher_id != profile.id:
-            raise HTTPException(status_code=403, detail="Access denied")
+    _check_session_access(session, current_user, db)
+    return _apply_session_update(session, session_update, db)
+
+@app.patch("/api/sessions/{session_id}/occurrences/{occurrence_date}", response_model=schemas.SessionResponse)
+def update_session_occurrence(
+    session_id: str,
+    occurrence_date: datetime,
+    session_update: schemas.SessionUpdate,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Modify one occurrence of a recurring series, giving it its own row first"""
+    rule = db.query(models.Session).filter(
+        models.Session.id == session_id,
+        models.Session.is_recurring == True,
+        models.Session.parent_session_id == None
+    ).first()
     
-    for key, value in session_update.model_dump(exclude_unset=True).items():
-        if value is not None:
-            setattr(session, key, value)
+    if not rule:
+        raise HTTPException(status_code=404, detail="Session not found")
     
-    db.commit()
-    db.refresh(session)
+    # Occurrences share the series' teacher, so check before giving one a row
+    _check_session_access(rule, current_user, db)
     
-    response = schemas.SessionResponse.model_validate(session)
-    response.teacher_name = session.teacher.name if session.teacher else None
-    response.student_name = session.student.name if session.student else None
+    occurrence_date = occurrence_date.replace(tzinfo=None)
+    expanded = scheduling.expand_occurrences(
+        recurrence.series_start(rule), rule.recurring_frequency,
+        occurrence_date, occurrence_date + timedelta(microseconds=1), rule.recurring_until
+    )
+    if not expanded:
+        raise HTTPException(status_code=404, detail="Occurrence not found")
     
-    return response
+    occurrence = recurrence.materialize_occurrence(db, rule, occurrence_date)
+    return _apply_session_update(occurrence, session_update, db)
 
 # ==================== Review Endpoints ====================
 
@@ -537,23 +806,15 @@ def create_review(
         review_text=review_data.review_text
     )
     db.add(new_review)
+    db.flush()
     
-    # Update teacher's average rating
-    teacher = db.query(models.TeacherProfile).filter(
-        models.TeacherProfile.id == session.teacher_id
-    ).first()
+    # Update teacher's rating aggregates in place, without loading their reviews
+    teacher_user_id = ratings.record_rating(db, session.teacher_id, review_data.rating)
     
-    if teacher:
-        all_reviews = db.query(models.Review).filter(
-            models.Review.teacher_id == teacher.id
-        ).all()
-        total_rating = sum(r.rating for r in all_reviews) + review_data.rating
-        teacher.total_reviews = len(all_reviews) + 1
-        teacher.average_rating = total_rating / teacher.total_reviews
-        
+    if teacher_user_id:
         # Create notification for teacher
         notification = models.Notification(
-            user_id=teacher.user_id,
+            user_id=teacher_user_id,
             type=models.NotificationType.REVIEW_POSTED,
             title="New Review",
             message=f"{student_profile.name} left a {review_data.rating}-star review.",
@@ -574,7 +835,7 @@ def get_teacher_reviews(
     teacher_id: str,
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     offset = (page - 1) * per_page
     reviews = db.query(models.Review).filter(
@@ -626,15 +887,18 @@ def mark_review_helpful(
     current_user: models.User = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
-    review = db.query(models.Review).filter(models.Review.id == review_id).first()
+    review = db.query(models.Review.id, models.Review.helpful_votes).filter(
+        models.Review.id == review_id
+    ).first()
     
     if not review:
         raise HTTPException(status_code=404, detail="Review not found")
     
-    review.helpful_votes += 1
-    db.commit()
+    # Each user counts once; the counter itself is updated by the periodic flush
+    if votes.record_vote(db, review.id, current_user.id):
+        votes.helpful_vote_buffer.add(review.id)
     
-    return {"helpful_votes": review.helpful_votes}
+    return {"helpful_votes": (review.helpful_votes or 0) + votes.helpful_vote_buffer.pending(review.id)}
 
 # ==================== Messaging Endpoints ====================
 
@@ -794,6 +1058,10 @@ def get_messages(
     db.commit()
     
     offset = (page - 1) * per_page
+    if fastjson.FAST_JSON_LISTS:
+        return fastjson.message_list(db.query(*fastjson.MESSAGE_COLUMNS).filter(
+            models.Message.conversation_id == conversation_id
+        ).order_by(desc(models.Message.created_at)).offset(offset).limit(per_page))
     messages = db.query(models.Message).filter(
         models.Message.conversation_id == conversation_id
     ).order_by(desc(models.Message.created_at)).offset(offset).limit(per_page).all()
@@ -869,6 +1137,12 @@ async def payment_callback(
     else:
         transaction_data = await request.json()
     
+    # Off the event loop: a repeated callback blocks on the row lock below
+    # until the first one commits, which needs the loop to keep running
+    return await run_in_threadpool(settle_payment_callback, db, provider, transaction_data)
+
+
+def settle_payment_callback(db: Session, provider: str, transaction_data: dict) -> dict:
     # Create gateway instance
     gateway = PaymentGateway(provider)
     
@@ -881,14 +1155,17 @@ async def payment_callback(
     # Get transaction ID
     transaction_id = transaction_data.get("pp_TxnRefNo") if provider == "jazzcash" else transaction_data.get("orderRefNum")
     
-    # Find transaction
+    # Find transaction, locked so a repeated callback waits for this one
     transaction = db.query(models.Transaction).filter(
         models.Transaction.provider_transaction_id == transaction_id
-    ).first()
+    ).with_for_update().first()
     
     if not transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
     
+    if transaction.status == models.PaymentStatus.COMPLETED:
+        return {"status": transaction.status.value}
+    
     # Get response code
     response_code = transaction_data.get("pp_ResponseCode") if provider == "jazzcash" else transaction_data.get("responseCode")
     
@@ -897,8 +1174,16 @@ async def payment_callback(
     
     if payment_status == "completed":
         transaction.status = models.PaymentStatus.COMPLETED
+        transaction.completed_at = datetime.utcnow()
+        if transaction.transaction_type == models.TransactionType.PAYMENT:
+            stats.bump(db, total_revenue_paisa=ledger.to_paisa(transaction.amount))
         transaction.payment_reference = transaction_data.get("pp_TxnRefNo") if provider == "jazzcash" else transaction_data.get("transactionId")
         
+        # Credit wallet deposits
+        if transaction.transaction_type == models.TransactionType.DEPOSIT and transaction.wallet_id:
+            ledger.credit_wallet(db, transaction.id, transaction.wallet_id, ledger.to_paisa(transaction.amount),
+                                 ledger.provider_account(provider))
+        
         # Update session
         if transaction.session_id:
             session = db.query(models.Session).filter(
@@ -906,6 +1191,7 @@ async def payment_callback(
             ).first()
             if session:
                 session.payment_status = models.PaymentStatus.COMPLETED
+                stats.session_status_changed(db, session.status, models.SessionStatus.CONFIRMED)
                 session.status = models.SessionStatus.CONFIRMED
                 
                 # Notify teacher
@@ -1032,9 +1318,6 @@ def withdraw_from_wallet(
     if not wallet:
         raise HTTPException(status_code=404, detail="Wallet not found")
     
-    if wallet.balance < withdraw_data.amount:
-        raise HTTPException(status_code=400, detail="Insufficient balance")
-    
     # Verify bank account
     bank_account = db.query(models.BankAccount).filter(
         models.BankAccount.id == withdraw_data.bank_account_id,
@@ -1053,9 +1336,15 @@ def withdraw_from_wallet(
         description=f"Withdrawal to {bank_account.bank_name} - {bank_account.account_number[-4:]}"
     )
     db.add(transaction)
-    
-    # Deduct from wallet
-    wallet.balance -= withdraw_data.amount
+    db.flush()
+    
+    # Deduct from wallet; the balance check is part of the same UPDATE
+    try:
+        ledger.debit_wallet(db, transaction.id, wallet.id, ledger.to_paisa(withdraw_data.amount),
+                            ledger.PAYOUTS_ACCOUNT)
+    except ledger.InsufficientFunds:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Insufficient balance")
     
     db.commit()
     
@@ -1169,37 +1458,59 @@ def get_admin_stats(
     if current_user.role != models.UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    total_users = db.query(models.User).count()
-    total_students = db.query(models.User).filter(models.User.role == models.UserRole.STUDENT).count()
-    total_teachers = db.query(models.User).filter(models.User.role == models.UserRole.TEACHER).count()
-    total_sessions = db.query(models.Session).count()
-    
-    total_revenue = db.query(func.sum(models.Transaction.amount)).filter(
-        models.Transaction.status == models.PaymentStatus.COMPLETED,
-        models.Transaction.transaction_type == models.TransactionType.PAYMENT
-    ).scalar() or 0.0
-    
-    pending_verifications = db.query(models.VerificationDocument).filter(
-        models.VerificationDocument.status == models.VerificationStatus.PENDING
-    ).count()
-    
-    active_sessions = db.query(models.Session).filter(
-        models.Session.status.in_([models.SessionStatus.PENDING, models.SessionStatus.CONFIRMED])
-    ).count()
+    totals = stats.read_totals(db)
     
     return schemas.AdminStatsResponse(
-        total_users=total_users,
-        total_students=total_students,
-        total_teachers=total_teachers,
-        total_sessions=total_sessions,
-        total_revenue=total_revenue,
-        pending_verifications=pending_verifications,
-        active_sessions=active_sessions
+        total_users=totals["total_users"],
+        total_students=totals["total_students"],
+        total_teachers=totals["total_teachers"],
+        total_sessions=totals["total_sessions"],
+        total_revenue=totals["total_revenue_paisa"] / 100,
+        pending_verifications=totals["pending_verifications"],
+        active_sessions=totals["active_sessions"]
+    )
+
+# Longest window the timeseries endpoint serves in one request
+MAX_TIMESERIES_DAYS = 3 * 366
+
+@app.get("/api/admin/timeseries", response_model=schemas.TimeseriesResponse)
+def get_admin_timeseries(
+    metric_names: Optional[str] = Query(None, alias="metrics"),
+    interval: str = Query("day"),
+    start: Optional[date] = Query(None, alias="from"),
+    end: Optional[date] = Query(None, alias="to"),
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
+    if current_user.role != models.UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    names = [name.strip() for name in metric_names.split(",") if name.strip()] if metric_names else analytics.METRICS
+    if any(name not in analytics.METRICS for name in names):
+        raise HTTPException(status_code=400, detail=f"metrics must be among {', '.join(analytics.METRICS)}")
+    if interval not in analytics.INTERVALS:
+        raise HTTPException(status_code=400, detail="interval must be day, week or month")
+    
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=364)
+    if start > end or (end - start).days > MAX_TIMESERIES_DAYS:
+        raise HTTPException(status_code=400, detail="Invalid date range")
+    
+    series = analytics.timeseries(db, names, interval, start, end)
+    return schemas.TimeseriesResponse(
+        interval=interval,
+        start=start,
+        end=end,
+        series={
+            name: [schemas.TimeseriesPoint(period=period, value=value) for period, value in points]
+            for name, points in series.items()
+        }
     )
 
 @app.get("/api/admin/users", response_model=List[schemas.AdminUserResponse])
 def get_admin_users(
     role: Optional[str] = None,
+    q: Optional[str] = Query(None, max_length=100),
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
     current_user: models.User = Depends(auth.get_current_user),
@@ -1208,41 +1519,76 @@ def get_admin_users(
     if current_user.role != models.UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    query = db.query(models.User)
-    
-    if role:
-        query = query.filter(models.User.role == role)
+    try:
+        role = models.UserRole(role) if role else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid role")
     
+    # Profile names are joined in, and q matches email or name prefixes
+    query = exports.users_query(role, q.strip() if q else None)
     offset = (page - 1) * per_page
-    users = query.order_by(desc(models.User.created_at)).offset(offset).limit(per_page).all()
-    
-    result = []
-    for user in users:
-        response = schemas.AdminUserResponse(
-            id=user.id,
-            email=user.email,
-            role=user.role.value,
-            is_active=user.is_active,
-            is_verified=user.is_verified,
-            created_at=user.created_at
+    rows = db.execute(query.offset(offset).limit(per_page)).all()
+    
+    return [
+        schemas.AdminUserResponse(
+            id=row.id,
+            email=row.email,
+            role=row.role.value,
+            is_active=row.is_active,
+            is_verified=row.is_verified,
+            created_at=row.created_at,
+            profile_name=row.profile_name
         )
-        
-        # Get profile name
-        if user.role == models.UserRole.STUDENT:
-            profile = db.query(models.StudentProfile).filter(
-                models.StudentProfile.user_id == user.id
-            ).first()
-        else:
-            profile = db.query(models.TeacherProfile).filter(
-                models.TeacherProfile.user_id == user.id
-            ).first()
-        
-        if profile:
-            response.profile_name = profile.name
-        
-        result.append(response)
+        for row in rows
+    ]
+
+def _export_response(query, fmt: str, name: str):
+    if fmt not in exports.EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+    filename = f"{name}-{datetime.utcnow():%Y%m%d%H%M%S}.{fmt}"
+    return StreamingResponse(
+        exports.stream_export(SessionLocal, query, fmt),
+        media_type=exports.EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@app.get("/api/admin/users/export")
+def export_admin_users(
+    role: Optional[str] = None,
+    q: Optional[str] = Query(None, max_length=100),
+    format: str = Query("csv"),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    if current_user.role != models.UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
     
-    return result
+    try:
+        role = models.UserRole(role) if role else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid role")
+    
+    return _export_response(exports.users_query(role, q.strip() if q else None), format, "users")
+
+@app.get("/api/admin/transactions/export")
+def export_transactions(
+    status: Optional[str] = None,
+    transaction_type: Optional[str] = None,
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    format: str = Query("csv"),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    if current_user.role != models.UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    try:
+        status = models.PaymentStatus(status) if status else None
+        transaction_type = models.TransactionType(transaction_type) if transaction_type else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid status or transaction type")
+    
+    query = exports.transactions_query(status, transaction_type, start, end)
+    return _export_response(query, format, "transactions")
 
 @app.get("/api/admin/verifications", response_model=List[schemas.VerificationDocumentResponse])
 def get_pending_verifications(
@@ -1265,46 +1611,85 @@ def get_pending_verifications(
     
     return [schemas.VerificationDocumentResponse.model_validate(d) for d in documents]
 
-@app.post("/api/admin/verifications/{document_id}/review")
-def review_verification(
-    document_id: str,
-    review_data: schemas.VerificationReviewRequest,
+@app.post("/api/admin/verifications/claim", response_model=List[schemas.VerificationDocumentResponse])
+def claim_verifications(
+    claim_data: schemas.VerificationClaimRequest,
     current_user: models.User = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
     if current_user.role != models.UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    document = db.query(models.VerificationDocument).filter(
-        models.VerificationDocument.id == document_id
-    ).first()
+    documents = verification.claim_documents(db, current_user.id, claim_data.limit)
+    db.commit()
     
-    if not document:
-        raise HTTPException(status_code=404, detail="Document not found")
+    return [schemas.VerificationDocumentResponse.model_validate(d) for d in documents]
+
+@app.post("/api/admin/verifications/release")
+def release_verifications(
+    release_data: schemas.VerificationReleaseRequest,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
+    if current_user.role != models.UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
     
-    document.status = models.VerificationStatus(review_data.status)
-    document.admin_notes = review_data.admin_notes
+    released = verification.release_claims(db, current_user.id, release_data.document_ids)
+    db.commit()
     
-    if review_data.status == "verified":
-        document.verified_at = datetime.utcnow()
-        
-        # Update teacher's verification status
-        teacher = db.query(models.TeacherProfile).filter(
-            models.TeacherProfile.id == document.teacher_id
-        ).first()
-        
-        if teacher:
-            # Check if all documents are verified
-            all_verified = db.query(models.VerificationDocument).filter(
-                models.VerificationDocument.teacher_id == teacher.id,
-                models.VerificationDocument.status != models.VerificationStatus.VERIFIED
-            ).count() == 0
-            
-            if all_verified:
-                teacher.is_verified = True
-                teacher.verification_status = models.VerificationStatus.VERIFIED
+    return {"released": released}
+
+def _review_documents(db: Session, decisions: List[schemas.VerificationDecision], reviewer_id) -> int:
+    try:
+        reviewed = [
+            (decision.document_id, models.VerificationStatus(decision.status), decision.admin_notes)
+            for decision in decisions
+        ]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="status must be pending, verified or rejected")
+    if len({document_id for document_id, _, _ in reviewed}) != len(reviewed):
+        raise HTTPException(status_code=400, detail="Each document can only be reviewed once per request")
+    
+    try:
+        teacher_ids = verification.apply_reviews(db, reviewed, reviewer_id)
+    except verification.DocumentsNotFound as e:
+        db.rollback()
+        detail = "Document not found" if len(reviewed) == 1 else str(e)
+        raise HTTPException(status_code=404, detail=detail)
+    except verification.DocumentsClaimed as e:
+        db.rollback()
+        detail = "Document is being reviewed by another admin" if len(reviewed) == 1 else str(e)
+        raise HTTPException(status_code=409, detail=detail)
     
     db.commit()
+    return len(teacher_ids)
+
+@app.post("/api/admin/verifications/review")
+def review_verifications_bulk(
+    review_data: schemas.BulkVerificationReviewRequest,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
+    if current_user.role != models.UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    teachers = _review_documents(db, review_data.decisions, current_user.id)
+    
+    return {"reviewed": len(review_data.decisions), "teachers_updated": teachers}
+
+@app.post("/api/admin/verifications/{document_id}/review")
+def review_verification(
+    document_id: UUID,
+    review_data: schemas.VerificationReviewRequest,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
+    if current_user.role != models.UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    _review_documents(
+        db, [schemas.VerificationDecision(document_id=document_id, **review_data.model_dump())], current_user.id
+    )
     
     return {"message": f"Document {review_data.status}"}
 
@@ -1331,6 +1716,7 @@ def upload_verification_document(
         **document_data.model_dump()
     )
     db.add(document)
+    stats.verification_status_changed(db, None, models.VerificationStatus.PENDING)
     db.commit()
     db.refresh(document)
     
@@ -1361,6 +1747,17 @@ def get_my_verification_documents(
 async def websocket_route(websocket: WebSocket, user_id: str):
     await websocket_endpoint(websocket, user_id)
 
+# ==================== Metrics Endpoint ====================
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics(request: Request):
+    # Optional shared secret for scrapers, when the endpoint is reachable from outside
+    token = os.getenv("METRICS_TOKEN")
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    body, content_type = metrics.render()
+    return Response(body, media_type=content_type)
+
 # ==================== Root Endpoint ====================
 
 @app.get("/")
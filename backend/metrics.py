@@ -0,0 +1,171 @@
+from bisect import bisect_left
+import itertools
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import HistogramMetricFamily
+from prometheus_client.utils import floatToGoString
+
+# Prometheus metrics of this process, served at /metrics. With several
+# gunicorn workers each worker reports its own values.
+
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_seconds", "Time spent waiting to check a connection out of the pool",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+DB_POOL_OVERFLOW_TOTAL = Counter(
+    "db_pool_overflow_connections_total", "Connections opened beyond pool_size"
+)
+DB_POOL_TIMEOUTS_TOTAL = Counter(
+    "db_pool_checkout_timeouts_total", "Checkouts that gave up after pool_timeout"
+)
+DB_POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Connections currently checked out")
+DB_POOL_IDLE = Gauge("db_pool_idle", "Idle connections held by the pool")
+DB_POOL_SIZE = Gauge("db_pool_size", "Configured pool_size")
+DB_POOL_MAX_OVERFLOW = Gauge("db_pool_max_overflow", "Configured max_overflow")
+
+
+def watch_pool(pool, max_overflow: int):
+    """Report the pool's live state whenever the metrics are scraped"""
+    DB_POOL_CHECKED_OUT.set_function(pool.checkedout)
+    DB_POOL_IDLE.set_function(pool.checkedin)
+    DB_POOL_SIZE.set(pool.size())
+    DB_POOL_MAX_OVERFLOW.set(max_overflow)
+
+
+def render():
+    """The metrics in the Prometheus text format, with its content type"""
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+DB_STATEMENTS_PER_REQUEST = Histogram(
+    "http_request_db_statements", "SQL statements run per request", ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+DB_SECONDS_PER_REQUEST = Histogram(
+    "http_request_db_seconds", "Time spent in SQL statements per request", ["route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+N_PLUS_ONE_TOTAL = Counter(
+    "http_request_n_plus_one_total", "Requests that repeated one statement shape past the threshold", ["route"]
+)
+
+_route_paths = {}
+
+def route_label(scope) -> str:
+    """Path template of the route that handled the request, so label values stay bounded"""
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+    if endpoint not in _route_paths:
+        _route_paths[endpoint] = next(
+            (route.path for route in scope["app"].routes if getattr(route, "endpoint", None) is endpoint),
+            "unmatched"
+        )
+    return _route_paths[endpoint]
+
+
+HTTP_REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class RequestLatencyCollector:
+    """http_request_seconds by method, route template and status, turned into a histogram when scraped
+
+    A prometheus_client Histogram takes two locks per observation, which alone
+    costs about 2 us. MetricsMiddleware only runs on the event loop thread, so
+    it keeps plain per-bucket counts instead and recording a request is a
+    bisect and two additions.
+    """
+
+    def __init__(self):
+        # (method, route, status) -> [per-bucket counts with +Inf last, sum of seconds]
+        self.series = {}
+
+    def series_for(self, method: str, route: str, status: int) -> list:
+        return self.series.setdefault((method, route, str(status)), [[0] * (len(HTTP_REQUEST_BUCKETS) + 1), 0.0])
+
+    def collect(self):
+        family = HistogramMetricFamily(
+            "http_request_seconds", "Time to serve a request until its response was sent; _count is the status count",
+            labels=["method", "route", "status"]
+        )
+        bounds = [floatToGoString(bound) for bound in HTTP_REQUEST_BUCKETS] + ["+Inf"]
+        for labels, (counts, total) in list(self.series.items()):
+            family.add_metric(list(labels), list(zip(bounds, itertools.accumulate(counts))), total)
+        yield family
+
+
+HTTP_REQUEST_SECONDS = RequestLatencyCollector()
+REGISTRY.register(HTTP_REQUEST_SECONDS)
+
+# Series by (endpoint, method, status), so each request is one dict lookup
+_request_series = {}
+
+
+class MetricsMiddleware:
+    """Time each HTTP request, labelled with its route template and response status"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            key = (scope.get("endpoint"), scope["method"], status)
+            series = _request_series.get(key)
+            if series is None:
+                series = _request_series[key] = HTTP_REQUEST_SECONDS.series_for(
+                    scope["method"], route_label(scope), status
+                )
+            series[0][bisect_left(HTTP_REQUEST_BUCKETS, elapsed)] += 1
+            series[1] += elapsed
+
+
+WS_CONNECTIONS = Gauge("ws_connections", "Open WebSocket connections")
+WS_ONLINE_USERS = Gauge("ws_online_users", "Users marked online")
+WS_TYPING_USERS = Gauge("ws_typing_users", "Users currently typing, across conversations")
+WS_MESSAGES_SENT_TOTAL = Counter("ws_messages_sent_total", "Messages pushed to WebSocket clients", ["type"])
+WS_SEND_FAILURES_TOTAL = Counter("ws_send_failures_total", "Pushes that failed and dropped the connection")
+
+
+def watch_connections(manager):
+    """Report a ConnectionManager's live state whenever the metrics are scraped"""
+    WS_CONNECTIONS.set_function(lambda: len(manager.active_connections))
+    WS_ONLINE_USERS.set_function(lambda: len(manager.online_users))
+    WS_TYPING_USERS.set_function(lambda: sum(len(users) for users in list(manager.typing_users.values())))
+
+
+PAYMENT_PROVIDER_SECONDS = Histogram(
+    "payment_provider_request_seconds", "Time waiting on payment provider APIs", ["provider", "outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+
+THREADPOOL_THREADS = Gauge("threadpool_threads", "Configured threads for sync handlers")
+THREADPOOL_BUSY = Gauge("threadpool_busy", "Threads running sync handlers and dependencies")
+THREADPOOL_WAITING = Gauge("threadpool_waiting", "Calls queued for a thread")
+ADMISSION_REJECTED_TOTAL = Counter(
+    "admission_rejected_total", "Requests shed with a 503 before reaching a handler", ["route", "reason"]
+)
+
+
+def watch_threadpool(limiter):
+    """Report the threadpool's live state whenever the metrics are scraped"""
+    THREADPOOL_THREADS.set_function(lambda: limiter.total_tokens)
+    THREADPOOL_BUSY.set_function(lambda: limiter.borrowed_tokens)
+    THREADPOOL_WAITING.set_function(lambda: limiter.statistics().tasks_waiting)
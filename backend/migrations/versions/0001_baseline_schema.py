@@ -0,0 +1,246 @@
+"""Baseline schema, as create_all built it before migrations existed
+
+Databases created that way are already at this revision:
+alembic stamp 0001 && alembic upgrade head
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 03:45:22.381626
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+ENUMS = [
+    "userrole", "notificationtype", "requeststatus", "verificationstatus",
+    "sessionstatus", "paymentstatus", "transactiontype",
+]
+
+
+def upgrade():
+    op.create_table('users',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('password_hash', sa.String(), nullable=False),
+    sa.Column('role', sa.Enum('STUDENT', 'TEACHER', 'ADMIN', name='userrole'), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('is_verified', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_table('conversations',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('participant_1_id', sa.UUID(), nullable=False),
+    sa.Column('participant_2_id', sa.UUID(), nullable=False),
+    sa.Column('last_message_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['participant_1_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['participant_2_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('notifications',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('type', sa.Enum('MESSAGE', 'SESSION_BOOKED', 'PAYMENT_RECEIVED', 'REVIEW_POSTED', 'SESSION_REMINDER', 'TEACHER_ACCEPTED', name='notificationtype'), nullable=False),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.Column('message', sa.Text(), nullable=False),
+    sa.Column('data', sa.JSON(), nullable=True),
+    sa.Column('is_read', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('requests',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('student_id', sa.UUID(), nullable=True),
+    sa.Column('subject', sa.String(), nullable=False),
+    sa.Column('topic', sa.String(), nullable=False),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.Column('preferred_format', sa.String(), nullable=True),
+    sa.Column('urgency_level', sa.String(), nullable=True),
+    sa.Column('hourly_rate', sa.Float(), nullable=True),
+    sa.Column('duration', sa.String(), nullable=True),
+    sa.Column('status', sa.Enum('ACTIVE', 'COMPLETED', 'EXPIRED', name='requeststatus'), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['student_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('student_profiles',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=True),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('bio', sa.String(), nullable=True),
+    sa.Column('gpa', sa.JSON(), nullable=True),
+    sa.Column('grade_level', sa.String(), nullable=True),
+    sa.Column('institution', sa.String(), nullable=True),
+    sa.Column('avatar_url', sa.String(), nullable=True),
+    sa.Column('preferred_formats', sa.ARRAY(sa.String()), nullable=True),
+    sa.Column('phone_number', sa.String(), nullable=True),
+    sa.Column('city', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id')
+    )
+    op.create_table('teacher_profiles',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=True),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('bio', sa.String(), nullable=True),
+    sa.Column('hourly_rate', sa.Float(), nullable=False),
+    sa.Column('subjects_taught', sa.JSON(), nullable=True),
+    sa.Column('experience_years', sa.Integer(), nullable=True),
+    sa.Column('certifications', sa.JSON(), nullable=True),
+    sa.Column('avatar_url', sa.String(), nullable=True),
+    sa.Column('preferred_formats', sa.ARRAY(sa.String()), nullable=True),
+    sa.Column('average_rating', sa.Float(), nullable=True),
+    sa.Column('total_reviews', sa.Integer(), nullable=True),
+    sa.Column('total_sessions', sa.Integer(), nullable=True),
+    sa.Column('phone_number', sa.String(), nullable=True),
+    sa.Column('city', sa.String(), nullable=True),
+    sa.Column('languages', sa.ARRAY(sa.String()), nullable=True),
+    sa.Column('availability', sa.JSON(), nullable=True),
+    sa.Column('is_verified', sa.Boolean(), nullable=True),
+    sa.Column('verification_status', sa.Enum('PENDING', 'VERIFIED', 'REJECTED', name='verificationstatus'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id')
+    )
+    op.create_table('wallets',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('balance', sa.Float(), nullable=True),
+    sa.Column('currency', sa.String(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id')
+    )
+    op.create_table('bank_accounts',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('wallet_id', sa.UUID(), nullable=False),
+    sa.Column('account_title', sa.String(), nullable=False),
+    sa.Column('account_number', sa.String(), nullable=False),
+    sa.Column('bank_name', sa.String(), nullable=False),
+    sa.Column('iban', sa.String(), nullable=True),
+    sa.Column('is_primary', sa.Boolean(), nullable=True),
+    sa.Column('is_verified', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['wallet_id'], ['wallets.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('messages',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('conversation_id', sa.UUID(), nullable=False),
+    sa.Column('sender_id', sa.UUID(), nullable=False),
+    sa.Column('receiver_id', sa.UUID(), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('is_read', sa.Boolean(), nullable=True),
+    sa.Column('attachment_url', sa.String(), nullable=True),
+    sa.Column('attachment_type', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['conversation_id'], ['conversations.id'], ),
+    sa.ForeignKeyConstraint(['receiver_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['sender_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('sessions',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('student_id', sa.UUID(), nullable=False),
+    sa.Column('teacher_id', sa.UUID(), nullable=False),
+    sa.Column('subject', sa.String(), nullable=False),
+    sa.Column('topic', sa.String(), nullable=True),
+    sa.Column('scheduled_date', sa.DateTime(), nullable=False),
+    sa.Column('scheduled_time', sa.String(), nullable=False),
+    sa.Column('duration', sa.Float(), nullable=False),
+    sa.Column('hourly_rate', sa.Float(), nullable=False),
+    sa.Column('total_amount', sa.Float(), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'CONFIRMED', 'IN_PROGRESS', 'COMPLETED', 'CANCELLED', name='sessionstatus'), nullable=True),
+    sa.Column('payment_status', sa.Enum('PENDING', 'COMPLETED', 'FAILED', 'REFUNDED', name='paymentstatus'), nullable=True),
+    sa.Column('is_recurring', sa.Boolean(), nullable=True),
+    sa.Column('recurring_frequency', sa.String(), nullable=True),
+    sa.Column('meeting_link', sa.String(), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['student_id'], ['student_profiles.id'], ),
+    sa.ForeignKeyConstraint(['teacher_id'], ['teacher_profiles.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('verification_documents',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('teacher_id', sa.UUID(), nullable=False),
+    sa.Column('document_type', sa.String(), nullable=False),
+    sa.Column('document_url', sa.String(), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'VERIFIED', 'REJECTED', name='verificationstatus'), nullable=True),
+    sa.Column('admin_notes', sa.Text(), nullable=True),
+    sa.Column('verified_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['teacher_id'], ['teacher_profiles.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('reviews',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('session_id', sa.UUID(), nullable=True),
+    sa.Column('student_id', sa.UUID(), nullable=False),
+    sa.Column('teacher_id', sa.UUID(), nullable=False),
+    sa.Column('rating', sa.Integer(), nullable=False),
+    sa.Column('review_text', sa.Text(), nullable=True),
+    sa.Column('is_verified_session', sa.Boolean(), nullable=True),
+    sa.Column('helpful_votes', sa.Integer(), nullable=True),
+    sa.Column('teacher_response', sa.Text(), nullable=True),
+    sa.Column('teacher_response_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['session_id'], ['sessions.id'], ),
+    sa.ForeignKeyConstraint(['student_id'], ['student_profiles.id'], ),
+    sa.ForeignKeyConstraint(['teacher_id'], ['teacher_profiles.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('session_id')
+    )
+    op.create_table('transactions',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('session_id', sa.UUID(), nullable=True),
+    sa.Column('wallet_id', sa.UUID(), nullable=True),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.Column('transaction_type', sa.Enum('PAYMENT', 'WITHDRAWAL', 'REFUND', 'DEPOSIT', name='transactiontype'), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'COMPLETED', 'FAILED', 'REFUNDED', name='paymentstatus'), nullable=True),
+    sa.Column('provider', sa.String(), nullable=True),
+    sa.Column('provider_transaction_id', sa.String(), nullable=True),
+    sa.Column('payment_reference', sa.String(), nullable=True),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['session_id'], ['sessions.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['wallet_id'], ['wallets.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('transactions')
+    op.drop_table('reviews')
+    op.drop_table('verification_documents')
+    op.drop_table('sessions')
+    op.drop_table('messages')
+    op.drop_table('bank_accounts')
+    op.drop_table('wallets')
+    op.drop_table('teacher_profiles')
+    op.drop_table('student_profiles')
+    op.drop_table('requests')
+    op.drop_table('notifications')
+    op.drop_table('conversations')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
+    for enum in ENUMS:
+        sa.Enum(name=enum).drop(op.get_bind())
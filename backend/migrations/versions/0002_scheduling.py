@@ -0,0 +1,56 @@
+"""Availability masks, recurring series and the booking indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 03:50:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+import scheduling
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('teacher_profiles', sa.Column('availability_mask', postgresql.BIT(length=168), nullable=True))
+    op.create_index('ix_teacher_profiles_subjects_taught', 'teacher_profiles',
+                    [sa.text('(subjects_taught::jsonb)')], unique=False, postgresql_using='gin')
+
+    # The mask is derived in Python (scheduling.availability_mask), as on every profile save
+    connection = op.get_bind()
+    teachers = connection.execute(sa.text(
+        "SELECT id, availability FROM teacher_profiles WHERE availability IS NOT NULL"
+    )).all()
+    if teachers:
+        connection.execute(
+            sa.text("UPDATE teacher_profiles SET availability_mask = CAST(:mask AS bit(168)) WHERE id = :id"),
+            [{"id": id, "mask": scheduling.availability_mask(availability)} for id, availability in teachers]
+        )
+
+    op.add_column('sessions', sa.Column('recurring_until', sa.DateTime(), nullable=True))
+    op.add_column('sessions', sa.Column('parent_session_id', sa.UUID(), nullable=True))
+    op.add_column('sessions', sa.Column('occurrence_date', sa.DateTime(), nullable=True))
+    op.add_column('sessions', sa.Column('reminder_sent_at', sa.DateTime(), nullable=True))
+    op.create_foreign_key('sessions_parent_session_id_fkey', 'sessions', 'sessions', ['parent_session_id'], ['id'])
+    op.create_index(op.f('ix_sessions_parent_session_id'), 'sessions', ['parent_session_id'], unique=False)
+    op.create_index('ix_sessions_teacher_scheduled_date', 'sessions', ['teacher_id', 'scheduled_date'], unique=False)
+    op.create_unique_constraint('uq_sessions_series_occurrence', 'sessions', ['parent_session_id', 'occurrence_date'])
+
+
+def downgrade():
+    op.drop_constraint('uq_sessions_series_occurrence', 'sessions', type_='unique')
+    op.drop_index('ix_sessions_teacher_scheduled_date', table_name='sessions')
+    op.drop_index(op.f('ix_sessions_parent_session_id'), table_name='sessions')
+    op.drop_constraint('sessions_parent_session_id_fkey', 'sessions', type_='foreignkey')
+    op.drop_column('sessions', 'reminder_sent_at')
+    op.drop_column('sessions', 'occurrence_date')
+    op.drop_column('sessions', 'parent_session_id')
+    op.drop_column('sessions', 'recurring_until')
+    op.drop_index('ix_teacher_profiles_subjects_taught', table_name='teacher_profiles')
+    op.drop_column('teacher_profiles', 'availability_mask')
@@ -0,0 +1,65 @@
+"""Teacher rating aggregates and one-per-user helpful votes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 03:51:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+RATING_COLUMNS = ['rating_sum'] + [f'rating_count_{star}' for star in range(1, 6)]
+
+
+def has_table(name):
+    """Whether the table exists already: before migrations, starting the app ran
+    create_all, which adds new tables (but never alters existing ones)"""
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    for name in RATING_COLUMNS:
+        op.add_column('teacher_profiles', sa.Column(name, sa.Integer(), nullable=True))
+
+    # Same computation as ratings.rebuild_rating_aggregates
+    op.execute("UPDATE teacher_profiles SET total_reviews = 0, average_rating = 0.0, rating_sum = 0, "
+               "rating_count_1 = 0, rating_count_2 = 0, rating_count_3 = 0, rating_count_4 = 0, rating_count_5 = 0")
+    op.execute("""
+        UPDATE teacher_profiles SET
+            rating_sum = totals.rating_sum,
+            rating_count_1 = totals.c1, rating_count_2 = totals.c2, rating_count_3 = totals.c3,
+            rating_count_4 = totals.c4, rating_count_5 = totals.c5,
+            total_reviews = totals.reviews,
+            average_rating = totals.rating_sum::float / totals.reviews
+        FROM (
+            SELECT teacher_id, count(*) AS reviews, sum(rating) AS rating_sum,
+                   count(*) FILTER (WHERE rating = 1) AS c1, count(*) FILTER (WHERE rating = 2) AS c2,
+                   count(*) FILTER (WHERE rating = 3) AS c3, count(*) FILTER (WHERE rating = 4) AS c4,
+                   count(*) FILTER (WHERE rating = 5) AS c5
+            FROM reviews GROUP BY teacher_id
+        ) AS totals
+        WHERE teacher_profiles.id = totals.teacher_id
+    """)
+
+    # Votes cast before this table existed stay in reviews.helpful_votes
+    if not has_table('review_votes'):
+        op.create_table('review_votes',
+        sa.Column('review_id', sa.UUID(), nullable=False),
+        sa.Column('user_id', sa.UUID(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['review_id'], ['reviews.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('review_id', 'user_id')
+
+        )
+
+
+def downgrade():
+    op.drop_table('review_votes')
+    for name in reversed(RATING_COLUMNS):
+        op.drop_column('teacher_profiles', name)
@@ -0,0 +1,83 @@
+"""Paisa wallet balances backed by an append-only ledger
+
+Each wallet's float balance becomes integer paisa, and a non-zero balance
+gets an opening-balance transaction whose ledger entries explain it, so
+check-wallet-ledger starts out clean.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 03:52:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+# Counter-account of the opening-balance postings
+OPENING_BALANCES_ACCOUNT = 'opening-balances'
+
+
+def has_table(name):
+    """Whether the table exists already: before migrations, starting the app ran
+    create_all, which adds new tables (but never alters existing ones)"""
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    # A database that ran the app with the ledger model has the table already, empty:
+    # wallet writes failed there without balance_paisa
+    if not has_table('ledger_entries'):
+        op.create_table('ledger_entries',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('transaction_id', sa.UUID(), nullable=False),
+        sa.Column('account', sa.String(), nullable=False),
+        sa.Column('wallet_id', sa.UUID(), nullable=True),
+        sa.Column('amount_paisa', sa.BigInteger(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['transaction_id'], ['transactions.id'], ),
+        sa.ForeignKeyConstraint(['wallet_id'], ['wallets.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('transaction_id', 'account', name='uq_ledger_entries_transaction_account')
+        )
+        op.create_index('ix_ledger_entries_wallet_id', 'ledger_entries', ['wallet_id', 'id'], unique=False)
+
+    op.add_column('wallets', sa.Column('balance_paisa', sa.BigInteger(), server_default='0', nullable=False))
+    op.execute("UPDATE wallets SET balance_paisa = round(balance::numeric * 100) WHERE balance IS NOT NULL")
+
+    op.execute("""
+        CREATE TEMPORARY TABLE opening_balances ON COMMIT DROP AS
+        SELECT gen_random_uuid() AS transaction_id, id AS wallet_id, user_id, balance_paisa
+        FROM wallets WHERE balance_paisa <> 0
+    """)
+    op.execute("""
+        INSERT INTO transactions (id, wallet_id, user_id, amount, transaction_type, status, description,
+                                  created_at, updated_at)
+        SELECT transaction_id, wallet_id, user_id, balance_paisa / 100.0, 'DEPOSIT', 'COMPLETED',
+               'Opening balance', now() at time zone 'utc', now() at time zone 'utc'
+        FROM opening_balances
+    """)
+    op.execute(f"""
+        INSERT INTO ledger_entries (transaction_id, account, wallet_id, amount_paisa, created_at)
+        SELECT transaction_id, 'wallet:' || wallet_id, wallet_id, balance_paisa, now() at time zone 'utc'
+        FROM opening_balances
+        UNION ALL
+        SELECT transaction_id, '{OPENING_BALANCES_ACCOUNT}', NULL, -balance_paisa, now() at time zone 'utc'
+        FROM opening_balances
+    """)
+
+    op.alter_column('wallets', 'balance_paisa', server_default=None)
+    op.create_check_constraint('ck_wallets_balance_non_negative', 'wallets', 'balance_paisa >= 0')
+    op.drop_column('wallets', 'balance')
+
+
+def downgrade():
+    op.add_column('wallets', sa.Column('balance', sa.Float(), nullable=True))
+    op.execute("UPDATE wallets SET balance = balance_paisa / 100.0")
+    op.drop_constraint('ck_wallets_balance_non_negative', 'wallets', type_='check')
+    op.drop_column('wallets', 'balance_paisa')
+    op.drop_index('ix_ledger_entries_wallet_id', table_name='ledger_entries')
+    op.drop_table('ledger_entries')
@@ -0,0 +1,95 @@
+"""Admin dashboard counters, daily metrics, user search and the verification queue
+
+admin_stats is seeded from the live counts (as reconcile-admin-stats --fix
+would); daily_metrics is filled by the aggregate-daily-metrics job.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 03:53:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+CREATED_AT_INDEXED = ['users', 'sessions', 'messages', 'transactions']
+
+
+def has_table(name):
+    """Whether the table exists already: before migrations, starting the app ran
+    create_all, which adds new tables (but never alters existing ones)"""
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    for table in CREATED_AT_INDEXED:
+        op.create_index(op.f(f'ix_{table}_created_at'), table, ['created_at'], unique=False)
+
+    if not has_table('admin_stats'):
+        op.create_table('admin_stats',
+        sa.Column('slot', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('total_users', sa.BigInteger(), nullable=False),
+        sa.Column('total_students', sa.BigInteger(), nullable=False),
+        sa.Column('total_teachers', sa.BigInteger(), nullable=False),
+        sa.Column('total_sessions', sa.BigInteger(), nullable=False),
+        sa.Column('active_sessions', sa.BigInteger(), nullable=False),
+        sa.Column('pending_verifications', sa.BigInteger(), nullable=False),
+        sa.Column('total_revenue_paisa', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('slot')
+
+        )
+    # Same counts as stats.live_totals; counters the app kept before replaced
+    op.execute("DELETE FROM admin_stats")
+    op.execute("""
+        INSERT INTO admin_stats (slot, total_users, total_students, total_teachers, total_sessions,
+                                 active_sessions, pending_verifications, total_revenue_paisa)
+        SELECT 0,
+            (SELECT count(*) FROM users),
+            (SELECT count(*) FROM users WHERE role = 'STUDENT'),
+            (SELECT count(*) FROM users WHERE role = 'TEACHER'),
+            (SELECT count(*) FROM sessions),
+            (SELECT count(*) FROM sessions WHERE status IN ('PENDING', 'CONFIRMED')),
+            (SELECT count(*) FROM verification_documents WHERE status = 'PENDING'),
+            (SELECT coalesce(round(sum(amount)::numeric * 100), 0) FROM transactions
+             WHERE status = 'COMPLETED' AND transaction_type = 'PAYMENT')
+    """)
+
+    if not has_table('daily_metrics'):
+        op.create_table('daily_metrics',
+        sa.Column('metric', sa.String(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('value', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('metric', 'day')
+
+        )
+
+    op.create_index('ix_users_email_prefix', 'users', [sa.text('lower(email) text_pattern_ops')], unique=False)
+    op.create_index('ix_student_profiles_name_prefix', 'student_profiles',
+                    [sa.text('lower(name) text_pattern_ops')], unique=False)
+    op.create_index('ix_teacher_profiles_name_prefix', 'teacher_profiles',
+                    [sa.text('lower(name) text_pattern_ops')], unique=False)
+
+    op.add_column('verification_documents', sa.Column('claimed_by', sa.UUID(), nullable=True))
+    op.add_column('verification_documents', sa.Column('claim_expires_at', sa.DateTime(), nullable=True))
+    op.create_foreign_key('verification_documents_claimed_by_fkey', 'verification_documents', 'users',
+                          ['claimed_by'], ['id'])
+    op.create_index('ix_verification_documents_pending_queue', 'verification_documents', ['created_at'],
+                    unique=False, postgresql_where=sa.text("status = 'PENDING'"))
+
+
+def downgrade():
+    op.drop_index('ix_verification_documents_pending_queue', table_name='verification_documents')
+    op.drop_constraint('verification_documents_claimed_by_fkey', 'verification_documents', type_='foreignkey')
+    op.drop_column('verification_documents', 'claim_expires_at')
+    op.drop_column('verification_documents', 'claimed_by')
+    op.drop_index('ix_teacher_profiles_name_prefix', table_name='teacher_profiles')
+    op.drop_index('ix_student_profiles_name_prefix', table_name='student_profiles')
+    op.drop_index('ix_users_email_prefix', table_name='users')
+    op.drop_table('daily_metrics')
+    op.drop_table('admin_stats')
+    for table in reversed(CREATED_AT_INDEXED):
+        op.drop_index(op.f(f'ix_{table}_created_at'), table_name=table)
@@ -0,0 +1,39 @@
+"""Completion time of transactions, for bucketing revenue by when it came in
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 09:40:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('transactions', sa.Column('completed_at', sa.DateTime(), nullable=True))
+    # A completed transaction is never updated again, so its last update is its completion
+    op.execute("""
+        UPDATE transactions SET completed_at = coalesce(updated_at, created_at)
+        WHERE status = 'COMPLETED'
+    """)
+    op.create_index(op.f('ix_transactions_completed_at'), 'transactions', ['completed_at'], unique=False)
+
+    # Revenue buckets were by creation day; rebuild them as analytics.METRIC_SOURCES now buckets
+    op.execute("DELETE FROM daily_metrics WHERE metric = 'revenue'")
+    op.execute("""
+        INSERT INTO daily_metrics (metric, day, value)
+        SELECT 'revenue', completed_at::date, round(sum(amount)::numeric * 100)
+        FROM transactions
+        WHERE status = 'COMPLETED' AND transaction_type = 'PAYMENT' AND completed_at IS NOT NULL
+        GROUP BY completed_at::date
+    """)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_transactions_completed_at'), table_name='transactions')
+    op.drop_column('transactions', 'completed_at')
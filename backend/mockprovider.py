@@ -0,0 +1,214 @@
+import argparse
+import asyncio
+import os
+import random
+import time
+import uuid
+from collections import Counter
+from typing import Dict, Optional
+
+import httpx
+from fastapi import FastAPI, HTTPException, Request
+
+from payment import PaymentGateway
+
+# A local stand-in for the JazzCash and Easypaisa sandboxes, so payments can
+# be load tested offline. Point the server at it and run it with the same
+# JAZZCASH_*/EASYPAISA_* secrets as the server:
+#
+#   python mockprovider.py --port 9100 --latency 0.05 --decline-rate 0.05 --duplicate-rate 0.1
+#   JAZZCASH_API_URL=http://localhost:9100 EASYPAISA_API_URL=http://localhost:9100 uvicorn main:app
+#
+# Every payment it accepts is settled a little later with a signed callback:
+# JazzCash's to BACKEND_URL (in production the customer's browser carries it
+# there via pp_ReturnURL), Easypaisa's to the postBackURL it was given.
+
+# Response codes the callbacks carry; PaymentGateway.get_payment_status maps them
+JAZZCASH_CODES = {"paid": "000", "declined": "999"}
+EASYPAISA_CODES = {"paid": "00", "declined": "01"}
+
+
+class Behaviour:
+    """How the mock provider misbehaves; rates are fractions of payments"""
+
+    def __init__(self, latency: float = 0.0, callback_delay: float = 0.05, error_rate: float = 0.0,
+                 decline_rate: float = 0.0, duplicate_rate: float = 0.0, reorder_rate: float = 0.0,
+                 reorder_delay: float = 1.0, seed: Optional[int] = None, callback_retries: int = 3,
+                 retry_delay: float = 1.0):
+        # Seconds before answering an initiate request
+        self.latency = latency
+        # Seconds between accepting a payment and sending its callback
+        self.callback_delay = callback_delay
+        # Initiate requests answered with a 500 and never settled
+        self.error_rate = error_rate
+        # Payments settled as declined
+        self.decline_rate = decline_rate
+        # Payments whose callback is delivered twice, concurrently
+        self.duplicate_rate = duplicate_rate
+        # Payments whose callback is held back reorder_delay seconds, so later ones overtake it
+        self.reorder_rate = reorder_rate
+        self.reorder_delay = reorder_delay
+        self.rng = random.Random(seed)
+        # Like the real providers, a callback the backend could not take (no answer,
+        # 404 or 5xx) is sent again, up to callback_retries times retry_delay apart.
+        # A callback can beat the backend's commit of the transaction it settles.
+        self.callback_retries = callback_retries
+        self.retry_delay = retry_delay
+
+    def chance(self, rate: float) -> bool:
+        return rate > 0 and self.rng.random() < rate
+
+
+class MockProvider:
+    """ASGI app implementing merchantForm and /api/v1/checkout, plus the callbacks"""
+
+    def __init__(self, behaviour: Optional[Behaviour] = None, backend_url: Optional[str] = None):
+        self.behaviour = behaviour or Behaviour()
+        self.backend_url = (backend_url or os.getenv("BACKEND_URL", "http://localhost:8000")).rstrip("/")
+        self.stats: Counter = Counter()
+        # Transaction id -> (outcome reported by the server, time.perf_counter() it acknowledged)
+        self.settled: Dict[str, tuple] = {}
+        self.tasks = set()
+        self.client: Optional[httpx.AsyncClient] = None
+
+        self.app = FastAPI(title="Mock payment provider", on_shutdown=[self.close])
+        self.app.post("/CustomerPortal/transactionmanagement/merchantForm")(self.jazzcash_merchant_form)
+        self.app.post("/api/v1/checkout")(self.easypaisa_checkout)
+        self.app.get("/mock/stats")(self.get_stats)
+
+    async def __call__(self, scope, receive, send):
+        await self.app(scope, receive, send)
+
+    async def close(self):
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+        if self.client:
+            await self.client.aclose()
+
+    async def jazzcash_merchant_form(self, request: Request):
+        data = dict(await request.form())
+        gateway = PaymentGateway("jazzcash")
+        await self.accept(gateway.verify_payment_jazzcash(data))
+
+        callback = {
+            "pp_TxnRefNo": data["pp_TxnRefNo"],
+            "pp_Amount": data.get("pp_Amount", ""),
+            "pp_TxnDateTime": data.get("pp_TxnDateTime", ""),
+            "pp_RetreivalReferenceNo": uuid.uuid4().hex[:12],
+        }
+        self.settle("jazzcash", f"{self.backend_url}/api/payment/jazzcash/callback", callback)
+        return {"pp_ResponseCode": "124", "pp_ResponseMessage": "Order is placed and waiting for financials"}
+
+    async def easypaisa_checkout(self, request: Request):
+        data = await request.json()
+        gateway = PaymentGateway("easypaisa")
+        await self.accept(all(key in data for key in ("amount", "orderRefNum", "postBackURL"))
+                          and gateway.verify_payment_easypaisa(data))
+
+        token = uuid.uuid4().hex
+        callback = {
+            "orderRefNum": data["orderRefNum"],
+            "amount": data["amount"],
+            "postBackURL": data["postBackURL"],
+            "transactionId": f"EP{token[:10]}",
+        }
+        self.settle("easypaisa", data["postBackURL"], callback)
+        return {"token": token, "checkoutUrl": f"{request.base_url}checkout/{token}"}
+
+    async def get_stats(self):
+        return {**self.stats, "pending_callbacks": len(self.tasks)}
+
+    async def accept(self, signature_valid: bool):
+        """Reject bad signatures, then play the configured latency and errors"""
+        if not signature_valid:
+            self.stats["rejected"] += 1
+            raise HTTPException(status_code=400, detail="Invalid hash")
+        if self.behaviour.latency:
+            await asyncio.sleep(self.behaviour.latency)
+        if self.behaviour.chance(self.behaviour.error_rate):
+            self.stats["errors"] += 1
+            raise HTTPException(status_code=500, detail="Injected provider error")
+        self.stats["initiated"] += 1
+
+    def settle(self, provider: str, url: str, callback: dict):
+        """Sign and schedule the callback for an accepted payment"""
+        behaviour = self.behaviour
+        outcome = "declined" if behaviour.chance(behaviour.decline_rate) else "paid"
+        gateway = PaymentGateway(provider)
+        if provider == "jazzcash":
+            transaction_id = callback["pp_TxnRefNo"]
+            callback["pp_ResponseCode"] = JAZZCASH_CODES[outcome]
+            callback["pp_SecureHash"] = gateway.calculate_hash_jazzcash(callback)
+            body = {"data": callback}
+        else:
+            transaction_id = callback["orderRefNum"]
+            callback["responseCode"] = EASYPAISA_CODES[outcome]
+            callback["merchantHashedReq"] = gateway.calculate_hash_easypaisa(callback)
+            body = {"json": callback}
+
+        delay = behaviour.callback_delay
+        if behaviour.chance(behaviour.reorder_rate):
+            self.stats["reordered"] += 1
+            delay += behaviour.reorder_delay
+        copies = 1
+        if behaviour.chance(behaviour.duplicate_rate):
+            self.stats["duplicated"] += 1
+            copies = 2
+
+        task = asyncio.create_task(self.deliver(transaction_id, url, body, delay, copies))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def deliver(self, transaction_id: str, url: str, body: dict, delay: float, copies: int):
+        await asyncio.sleep(delay)
+        if self.client is None:
+            self.client = httpx.AsyncClient(timeout=30, limits=httpx.Limits(max_connections=100))
+        await asyncio.gather(*(self.post_callback(transaction_id, url, body) for _ in range(copies)))
+
+    async def post_callback(self, transaction_id: str, url: str, body: dict):
+        for attempt in range(self.behaviour.callback_retries + 1):
+            if attempt:
+                self.stats["callback_retries"] += 1
+                await asyncio.sleep(self.behaviour.retry_delay)
+            try:
+                response = await self.client.post(url, **body)
+            except httpx.HTTPError:
+                self.stats["callback_errors"] += 1
+                continue
+            self.stats[f"callback_{response.status_code}"] += 1
+            if response.status_code == 200:
+                if transaction_id not in self.settled:
+                    self.settled[transaction_id] = (response.json().get("status"), time.perf_counter())
+                return
+            if response.status_code != 404 and response.status_code < 500:
+                return
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a mock JazzCash/Easypaisa provider")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--backend-url", help="Where JazzCash callbacks go (default BACKEND_URL)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds before answering initiate")
+    parser.add_argument("--callback-delay", type=float, default=0.05, help="Seconds before sending the callback")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of initiates answered with a 500")
+    parser.add_argument("--decline-rate", type=float, default=0.0, help="Fraction of payments declined")
+    parser.add_argument("--duplicate-rate", type=float, default=0.0, help="Fraction of callbacks delivered twice")
+    parser.add_argument("--reorder-rate", type=float, default=0.0,
+                        help="Fraction of callbacks held back so later ones overtake them")
+    parser.add_argument("--reorder-delay", type=float, default=1.0, help="Seconds a reordered callback is held")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--callback-retries", type=int, default=3,
+                        help="Times a callback answered with no response, a 404 or a 5xx is sent again")
+    parser.add_argument("--retry-delay", type=float, default=1.0, help="Seconds between callback retries")
+    args = parser.parse_args()
+
+    import uvicorn
+    behaviour = Behaviour(args.latency, args.callback_delay, args.error_rate, args.decline_rate,
+                          args.duplicate_rate, args.reorder_rate, args.reorder_delay, args.seed,
+                          args.callback_retries, args.retry_delay)
+    uvicorn.run(MockProvider(behaviour, args.backend_url), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
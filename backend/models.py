@@ -1,7 +1,8 @@
-from sqlalchemy import Column, String, Integer, Float, DateTime, Enum, ForeignKey, ARRAY, JSON, Boolean, Text
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Integer, BigInteger, Float, Date, DateTime, Enum, ForeignKey, ARRAY, JSON, Boolean, Text, Index, UniqueConstraint, CheckConstraint, text
+from sqlalchemy.dialects.postgresql import UUID, BIT
+from sqlalchemy.orm import relationship, validates
 from database import Base
+import scheduling
 import uuid
 from datetime import datetime
 import enum
@@ -65,7 +66,7 @@ class User(Base):
     role = Column(Enum(UserRole), nullable=False)
     is_active = Column(Boolean, default=True)
     is_verified = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     student_profile = relationship("StudentProfile", back_populates="user", uselist=False)
@@ -75,6 +76,11 @@ class User(Base):
     received_messages = relationship("Message", foreign_keys="Message.receiver_id", back_populates="receiver")
     notifications = relationship("Notification", back_populates="user")
     wallet = relationship("Wallet", back_populates="user", uselist=False)
+    
+    __table_args__ = (
+        # Case-insensitive prefix search (lower(email) LIKE 'abc%') in the admin user list
+        Index("ix_users_email_prefix", text("lower(email) text_pattern_ops")),
+    )
 
 
 class StudentProfile(Base):
@@ -95,6 +101,10 @@ class StudentProfile(Base):
     user = relationship("User", back_populates="student_profile")
     sessions_as_student = relationship("Session", back_populates="student")
     reviews_given = relationship("Review", back_populates="student")
+    
+    __table_args__ = (
+        Index("ix_student_profiles_name_prefix", text("lower(name) text_pattern_ops")),
+    )
 
 
 class TeacherProfile(Base):
@@ -110,13 +120,22 @@ class TeacherProfile(Base):
     certifications = Column(JSON)
     avatar_url = Column(String)
     preferred_formats = Column(ARRAY(String))
-    average_rating = Column(Float, default=0.0)
+    average_rating = Column(Float, default=0.0)  # rating_sum / total_reviews, kept for sorting
     total_reviews = Column(Integer, default=0)
+    # Rating aggregates, incremented atomically in SQL on each review
+    rating_sum = Column(Integer, default=0)
+    rating_count_1 = Column(Integer, default=0)
+    rating_count_2 = Column(Integer, default=0)
+    rating_count_3 = Column(Integer, default=0)
+    rating_count_4 = Column(Integer, default=0)
+    rating_count_5 = Column(Integer, default=0)
     total_sessions = Column(Integer, default=0)
     phone_number = Column(String)
     city = Column(String)
     languages = Column(ARRAY(String))  # ["English", "Urdu"]
     availability = Column(JSON)  # {"monday": ["09:00", "10:00", ...], ...}
+    # Hour-of-week bitmap derived from availability (bit 0 = Monday 00:00), for search
+    availability_mask = Column(BIT(scheduling.HOURS_PER_WEEK))
     is_verified = Column(Boolean, default=False)
     verification_status = Column(Enum(VerificationStatus), default=VerificationStatus.PENDING)
     
@@ -125,6 +144,20 @@ class TeacherProfile(Base):
     reviews_received = relationship("Review", back_populates="teacher")
     verification_documents = relationship("VerificationDocument", back_populates="teacher")
 
+    __table_args__ = (
+        Index("ix_teacher_profiles_subjects_taught", text("(subjects_taught::jsonb)"), postgresql_using="gin"),
+        Index("ix_teacher_profiles_name_prefix", text("lower(name) text_pattern_ops")),
+    )
+
+    @validates("availability")
+    def _sync_availability_mask(self, key, value):
+        self.availability_mask = scheduling.availability_mask(value)
+        return value
+
+    @property
+    def rating_histogram(self):
+        return {str(star): getattr(self, f"rating_count_{star}") or 0 for star in range(1, 6)}
+
 
 class Request(Base):
     __tablename__ = "requests"
@@ -161,9 +194,15 @@ class Session(Base):
     payment_status = Column(Enum(PaymentStatus), default=PaymentStatus.PENDING)
     is_recurring = Column(Boolean, default=False)
     recurring_frequency = Column(String)  # weekly, bi-weekly, monthly
+    recurring_until = Column(DateTime)  # last possible occurrence start, open-ended if null
+    # Materialized occurrence of a recurring series: the series session and the
+    # occurrence start it replaces (it may have been rescheduled since)
+    parent_session_id = Column(UUID(as_uuid=True), ForeignKey("sessions.id"), index=True)
+    occurrence_date = Column(DateTime)
+    reminder_sent_at = Column(DateTime)
     meeting_link = Column(String)
     notes = Column(Text)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     student = relationship("StudentProfile", back_populates="sessions_as_student")
@@ -171,6 +210,11 @@ class Session(Base):
     transaction = relationship("Transaction", back_populates="session", uselist=False)
     review = relationship("Review", back_populates="session", uselist=False)
 
+    __table_args__ = (
+        Index("ix_sessions_teacher_scheduled_date", "teacher_id", "scheduled_date"),
+        UniqueConstraint("parent_session_id", "occurrence_date", name="uq_sessions_series_occurrence"),
+    )
+
 
 class Review(Base):
     __tablename__ = "reviews"
@@ -193,6 +237,16 @@ class Review(Base):
     teacher = relationship("TeacherProfile", back_populates="reviews_received")
 
 
+class ReviewVote(Base):
+    __tablename__ = "review_votes"
+    
+    # One row per (review, user); the primary key rejects repeat votes
+    
+    review_id = Column(UUID(as_uuid=True), ForeignKey("reviews.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
 class Message(Base):
     __tablename__ = "messages"
     
@@ -204,7 +258,7 @@ class Message(Base):
     is_read = Column(Boolean, default=False)
     attachment_url = Column(String)
     attachment_type = Column(String)  # image, document, etc.
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
     
     conversation = relationship("Conversation", back_populates="messages")
     sender = relationship("User", foreign_keys=[sender_id], back_populates="sent_messages")
@@ -239,8 +293,9 @@ class Transaction(Base):
     provider_transaction_id = Column(String)
     payment_reference = Column(String)
     description = Column(String)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    completed_at = Column(DateTime, index=True)
     
     session = relationship("Session", back_populates="transaction")
     wallet = relationship("Wallet", back_populates="transactions")
@@ -251,7 +306,8 @@ class Wallet(Base):
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), unique=True, nullable=False)
-    balance = Column(Float, default=0.0)
+    # Balance snapshot in paisa, changed only together with ledger entries (see ledger.py)
+    balance_paisa = Column(BigInteger, nullable=False, default=0)
     currency = Column(String, default="PKR")
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -260,6 +316,32 @@ class Wallet(Base):
     user = relationship("User", back_populates="wallet")
     transactions = relationship("Transaction", back_populates="wallet")
     bank_accounts = relationship("BankAccount", back_populates="wallet")
+    
+    __table_args__ = (
+        CheckConstraint("balance_paisa >= 0", name="ck_wallets_balance_non_negative"),
+    )
+    
+    @property
+    def balance(self):
+        return (self.balance_paisa or 0) / 100
+
+
+class LedgerEntry(Base):
+    __tablename__ = "ledger_entries"
+    
+    # Append-only: entries are never updated or deleted, corrections are new postings.
+    # The entries of one transaction sum to zero.
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    transaction_id = Column(UUID(as_uuid=True), ForeignKey("transactions.id"), nullable=False)
+    account = Column(String, nullable=False)  # wallet:<id>, provider:jazzcash, payouts
+    wallet_id = Column(UUID(as_uuid=True), ForeignKey("wallets.id"))
+    amount_paisa = Column(BigInteger, nullable=False)  # positive credits, negative debits
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        UniqueConstraint("transaction_id", "account", name="uq_ledger_entries_transaction_account"),
+        Index("ix_ledger_entries_wallet_id", "wallet_id", "id"),
+    )
 
 
 class BankAccount(Base):
@@ -304,5 +386,39 @@ class VerificationDocument(Base):
     admin_notes = Column(Text)
     verified_at = Column(DateTime)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Review lease: the admin working on the document, until claim_expires_at (see verification.py)
+    claimed_by = Column(UUID(as_uuid=True), ForeignKey("users.id"))
+    claim_expires_at = Column(DateTime)
+    
+    __table_args__ = (
+        # The queue: pending documents, oldest first
+        Index("ix_verification_documents_pending_queue", "created_at",
+              postgresql_where=text("status = 'PENDING'")),
+    )
     
     teacher = relationship("TeacherProfile", back_populates="verification_documents")
+
+
+class AdminStat(Base):
+    __tablename__ = "admin_stats"
+    
+    # Dashboard counters, kept by the write paths in their own transactions (see stats.py).
+    # Spread over a few slot rows so concurrent writers don't queue on one row lock;
+    # the totals are the column sums.
+    slot = Column(Integer, primary_key=True, autoincrement=False)
+    total_users = Column(BigInteger, nullable=False, default=0)
+    total_students = Column(BigInteger, nullable=False, default=0)
+    total_teachers = Column(BigInteger, nullable=False, default=0)
+    total_sessions = Column(BigInteger, nullable=False, default=0)
+    active_sessions = Column(BigInteger, nullable=False, default=0)
+    pending_verifications = Column(BigInteger, nullable=False, default=0)
+    total_revenue_paisa = Column(BigInteger, nullable=False, default=0)
+
+
+class DailyMetric(Base):
+    __tablename__ = "daily_metrics"
+    
+    # Per-day totals filled by the aggregate-daily-metrics job (see analytics.py)
+    metric = Column(String, primary_key=True)  # revenue (paisa), sessions_booked, signups, messages
+    day = Column(Date, primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
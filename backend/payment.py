@@ -1,13 +1,20 @@
 import hashlib
 import hmac
 import requests
+import secrets
+import string
 from datetime import datetime, timedelta
 from typing import Dict, Optional
 import os
+import time
 from dotenv import load_dotenv
 
+import metrics
+
 load_dotenv()
 
+TRANSACTION_ID_ALPHABET = string.ascii_uppercase + string.digits
+
 
 class PaymentGateway:
     def __init__(self, provider: str):
@@ -22,10 +29,25 @@ class PaymentGateway:
             self.hash_key = os.getenv("EASYPAISA_HASH_KEY", "")
             self.base_url = os.getenv("EASYPAISA_API_URL", "https://sandbox-developer.easypaisa.com.pk")
 
+    def _post(self, url: str, **kwargs) -> requests.Response:
+        """POST to the provider, timing it in payment_provider_request_seconds"""
+        outcome = "error"
+        started = time.perf_counter()
+        try:
+            response = requests.post(url, **kwargs)
+            outcome = str(response.status_code)
+            return response
+        finally:
+            metrics.PAYMENT_PROVIDER_SECONDS.labels(self.provider, outcome).observe(time.perf_counter() - started)
+
     def generate_transaction_id(self) -> str:
-        """Generate unique transaction ID"""
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        suffix = self.merchant_id[-4:] if self.provider == "jazzcash" else self.store_id[-4:]
+        """Generate unique transaction ID
+
+        Callbacks are matched to transactions by this id, so payments started
+        in the same second must not share it. Providers cap it at 20 characters.
+        """
+        timestamp = datetime.now().strftime("%y%m%d%H%M%S")
+        suffix = "".join(secrets.choice(TRANSACTION_ID_ALPHABET) for _ in range(7))
         return f"T{timestamp}{suffix}"
 
     def calculate_hash_jazzcash(self, data: Dict) -> str:
@@ -74,7 +96,7 @@ class PaymentGateway:
         
         try:
             # Make API request
-            response = requests.post(
+            response = self._post(
                 f"{self.base_url}/CustomerPortal/transactionmanagement/merchantForm",
                 data=data,
                 timeout=30
@@ -121,7 +143,7 @@ class PaymentGateway:
         
         try:
             # Create payment request
-            response = requests.post(
+            response = self._post(
                 f"{self.base_url}/api/v1/checkout",
                 json=data,
                 headers={"Content-Type": "application/json"},
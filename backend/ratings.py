@@ -0,0 +1,79 @@
+from sqlalchemy import func, select, text, update
+from sqlalchemy.orm import Session
+
+import models
+
+STARS = range(1, 6)
+
+
+def _count_column(star: int):
+    return getattr(models.TeacherProfile, f"rating_count_{star}")
+
+
+def record_rating(db: Session, teacher_id, rating: int):
+    """Add one rating to a teacher's aggregates in a single atomic UPDATE
+
+    Returns the teacher's user_id, or None when the teacher does not exist.
+    The right-hand sides read the pre-update row, so concurrent reviews
+    serialize on the row lock instead of overwriting each other.
+    """
+    teacher = models.TeacherProfile
+    rating_sum = func.coalesce(teacher.rating_sum, 0)
+    total_reviews = func.coalesce(teacher.total_reviews, 0)
+    count_column = _count_column(rating)
+    return db.execute(
+        update(teacher)
+        .where(teacher.id == teacher_id)
+        .values({
+            teacher.rating_sum: rating_sum + rating,
+            teacher.total_reviews: total_reviews + 1,
+            count_column: func.coalesce(count_column, 0) + 1,
+            teacher.average_rating: (rating_sum + rating) * 1.0 / (total_reviews + 1),
+        })
+        .returning(teacher.user_id)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+
+
+def rebuild_rating_aggregates(db: Session) -> int:
+    """Recompute every teacher's rating aggregates from the reviews table
+
+    Review inserts are blocked while this runs so no increment is lost.
+    Returns the number of teachers that have reviews.
+    """
+    review = models.Review
+    teacher = models.TeacherProfile
+    db.execute(text("LOCK TABLE reviews IN SHARE MODE"))
+
+    totals = select(
+        review.teacher_id,
+        func.count().label("total"),
+        func.sum(review.rating).label("rating_sum"),
+        *[func.count().filter(review.rating == star).label(f"count_{star}") for star in STARS]
+    ).group_by(review.teacher_id).subquery()
+
+    reviewed = db.execute(
+        update(teacher)
+        .where(teacher.id == totals.c.teacher_id)
+        .values({
+            teacher.total_reviews: totals.c.total,
+            teacher.rating_sum: totals.c.rating_sum,
+            teacher.average_rating: totals.c.rating_sum * 1.0 / totals.c.total,
+            **{_count_column(star): totals.c[f"count_{star}"] for star in STARS},
+        })
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    db.execute(
+        update(teacher)
+        .where(teacher.id.not_in(select(review.teacher_id)))
+        .values({
+            teacher.total_reviews: 0,
+            teacher.rating_sum: 0,
+            teacher.average_rating: 0.0,
+            **{_count_column(star): 0 for star in STARS},
+        })
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return reviewed
@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Set, Tuple
+import uuid
+
+from sqlalchemy import or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+import models
+import scheduling
+import stats
+
+# Statuses that keep a session (or a series) occupying the teacher's time
+ACTIVE_SESSION_STATUSES = [models.SessionStatus.PENDING, models.SessionStatus.CONFIRMED]
+
+# Columns copied from the series session onto each of its occurrences
+OCCURRENCE_COLUMNS = [
+    "student_id", "teacher_id", "subject", "topic", "scheduled_time", "duration",
+    "hourly_rate", "total_amount", "recurring_frequency", "meeting_link", "notes",
+]
+
+# How far ahead a new series without an end date is checked for conflicts
+BOOKING_CHECK_WINDOW = timedelta(days=366)
+
+
+def series_start(rule: models.Session) -> datetime:
+    """Start of the first occurrence of a series (the stored session itself)"""
+    return scheduling.session_interval(rule.scheduled_date, rule.scheduled_time, rule.duration)[0]
+
+
+def occurrence_id(rule_id, occurrence_start: datetime) -> uuid.UUID:
+    """Stable id shared by an expanded occurrence and its materialized row"""
+    return uuid.uuid5(uuid.UUID(str(rule_id)), occurrence_start.isoformat())
+
+
+def booking_occurrences(first_start: datetime, frequency: Optional[str],
+                        until: Optional[datetime]) -> List[datetime]:
+    """Start times of every occurrence of a series being booked, up to until or BOOKING_CHECK_WINDOW"""
+    end = until + timedelta(microseconds=1) if until else first_start + BOOKING_CHECK_WINDOW
+    return [first_start] + scheduling.expand_occurrences(first_start, frequency, first_start, end, until)
+
+
+def load_series(db: Session, criteria: Iterable, start: datetime, end: datetime) -> List[models.Session]:
+    """Recurring series matching criteria that may have occurrences in [start, end)"""
+    return db.query(models.Session).filter(
+        *criteria,
+        models.Session.is_recurring == True,
+        models.Session.parent_session_id == None,
+        models.Session.status != models.SessionStatus.CANCELLED,
+        models.Session.scheduled_date < end,
+        or_(models.Session.recurring_until == None, models.Session.recurring_until >= start)
+    ).all()
+
+
+def load_materialized(db: Session, rules: List[models.Session],
+                      start: datetime, end: datetime) -> Set[Tuple[uuid.UUID, datetime]]:
+    """(series id, occurrence start) pairs that already have their own row"""
+    if not rules:
+        return set()
+    rows = db.query(models.Session.parent_session_id, models.Session.occurrence_date).filter(
+        models.Session.parent_session_id.in_([rule.id for rule in rules]),
+        models.Session.occurrence_date >= start,
+        models.Session.occurrence_date < end
+    ).all()
+    return {(parent_id, occurrence) for parent_id, occurrence in rows}
+
+
+def expand_series(rules: List[models.Session], materialized: Set[Tuple[uuid.UUID, datetime]],
+                  start: datetime, end: datetime) -> List[Tuple[models.Session, datetime]]:
+    """Occurrences of the series in [start, end) that exist only virtually"""
+    occurrences = []
+    for rule in rules:
+        for occurrence in scheduling.expand_occurrences(
+            series_start(rule), rule.recurring_frequency, start, end, rule.recurring_until
+        ):
+            if (rule.id, occurrence) not in materialized:
+                occurrences.append((rule, occurrence))
+    return occurrences
+
+
+def virtual_occurrences(db: Session, criteria: Iterable, start: datetime,
+                        end: datetime) -> List[Tuple[models.Session, datetime]]:
+    """Expand every series matching criteria over [start, end) in two queries"""
+    rules = load_series(db, criteria, start, end)
+    return expand_series(rules, load_materialized(db, rules, start, end), start, end)
+
+
+def occurrence_values(rule: models.Session, occurrence_start: datetime) -> dict:
+    """Column values for an occurrence of a series"""
+    values = {column: getattr(rule, column) for column in OCCURRENCE_COLUMNS}
+    values.update(
+        id=occurrence_id(rule.id, occurrence_start),
+        parent_session_id=rule.id,
+        occurrence_date=occurrence_start,
+        scheduled_date=occurrence_start,
+        is_recurring=False,
+        status=models.SessionStatus.PENDING,
+        payment_status=models.PaymentStatus.PENDING,
+    )
+    return values
+
+
+def materialize_occurrence(db: Session, rule: models.Session, occurrence_start: datetime) -> models.Session:
+    """Give an occurrence its own row (idempotent) and return it"""
+    values = occurrence_values(rule, occurrence_start)
+    now = datetime.utcnow()
+    inserted = db.execute(
+        insert(models.Session)
+        .values(created_at=now, updated_at=now, **values)
+        .on_conflict_do_nothing()
+        .returning(models.Session.id)
+    ).first()
+    if inserted:
+        stats.sessions_created(db)
+    return db.query(models.Session).filter(models.Session.id == values["id"]).one()
+
+
+def materialize_upcoming(db: Session, now: datetime, horizon: timedelta) -> int:
+    """Materialize every series occurrence starting within horizon of now"""
+    occurrences = virtual_occurrences(db, [], now, now + horizon)
+    for rule, occurrence in occurrences:
+        materialize_occurrence(db, rule, occurrence)
+    db.commit()
+    return len(occurrences)
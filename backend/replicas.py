@@ -0,0 +1,127 @@
+from typing import Callable, Optional
+import logging
+import os
+import threading
+import time
+
+from fastapi import Request
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from database import SessionLocal, build_engine, get_engine
+
+# Reads of a client that wrote within this many seconds go to the primary
+READ_AFTER_WRITE_SECONDS = float(os.getenv("READ_AFTER_WRITE_SECONDS", 10))
+# Replica lag beyond which reads fall back to the primary
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", 5))
+# How often the replica lag is measured
+REPLICA_LAG_CHECK_SECONDS = float(os.getenv("REPLICA_LAG_CHECK_SECONDS", 2))
+
+# Response header carrying the time until which the client should read from
+# the primary; the frontend echoes it back on its requests
+READ_AFTER_WRITE_HEADER = "X-Read-After-Write"
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+logger = logging.getLogger(__name__)
+
+# Seconds the replica is behind the primary: 0 when it has replayed everything it
+# received, and when the database is not a standby at all (a stand-in replica)
+LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+def measure_lag(engine: Engine) -> float:
+    with engine.connect() as connection:
+        return float(connection.execute(LAG_QUERY).scalar())
+
+
+class ReplicaRouter:
+    """Decides whether reads may use the replica, re-measuring its lag every check_interval seconds"""
+
+    def __init__(self, engine: Engine, max_lag: float = REPLICA_MAX_LAG_SECONDS,
+                 check_interval: float = REPLICA_LAG_CHECK_SECONDS,
+                 probe: Callable[[Engine], float] = measure_lag):
+        self.engine = engine
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.probe = probe
+        self.lag: Optional[float] = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def healthy(self) -> bool:
+        """Whether the replica is reachable and within max_lag; one request re-measures at a time"""
+        if time.monotonic() - self._checked_at >= self.check_interval and self._lock.acquire(blocking=False):
+            try:
+                self.lag = self.probe(self.engine)
+            except Exception as e:
+                logger.warning("Replica lag check failed: %s", e)
+                self.lag = None
+            finally:
+                self._checked_at = time.monotonic()
+                self._lock.release()
+        return self.lag is not None and self.lag <= self.max_lag
+
+    def engine_for(self, primary_until: float = 0) -> Engine:
+        if primary_until > time.time() or not self.healthy():
+            return get_engine()
+        return self.engine
+
+
+_router = None
+_router_lock = threading.Lock()
+
+def get_router() -> Optional[ReplicaRouter]:
+    """The replica router, or None when REPLICA_DATABASE_URL is not set"""
+    global _router
+    url = os.getenv("REPLICA_DATABASE_URL")
+    if url and _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = ReplicaRouter(build_engine(url))
+    return _router
+
+
+def _primary_until(request: Request) -> float:
+    try:
+        return float(request.headers.get(READ_AFTER_WRITE_HEADER, 0))
+    except ValueError:
+        return 0
+
+
+def get_read_db(request: Request):
+    """Session for GET endpoints that only read: the replica when it is safe, else the primary"""
+    router = get_router()
+    engine = router.engine_for(_primary_until(request)) if router else get_engine()
+    db = SessionLocal(bind=engine)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+class ReadAfterWriteMiddleware:
+    """Tell clients whose request wrote to keep reading from the primary for a while"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_header(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = f"{time.time() + READ_AFTER_WRITE_SECONDS:.3f}"
+                message["headers"] = list(message.get("headers", [])) + [
+                    (READ_AFTER_WRITE_HEADER.lower().encode(), until.encode())
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_header)
@@ -0,0 +1,322 @@
+from calendar import monthrange
+from collections import OrderedDict
+from datetime import datetime, time, timedelta
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Tuple
+import os
+import time as _time
+
+Interval = Tuple[datetime, datetime]
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+HOURS_PER_WEEK = 7 * 24
+
+# Hour ranges (start inclusive, end exclusive) accepted by the search availability filter
+DAY_PARTS = {"morning": (6, 12), "afternoon": (12, 17), "evening": (17, 22), "night": (22, 24)}
+DAY_GROUPS = {"weekdays": WEEKDAYS[:5], "weekends": WEEKDAYS[5:], "any": WEEKDAYS}
+
+# Fixed-length recurrence steps in days; "monthly" is handled separately
+RECURRENCE_STEP_DAYS = {"weekly": 7, "bi-weekly": 14, "biweekly": 14}
+
+
+def _parse_clock(value: str) -> Optional[int]:
+    """Convert an "HH:MM" string to minutes after midnight"""
+    try:
+        hours, minutes = value.strip().split(":")
+        total = int(hours) * 60 + int(minutes)
+    except (AttributeError, ValueError):
+        return None
+    if 0 <= total <= MINUTES_PER_DAY:
+        return total
+    return None
+
+
+def merge_intervals(intervals: List[Tuple]) -> List[Tuple]:
+    """Sort intervals and merge the ones that overlap or touch"""
+    merged: List[Tuple] = []
+    for start, end in sorted(intervals):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_intervals(free: List[Tuple], busy: List[Tuple]) -> List[Tuple]:
+    """Remove busy intervals from free intervals (both sorted and merged)"""
+    result: List[Tuple] = []
+    j = 0
+    for start, end in free:
+        while j < len(busy) and busy[j][1] <= start:
+            j += 1
+        k = j
+        cursor = start
+        while k < len(busy) and busy[k][0] < end:
+            if busy[k][0] > cursor:
+                result.append((cursor, busy[k][0]))
+            cursor = max(cursor, busy[k][1])
+            k += 1
+        if cursor < end:
+            result.append((cursor, end))
+    return result
+
+
+def parse_availability(availability: Optional[Dict[str, List[str]]]) -> List[Tuple[int, int]]:
+    """Turn the TeacherProfile.availability JSON into merged minute-of-week intervals
+
+    Each entry is either a slot start such as "09:00" (one hour long) or an
+    explicit range such as "09:00-12:30".
+    """
+    if not availability:
+        return []
+
+    intervals = []
+    for day, slots in availability.items():
+        day_key = str(day).strip().lower()
+        if day_key not in WEEKDAYS or not slots:
+            continue
+        day_offset = WEEKDAYS.index(day_key) * MINUTES_PER_DAY
+        for slot in slots:
+            if "-" in str(slot):
+                start_str, end_str = str(slot).split("-", 1)
+                start, end = _parse_clock(start_str), _parse_clock(end_str)
+            else:
+                start = _parse_clock(str(slot))
+                end = start + 60 if start is not None else None
+            if start is None or end is None or end <= start:
+                continue
+            intervals.append((day_offset + start, day_offset + min(end, MINUTES_PER_DAY)))
+    return merge_intervals(intervals)
+
+
+def _hour_bits(hours) -> str:
+    """Render a set of hour-of-week indexes as a 168-character bit string"""
+    return "".join("1" if hour in hours else "0" for hour in range(HOURS_PER_WEEK))
+
+
+def availability_mask(availability: Optional[Dict[str, List[str]]]) -> str:
+    """168-bit hour-of-week mask (Monday 00:00 first) of a teacher's weekly template
+
+    An hour is set when any part of it is available.
+    """
+    hours = set()
+    for start, end in parse_availability(availability):
+        hours.update(range(start // 60, -(-end // 60)))
+    return _hour_bits(hours)
+
+
+def parse_availability_filter(value: str) -> str:
+    """Turn a search filter such as "tuesday:evening,weekends" into an hour-of-week mask
+
+    Each comma-separated token is a day (monday..sunday, weekdays, weekends, any)
+    optionally followed by ":" and a day part (morning, afternoon, evening, night)
+    or an hour range such as "18-21". Raises ValueError on anything else.
+    """
+    hours = set()
+    for token in value.split(","):
+        token = token.strip().lower()
+        if not token:
+            continue
+        day_token, _, part = token.partition(":")
+        if day_token in DAY_GROUPS:
+            days = DAY_GROUPS[day_token]
+        elif day_token in WEEKDAYS:
+            days = [day_token]
+        else:
+            raise ValueError(f"Unknown day {day_token!r}")
+
+        if not part:
+            first, last = 0, 24
+        elif part in DAY_PARTS:
+            first, last = DAY_PARTS[part]
+        else:
+            try:
+                first, last = (int(bound) for bound in part.split("-"))
+            except ValueError:
+                raise ValueError(f"Unknown time of day {part!r}")
+            if not 0 <= first < last <= 24:
+                raise ValueError(f"Invalid hour range {part!r}")
+
+        for day in days:
+            offset = WEEKDAYS.index(day) * 24
+            hours.update(range(offset + first, offset + last))
+    if not hours:
+        raise ValueError("Empty availability filter")
+    return _hour_bits(hours)
+
+
+def week_start(moment: datetime) -> datetime:
+    """Return midnight of the Monday starting the week that contains moment"""
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+    return day - timedelta(days=day.weekday())
+
+
+def session_interval(scheduled_date: datetime, scheduled_time: str, duration: float) -> Interval:
+    """Build the (start, end) interval a booked session occupies"""
+    minutes = _parse_clock(scheduled_time or "")
+    if minutes is None:
+        start = scheduled_date.replace(tzinfo=None)
+    else:
+        start = datetime.combine(scheduled_date.date(), time()) + timedelta(minutes=minutes)
+    return start, start + timedelta(hours=duration or 0)
+
+
+def compute_week_slots(template: List[Tuple[int, int]], week: datetime,
+                       busy: List[Interval]) -> List[Interval]:
+    """Open intervals of a single week: the weekly template minus busy intervals"""
+    free = [
+        (week + timedelta(minutes=start), week + timedelta(minutes=end))
+        for start, end in template
+    ]
+    return subtract_intervals(merge_intervals(free), busy)
+
+
+class SlotCache:
+    """Per-teacher, per-week cache of computed free slots
+
+    Entries expire after ttl_seconds so that workers which did not see a
+    booking converge quickly; booking through this worker invalidates
+    the teacher immediately.
+    """
+
+    def __init__(self, ttl_seconds: float = 30.0, max_teachers: int = 5000):
+        self.ttl_seconds = ttl_seconds
+        self.max_teachers = max_teachers
+        self._entries: "OrderedDict[str, Dict[datetime, Tuple[float, List[Interval]]]]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, teacher_id, week: datetime) -> Optional[List[Interval]]:
+        """Return cached slots for a teacher week, or None on a miss"""
+        key = str(teacher_id)
+        with self._lock:
+            weeks = self._entries.get(key)
+            if not weeks or week not in weeks:
+                return None
+            expires_at, slots = weeks[week]
+            if expires_at < _time.monotonic():
+                del weeks[week]
+                return None
+            self._entries.move_to_end(key)
+            return slots
+
+    def set(self, teacher_id, week: datetime, slots: List[Interval]):
+        """Store computed slots for a teacher week"""
+        key = str(teacher_id)
+        with self._lock:
+            weeks = self._entries.setdefault(key, {})
+            weeks[week] = (_time.monotonic() + self.ttl_seconds, slots)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_teachers:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, teacher_id):
+        """Drop every cached week of a teacher"""
+        with self._lock:
+            self._entries.pop(str(teacher_id), None)
+
+    def clear(self):
+        """Drop the whole cache"""
+        with self._lock:
+            self._entries.clear()
+
+
+def free_slots(teacher_id, availability: Optional[Dict[str, List[str]]],
+               start: datetime, end: datetime,
+               load_busy: Callable[[datetime, datetime], List[Interval]],
+               cache: Optional[SlotCache] = None) -> List[Interval]:
+    """Open slots of a teacher between start and end
+
+    load_busy(range_start, range_end) is only called when at least one week
+    of the window is not cached, and then once for all missing weeks.
+    """
+    cache = cache if cache is not None else slot_cache
+    start = start.replace(tzinfo=None)
+    end = end.replace(tzinfo=None)
+    template = parse_availability(availability)
+    if not template or end <= start:
+        return []
+
+    weeks = []
+    week = week_start(start)
+    while week < end:
+        weeks.append(week)
+        week += timedelta(days=7)
+
+    cached = {week: cache.get(teacher_id, week) for week in weeks}
+    missing = [week for week, slots in cached.items() if slots is None]
+    if missing:
+        busy = merge_intervals(load_busy(missing[0], missing[-1] + timedelta(days=7)))
+        for week in missing:
+            cached[week] = compute_week_slots(template, week, busy)
+            cache.set(teacher_id, week, cached[week])
+
+    result: List[Interval] = []
+    for week in weeks:
+        for slot_start, slot_end in cached[week]:
+            if slot_end <= start or slot_start >= end:
+                continue
+            clipped = (max(slot_start, start), min(slot_end, end))
+            if result and result[-1][1] == clipped[0]:
+                result[-1] = (result[-1][0], clipped[1])
+            else:
+                result.append(clipped)
+    return result
+
+
+def is_slot_free(slots: List[Interval], start: datetime, end: datetime) -> bool:
+    """Check whether [start, end) fits entirely inside one open slot"""
+    return any(slot_start <= start and end <= slot_end for slot_start, slot_end in slots)
+
+
+def _add_months(moment: datetime, months: int) -> datetime:
+    """Shift a datetime by whole months, clamping the day to the month's length"""
+    month_index = moment.month - 1 + months
+    year, month = moment.year + month_index // 12, month_index % 12 + 1
+    return moment.replace(year=year, month=month, day=min(moment.day, monthrange(year, month)[1]))
+
+
+def expand_occurrences(first_start: datetime, frequency: Optional[str],
+                       window_start: datetime, window_end: datetime,
+                       until: Optional[datetime] = None) -> List[datetime]:
+    """Start times of a series' repeat occurrences that fall in [window_start, window_end)
+
+    The first occurrence (first_start itself) is the stored session and is never
+    returned. Fixed-step series jump straight to the window, so the cost depends
+    on the window size rather than on how old the series is.
+    """
+    frequency = (frequency or "").strip().lower()
+    if until is not None and until < window_end:
+        window_end = until + timedelta(microseconds=1)
+
+    occurrences: List[datetime] = []
+    if frequency in RECURRENCE_STEP_DAYS:
+        step = timedelta(days=RECURRENCE_STEP_DAYS[frequency])
+        index = max(1, -(-(window_start - first_start) // step))
+        occurrence = first_start + step * index
+        while occurrence < window_end:
+            occurrences.append(occurrence)
+            occurrence += step
+    elif frequency == "monthly":
+        index = max(1, (window_start.year - first_start.year) * 12 + window_start.month - first_start.month - 1)
+        occurrence = _add_months(first_start, index)
+        while occurrence < window_end:
+            if occurrence >= window_start:
+                occurrences.append(occurrence)
+            index += 1
+            occurrence = _add_months(first_start, index)
+    return occurrences
+
+
+def overlaps(intervals: List[Interval], start: datetime, end: datetime) -> bool:
+    """Check whether [start, end) intersects any of the intervals"""
+    return any(other_start < end and start < other_end for other_start, other_end in intervals)
+
+
+# Global slot cache instance
+slot_cache = SlotCache(ttl_seconds=float(os.getenv("SLOT_CACHE_TTL_SECONDS", "30")))
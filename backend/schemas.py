@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+from datetime import date, datetime
 from uuid import UUID
 from enum import Enum
 
@@ -99,6 +99,7 @@ class TeacherProfileResponse(TeacherProfileCreate):
     user_id: UUID
     average_rating: float
     total_reviews: Optional[int] = 0
+    rating_histogram: Dict[str, int] = {}  # {"1": count, ..., "5": count}
     total_sessions: Optional[int] = 0
     is_verified: Optional[bool] = False
     
@@ -136,7 +137,7 @@ class TeacherSearchParams(BaseModel):
     max_rate: Optional[float] = None
     min_rating: Optional[float] = None
     formats: Optional[List[str]] = None
-    availability: Optional[str] = None
+    availability: Optional[str] = None  # e.g. "tuesday:evening,weekends", see scheduling.parse_availability_filter
     experience_level: Optional[str] = None
     language: Optional[str] = None
     city: Optional[str] = None
@@ -155,6 +156,7 @@ class SessionCreate(BaseModel):
     duration: float
     is_recurring: bool = False
     recurring_frequency: Optional[str] = None
+    recurring_until: Optional[datetime] = None
     notes: Optional[str] = None
 
 
@@ -173,16 +175,27 @@ class SessionResponse(BaseModel):
     payment_status: str
     is_recurring: bool
     recurring_frequency: Optional[str]
+    recurring_until: Optional[datetime] = None
     meeting_link: Optional[str]
     notes: Optional[str]
     created_at: datetime
     teacher_name: Optional[str] = None
     student_name: Optional[str] = None
+    # Set on occurrences of a recurring series; is_materialized is False for
+    # occurrences expanded on the fly that have no row of their own yet
+    series_id: Optional[UUID] = None
+    occurrence_date: Optional[datetime] = None
+    is_materialized: bool = True
     
     class Config:
         from_attributes = True
 
 
+class TimeSlot(BaseModel):
+    start: datetime
+    end: datetime
+
+
 class SessionUpdate(BaseModel):
     status: Optional[str] = None
     meeting_link: Optional[str] = None
@@ -307,13 +320,13 @@ class WalletResponse(BaseModel):
 
 
 class WalletDepositRequest(BaseModel):
-    amount: float
+    amount: float = Field(..., gt=0)
     provider: str
     customer_mobile: str
 
 
 class WalletWithdrawRequest(BaseModel):
-    amount: float
+    amount: float = Field(..., gt=0)
     bank_account_id: UUID
 
 
@@ -373,6 +386,18 @@ class AdminStatsResponse(BaseModel):
     active_sessions: int
 
 
+class TimeseriesPoint(BaseModel):
+    period: date  # first day of the day, week (Monday) or month
+    value: float  # revenue in PKR, other metrics are counts
+
+
+class TimeseriesResponse(BaseModel):
+    interval: str
+    start: date
+    end: date
+    series: Dict[str, List[TimeseriesPoint]]
+
+
 class VerificationDocumentCreate(BaseModel):
     document_type: str
     document_url: str
@@ -385,11 +410,29 @@ class VerificationDocumentResponse(VerificationDocumentCreate):
     admin_notes: Optional[str]
     verified_at: Optional[datetime]
     created_at: datetime
+    claimed_by: Optional[UUID] = None
+    claim_expires_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
 
 
+class VerificationClaimRequest(BaseModel):
+    limit: int = Field(10, ge=1, le=100)
+
+
+class VerificationReleaseRequest(BaseModel):
+    document_ids: List[UUID] = Field(..., min_length=1, max_length=100)
+
+
 class VerificationReviewRequest(BaseModel):
     status: str  # verified, rejected
     admin_notes: Optional[str] = None
+
+
+class VerificationDecision(VerificationReviewRequest):
+    document_id: UUID
+
+
+class BulkVerificationReviewRequest(BaseModel):
+    decisions: List[VerificationDecision] = Field(..., min_length=1, max_length=1000)
@@ -0,0 +1,391 @@
+import argparse
+import csv
+import io
+import json
+import random
+import time
+from bisect import bisect
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+from queue import Queue
+from threading import Thread
+
+from sqlalchemy import text
+
+from database import SessionLocal, get_engine
+import analytics
+import auth
+import models
+import ratings
+import scheduling
+import stats
+
+# Synthetic marketplace data for benchmarks and load tests, generated in
+# batches and loaded with COPY:
+#
+#   python seed.py --users 250000 --seed 7 --truncate
+#
+# The same seed, user count and --as-of date always produce the same rows.
+# Teachers log in as teacher<k>@seed.example.com and students as
+# student<k>@seed.example.com, all with --password.
+
+SEED_EMAIL_DOMAIN = "seed.example.com"
+
+SUBJECTS = ["Math", "Physics", "Chemistry", "Biology", "English", "Computer Science", "Urdu", "Economics"]
+TOPICS = ["Exam preparation", "Homework help", "Past papers", "Concept review", "Assignment feedback"]
+CITIES = ["Lahore", "Karachi", "Islamabad", "Rawalpindi", "Faisalabad", "Peshawar", "Multan"]
+FIRST_NAMES = ["Ayesha", "Ali", "Fatima", "Hamza", "Zainab", "Usman", "Maryam", "Bilal", "Hira", "Saad"]
+LAST_NAMES = ["Khan", "Ahmed", "Malik", "Hussain", "Raza", "Iqbal", "Shah", "Butt", "Qureshi", "Siddiqui"]
+REVIEW_TEXTS = ["Very clear explanations", "Helped me before my exam", "Patient and well prepared",
+                "Good session", "Could have been more structured"]
+MESSAGE_TEXTS = ["Hi, are you available this week?", "Sure, what topic?", "Can we go over the last chapter?",
+                 "Sent you the questions", "Thanks, see you then"]
+
+# Share of reviews giving 1..5 stars; marketplaces skew heavily positive
+RATING_WEIGHTS = [3, 4, 8, 25, 60]
+# Teacher k gets bookings in proportion to 1 / (k + 1) ** TEACHER_POPULARITY_EXPONENT
+TEACHER_POPULARITY_EXPONENT = 1.1
+# Messages per conversation are Pareto distributed with this shape (smaller is heavier tailed)
+CONVERSATION_SIZE_SHAPE = 1.2
+MAX_CONVERSATION_MESSAGES = 2000
+
+# COPY columns per table, in load order
+COLUMNS = {
+    "users": ("id", "email", "password_hash", "role", "is_active", "is_verified", "created_at", "updated_at"),
+    "teacher_profiles": (
+        "id", "user_id", "name", "bio", "hourly_rate", "subjects_taught", "experience_years", "preferred_formats",
+        "average_rating", "total_reviews", "rating_sum", "rating_count_1", "rating_count_2", "rating_count_3",
+        "rating_count_4", "rating_count_5", "total_sessions", "city", "languages", "availability",
+        "availability_mask", "is_verified", "verification_status",
+    ),
+    "student_profiles": ("id", "user_id", "name", "grade_level", "institution", "preferred_formats", "city"),
+    "wallets": ("id", "user_id", "balance_paisa", "currency", "is_active", "created_at", "updated_at"),
+    "requests": ("id", "student_id", "subject", "topic", "description", "preferred_format", "urgency_level",
+                 "hourly_rate", "status", "created_at"),
+    "sessions": ("id", "student_id", "teacher_id", "subject", "topic", "scheduled_date", "scheduled_time",
+                 "duration", "hourly_rate", "total_amount", "status", "payment_status", "is_recurring",
+                 "created_at", "updated_at"),
+    "transactions": ("id", "session_id", "user_id", "amount", "transaction_type", "status", "provider",
+                     "provider_transaction_id", "description", "created_at", "updated_at", "completed_at"),
+    "reviews": ("id", "session_id", "student_id", "teacher_id", "rating", "review_text", "is_verified_session",
+                "helpful_votes", "created_at", "updated_at"),
+    "conversations": ("id", "participant_1_id", "participant_2_id", "last_message_at", "created_at"),
+    "messages": ("id", "conversation_id", "sender_id", "receiver_id", "content", "is_read", "created_at"),
+}
+TABLE_NUMBERS = {table: number for number, table in enumerate(COLUMNS, start=1)}
+
+
+def row_id(seed: int, table: str, n: int) -> str:
+    """Deterministic UUID of the n-th generated row of a table"""
+    return f"{seed & 0xFFFFFFFF:08x}-{TABLE_NUMBERS[table]:04x}-4000-8000-{n:012x}"
+
+
+def teacher_user_id(seed: int, k: int) -> str:
+    return row_id(seed, "users", k)
+
+
+def teacher_profile_id(seed: int, k: int) -> str:
+    return row_id(seed, "teacher_profiles", k)
+
+
+class Generator:
+    """Streams the rows of a synthetic marketplace, one batch of users at a time
+
+    Teachers come first (they are referenced by everything students do),
+    then students with their requests, sessions, payments, reviews and
+    conversations. Each batch is a dict of table -> list of row tuples.
+    """
+
+    def __init__(self, users: int, seed: int = 0, teacher_ratio: float = 0.1,
+                 sessions_per_student: float = 3.0, history_days: int = 365,
+                 as_of: date = None, password_hash: str = "!"):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.teachers = max(1, round(users * teacher_ratio))
+        self.students = max(0, users - self.teachers)
+        self.sessions_per_student = sessions_per_student
+        self.history = timedelta(days=history_days)
+        self.as_of = datetime.combine(as_of or date.today(), datetime.min.time())
+        self.start = self.as_of - self.history
+        self.password_hash = password_hash
+        self.teacher_rates = []
+        self.popularity = list(accumulate(
+            1 / (k + 1) ** TEACHER_POPULARITY_EXPONENT for k in range(self.teachers)
+        ))
+        self.counters = {table: 0 for table in COLUMNS}
+
+    def next_id(self, table: str) -> str:
+        n = self.counters[table]
+        self.counters[table] = n + 1
+        return row_id(self.seed, table, n)
+
+    def joined_at(self, position: float) -> datetime:
+        """Signup time of a user at this position (0..1) of the history, so ids follow signup order"""
+        return self.start + self.history * position + timedelta(seconds=self.rng.randrange(3600))
+
+    def name(self) -> str:
+        return f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+
+    def popular_teacher(self) -> int:
+        return bisect(self.popularity, self.rng.random() * self.popularity[-1])
+
+    def teacher_batches(self, batch_size: int):
+        rng = self.rng
+        for first in range(0, self.teachers, batch_size):
+            batch = {"users": [], "teacher_profiles": [], "wallets": []}
+            for k in range(first, min(first + batch_size, self.teachers)):
+                user_id = self.next_id("users")
+                joined = self.joined_at(k / self.teachers * 0.5)
+                batch["users"].append((user_id, f"teacher{k}@{SEED_EMAIL_DOMAIN}", self.password_hash,
+                                       "TEACHER", True, True, joined, joined))
+
+                rate = round(rng.lognormvariate(7.0, 0.4) / 50) * 50 or 50
+                self.teacher_rates.append(rate)
+                start_hour = rng.choice([9, 14, 16, 18])
+                days = rng.sample(scheduling.WEEKDAYS, rng.randint(2, 6))
+                availability = {day: [f"{hour:02d}:00" for hour in range(start_hour, start_hour + rng.randint(2, 5))]
+                                for day in days}
+                verified = rng.random() < 0.7
+                batch["teacher_profiles"].append((
+                    self.next_id("teacher_profiles"), user_id, self.name(), "Experienced tutor", rate,
+                    json.dumps(rng.sample(SUBJECTS, rng.randint(1, 3))), rng.randint(0, 20),
+                    "{" + ",".join(rng.sample(["online", "in-person"], rng.randint(1, 2))) + "}",
+                    0.0, 0, 0, 0, 0, 0, 0, 0, 0, rng.choice(CITIES), "{English,Urdu}",
+                    json.dumps(availability), scheduling.availability_mask(availability),
+                    verified, "VERIFIED" if verified else "PENDING",
+                ))
+                batch["wallets"].append((self.next_id("wallets"), user_id, 0, "PKR", True, joined, joined))
+            yield batch
+
+    def student_batches(self, batch_size: int):
+        rng = self.rng
+        for first in range(0, self.students, batch_size):
+            batch = {table: [] for table in COLUMNS if table != "teacher_profiles"}
+            for k in range(first, min(first + batch_size, self.students)):
+                user_id = self.next_id("users")
+                profile_id = self.next_id("student_profiles")
+                joined = self.joined_at(k / max(self.students, 1))
+                batch["users"].append((user_id, f"student{k}@{SEED_EMAIL_DOMAIN}", self.password_hash,
+                                       "STUDENT", True, True, joined, joined))
+                batch["student_profiles"].append((
+                    profile_id, user_id, self.name(), f"Grade {rng.randint(9, 12)}", "Government College",
+                    "{online}", rng.choice(CITIES),
+                ))
+                batch["wallets"].append((self.next_id("wallets"), user_id, 0, "PKR", True, joined, joined))
+
+                while rng.random() < 0.5:
+                    batch["requests"].append((
+                        self.next_id("requests"), user_id, rng.choice(SUBJECTS), rng.choice(TOPICS),
+                        "Looking for help", rng.choice(["online", "in-person"]),
+                        rng.choice(["low", "medium", "high"]), rng.randint(5, 30) * 100,
+                        "ACTIVE" if rng.random() < 0.7 else "COMPLETED", joined + timedelta(hours=rng.randint(1, 72)),
+                    ))
+
+                conversations = {}
+                for _ in range(int(rng.expovariate(1 / self.sessions_per_student))):
+                    self.add_session(batch, rng, user_id, profile_id, joined, conversations)
+            yield batch
+
+    def add_session(self, batch, rng, user_id, profile_id, joined, conversations):
+        k = self.popular_teacher()
+        rate = self.teacher_rates[k]
+        booked = joined + (self.as_of - joined) * rng.random()
+        scheduled = (booked + timedelta(days=rng.randint(1, 14))).replace(hour=0, minute=0, second=0, microsecond=0)
+        duration = rng.choice([1, 1, 1, 1.5, 2])
+        session_id = self.next_id("sessions")
+        subject = rng.choice(SUBJECTS)
+        if scheduled >= self.as_of:
+            status, payment = rng.choice(["CONFIRMED", "PENDING"]), "PENDING"
+        elif rng.random() < 0.85:
+            status, payment = "COMPLETED", "COMPLETED"
+        else:
+            status, payment = "CANCELLED", "REFUNDED"
+        batch["sessions"].append((
+            session_id, profile_id, teacher_profile_id(self.seed, k), subject, rng.choice(TOPICS), scheduled,
+            f"{rng.randint(9, 20):02d}:00", duration, rate, rate * duration, status, payment, False, booked, booked,
+        ))
+
+        if payment != "PENDING":
+            batch["transactions"].append((
+                self.next_id("transactions"), session_id, user_id, rate * duration, "PAYMENT",
+                "COMPLETED" if payment == "COMPLETED" else "REFUNDED", rng.choice(["jazzcash", "easypaisa"]),
+                f"T{rng.getrandbits(48):012X}", f"{subject} session", booked, booked,
+                booked if payment == "COMPLETED" else None,
+            ))
+        if status == "COMPLETED" and rng.random() < 0.6:
+            reviewed_at = scheduled + timedelta(days=1)
+            batch["reviews"].append((
+                self.next_id("reviews"), session_id, profile_id, teacher_profile_id(self.seed, k),
+                rng.choices(range(1, 6), weights=RATING_WEIGHTS)[0], rng.choice(REVIEW_TEXTS), True, 0,
+                reviewed_at, reviewed_at,
+            ))
+
+        if k not in conversations:
+            conversations[k] = self.add_conversation(batch, rng, user_id, teacher_user_id(self.seed, k), booked)
+
+    def add_conversation(self, batch, rng, student_user_id, teacher_user_id, started):
+        conversation_id = self.next_id("conversations")
+        size = min(int(rng.paretovariate(CONVERSATION_SIZE_SHAPE)), MAX_CONVERSATION_MESSAGES)
+        sent = started
+        unread_from = size - rng.randint(0, 2)
+        for m in range(size):
+            sent += timedelta(minutes=rng.randint(1, 600))
+            sender, receiver = (student_user_id, teacher_user_id) if m % 2 == 0 else (teacher_user_id, student_user_id)
+            batch["messages"].append((
+                self.next_id("messages"), conversation_id, sender, receiver, rng.choice(MESSAGE_TEXTS),
+                m < unread_from, sent,
+            ))
+        batch["conversations"].append((conversation_id, student_user_id, teacher_user_id, sent, started))
+        return conversation_id
+
+
+def serialize(batch: dict) -> list:
+    """A batch as (table, CSV buffer, row count) in load order, ready for COPY"""
+    copies = []
+    for table in COLUMNS:
+        rows = batch.get(table)
+        if rows:
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(rows)
+            buffer.seek(0)
+            copies.append((table, buffer, len(rows)))
+    return copies
+
+
+def serialized_batches(generator: "Generator", batch_size: int, queue: Queue):
+    """Producer thread: generate and serialize batches while the previous one is being copied"""
+    try:
+        for phase in (generator.teacher_batches(batch_size), generator.student_batches(batch_size)):
+            for batch in phase:
+                queue.put(serialize(batch))
+        queue.put(None)
+    except BaseException as error:
+        queue.put(error)
+
+
+def truncate(conn):
+    """Empty every application table"""
+    tables = ", ".join(table.name for table in models.Base.metadata.sorted_tables)
+    with conn.cursor() as cursor:
+        cursor.execute(f"TRUNCATE {tables} RESTART IDENTITY CASCADE")
+    conn.commit()
+
+
+@contextmanager
+def foreign_keys_dropped(conn):
+    """Drop the foreign keys of the loaded tables, and add them back (validated in bulk) afterwards
+
+    Checking every COPYed row against its parents costs more than the COPY
+    itself; re-adding a constraint checks the whole table in one join.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT conrelid::regclass::text, conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE contype = 'f' AND conrelid::regclass::text = ANY(%s)", (list(COLUMNS),)
+        )
+        foreign_keys = cursor.fetchall()
+        for table, name, _ in foreign_keys:
+            cursor.execute(f"ALTER TABLE {table} DROP CONSTRAINT {name}")
+    conn.commit()
+    try:
+        yield
+    finally:
+        conn.rollback()
+        with conn.cursor() as cursor:
+            for table, name, definition in foreign_keys:
+                cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}")
+        conn.commit()
+
+
+def load(generator: Generator, batch_size: int = 5000, progress=print) -> dict:
+    """COPY every batch, committing after each; returns rows loaded per table
+
+    Batches are generated on a second thread so Python and Postgres work at
+    the same time. Commits don't wait for the WAL flush: a crash mid-load
+    loses the last batches of synthetic data, nothing else.
+    """
+    loaded = {table: 0 for table in COLUMNS}
+    started = time.perf_counter()
+    batches = Queue(maxsize=2)
+    Thread(target=serialized_batches, args=(generator, batch_size, batches), daemon=True).start()
+    conn = get_engine().raw_connection()
+    try:
+        with foreign_keys_dropped(conn), conn.cursor() as cursor:
+            while True:
+                copies = batches.get()
+                if copies is None:
+                    break
+                if isinstance(copies, BaseException):
+                    raise copies
+                cursor.execute("SET LOCAL synchronous_commit = off")
+                for table, buffer, count in copies:
+                    cursor.copy_expert(
+                        f"COPY {table} ({', '.join(COLUMNS[table])}) FROM STDIN WITH (FORMAT csv)", buffer
+                    )
+                    loaded[table] += count
+                conn.commit()
+                total = sum(loaded.values())
+                progress(f"{total:>12,} rows  {total / (time.perf_counter() - started):>10,.0f} rows/s")
+    finally:
+        conn.close()
+    return loaded
+
+
+def refresh_derived(history_days: int):
+    """Recompute what the app keeps incrementally: rating aggregates, admin counters, daily metrics"""
+    db = SessionLocal()
+    try:
+        ratings.rebuild_rating_aggregates(db)
+        db.commit()
+        stats.rebuild(db)
+        analytics.aggregate_daily_metrics(db, lookback_days=history_days + 30)
+    finally:
+        db.close()
+    with get_engine().connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("ANALYZE"))
+
+
+def seed_database(users: int, seed: int = 0, truncate_first: bool = False, batch_size: int = 5000,
+                  password: str = "password", progress=print, **options) -> dict:
+    """Load a synthetic marketplace of this many users; returns rows loaded per table"""
+    if truncate_first:
+        conn = get_engine().raw_connection()
+        try:
+            truncate(conn)
+        finally:
+            conn.close()
+    generator = Generator(users, seed=seed, password_hash=auth.get_password_hash(password), **options)
+    loaded = load(generator, batch_size, progress)
+    refresh_derived(generator.history.days)
+    return loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load synthetic Fast-Classified data with COPY")
+    parser.add_argument("--users", type=int, default=1000, help="Users to create, teachers included")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed; the same seed gives the same rows")
+    parser.add_argument("--teacher-ratio", type=float, default=0.1)
+    parser.add_argument("--sessions-per-student", type=float, default=3.0, help="Mean of an exponential")
+    parser.add_argument("--history-days", type=int, default=365, help="Spread signups over this many days")
+    parser.add_argument("--as-of", type=date.fromisoformat, default=date.today(),
+                        help="Day the history ends (YYYY-MM-DD); later sessions are upcoming")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Users per COPY batch and commit")
+    parser.add_argument("--password", default="password", help="Password of every generated user")
+    parser.add_argument("--truncate", action="store_true", help="Empty all application tables first")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    loaded = seed_database(
+        args.users, seed=args.seed, truncate_first=args.truncate, batch_size=args.batch_size,
+        password=args.password, teacher_ratio=args.teacher_ratio,
+        sessions_per_student=args.sessions_per_student, history_days=args.history_days, as_of=args.as_of,
+    )
+    elapsed = time.perf_counter() - started
+    for table, count in loaded.items():
+        print(f"{table:<18} {count:>12,}")
+    print(f"Loaded {sum(loaded.values()):,} rows in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,15 @@
-from database import Base, engine
-import models
+import os
+
+from alembic import command
+from alembic.config import Config
+
+ALEMBIC_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")
 
 def setup_database():
-    """Create all database tables"""
-    print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
-    print("Database tables created successfully!")
+    """Bring the database schema up to date (same as alembic upgrade head)"""
+    print("Running database migrations...")
+    command.upgrade(Config(ALEMBIC_CONFIG), "head")
+    print("Database is up to date!")
 
 if __name__ == "__main__":
     setup_database()
@@ -0,0 +1,94 @@
+from collections import Counter
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional
+import logging
+import os
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+import metrics
+
+# Report each request's statement count and SQL time as response headers (dev only)
+SQL_STATS_HEADERS = os.getenv("SQL_STATS_HEADERS", "").lower() in ("1", "true", "yes")
+# Running one statement shape this many times in a request flags it as a likely N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", 5))
+
+# Called with (method, route, stats) after every request; used by the sql_budget pytest plugin
+request_listeners: List[Callable[[str, str, "RequestStats"], None]] = []
+
+logger = logging.getLogger(__name__)
+
+
+class RequestStats:
+    """SQL statements run while serving one request"""
+
+    def __init__(self):
+        self.statements = 0
+        self.seconds = 0.0
+        # Statement text as sent to the driver, with placeholders instead of values
+        self.shapes: Counter = Counter()
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> Dict[str, int]:
+        return {shape: count for shape, count in self.shapes.items() if count >= threshold}
+
+
+# Stats of the request being served; copied into the threadpool with the rest of the context
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("sql_request_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    if current_request.get() is not None:
+        conn.info.setdefault("sqlstats_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request.get()
+    if stats is None or not conn.info.get("sqlstats_started"):
+        return
+    stats.seconds += time.perf_counter() - conn.info["sqlstats_started"].pop()
+    stats.statements += 1
+    stats.shapes[statement] += 1
+
+
+class SQLStatsMiddleware:
+    """Count the SQL statements and time of each request, and flag repeated statement shapes"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+
+        async def send_with_headers(message):
+            if SQL_STATS_HEADERS and message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-db-statements", str(stats.statements).encode()),
+                    (b"x-db-time-ms", f"{stats.seconds * 1000:.1f}".encode()),
+                    (b"x-db-repeated-statements", str(len(stats.repeated())).encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            current_request.reset(token)
+            route = metrics.route_label(scope)
+            metrics.DB_STATEMENTS_PER_REQUEST.labels(route).observe(stats.statements)
+            metrics.DB_SECONDS_PER_REQUEST.labels(route).observe(stats.seconds)
+            repeated = stats.repeated()
+            if repeated:
+                metrics.N_PLUS_ONE_TOTAL.labels(route).inc()
+                shape, count = max(repeated.items(), key=lambda item: item[1])
+                logger.warning("Possible N+1 in %s %s: %dx %s", scope["method"], route, count,
+                               " ".join(shape.split())[:200])
+            for listener in request_listeners:
+                listener(scope["method"], route, stats)
@@ -0,0 +1,132 @@
+from typing import Dict, Optional
+import random
+
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+import ledger
+import models
+
+# Number of admin_stats rows the counters are spread over
+STAT_SLOTS = 8
+
+COUNTERS = [
+    "total_users", "total_students", "total_teachers", "total_sessions",
+    "active_sessions", "pending_verifications", "total_revenue_paisa",
+]
+
+ACTIVE_SESSION_STATUSES = {models.SessionStatus.PENDING, models.SessionStatus.CONFIRMED}
+
+
+def transaction_slot(db: Session) -> int:
+    """The slot row the current transaction bumps
+
+    Picked once per transaction: a transaction that bumps several times then
+    locks a single row, so two of them can never wait on each other's slots.
+    """
+    db.connection()  # begins the transaction if the caller has not yet
+    transaction = db.get_transaction()
+    cached = db.info.get("stat_slot")
+    if cached is None or cached[0] is not transaction:
+        cached = db.info["stat_slot"] = (transaction, random.randrange(STAT_SLOTS))
+    return cached[1]
+
+
+def bump(db: Session, **deltas: int):
+    """Add deltas to the dashboard counters inside the caller's transaction"""
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    stat = models.AdminStat
+    statement = pg_insert(stat).values(slot=transaction_slot(db), **deltas)
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[stat.slot],
+        set_={name: getattr(stat, name) + statement.excluded[name] for name in deltas}
+    ))
+
+
+def user_created(db: Session, role: models.UserRole):
+    bump(db, total_users=1,
+         total_students=int(role == models.UserRole.STUDENT),
+         total_teachers=int(role == models.UserRole.TEACHER))
+
+
+def sessions_created(db: Session, count: int = 1):
+    """New sessions always start out pending, so they are active"""
+    bump(db, total_sessions=count, active_sessions=count)
+
+
+def session_status_changed(db: Session, old: Optional[str], new: Optional[str]):
+    was_active = old is not None and models.SessionStatus(old) in ACTIVE_SESSION_STATUSES
+    is_active = new is not None and models.SessionStatus(new) in ACTIVE_SESSION_STATUSES
+    bump(db, active_sessions=int(is_active) - int(was_active))
+
+
+def verification_status_changed(db: Session, old: Optional[str], new: Optional[str]):
+    pending = models.VerificationStatus.PENDING
+    was_pending = old is not None and models.VerificationStatus(old) == pending
+    is_pending = new is not None and models.VerificationStatus(new) == pending
+    bump(db, pending_verifications=int(is_pending) - int(was_pending))
+
+
+def read_totals(db: Session) -> Dict[str, int]:
+    """Current counter values, read from the slot rows in one query"""
+    stat = models.AdminStat
+    row = db.execute(
+        select(*[func.coalesce(func.sum(getattr(stat, name)), 0).label(name) for name in COUNTERS])
+    ).one()
+    return {name: int(value) for name, value in row._mapping.items()}
+
+
+def live_totals(db: Session) -> Dict[str, int]:
+    """The counters computed from the source tables (expensive on large tables)"""
+    user, session = models.User, models.Session
+    users = db.execute(select(
+        func.count(),
+        func.count().filter(user.role == models.UserRole.STUDENT),
+        func.count().filter(user.role == models.UserRole.TEACHER),
+    )).one()
+    sessions = db.execute(select(
+        func.count(),
+        func.count().filter(session.status.in_(ACTIVE_SESSION_STATUSES)),
+    )).one()
+    pending_verifications = db.query(models.VerificationDocument).filter(
+        models.VerificationDocument.status == models.VerificationStatus.PENDING
+    ).count()
+    revenue = db.query(func.sum(models.Transaction.amount)).filter(
+        models.Transaction.status == models.PaymentStatus.COMPLETED,
+        models.Transaction.transaction_type == models.TransactionType.PAYMENT
+    ).scalar() or 0
+    return {
+        "total_users": users[0],
+        "total_students": users[1],
+        "total_teachers": users[2],
+        "total_sessions": sessions[0],
+        "active_sessions": sessions[1],
+        "pending_verifications": pending_verifications,
+        "total_revenue_paisa": ledger.to_paisa(revenue),
+    }
+
+
+def reconcile(db: Session) -> Dict[str, Dict[str, int]]:
+    """Counters whose stored value differs from the live count, as {name: {"stored", "live"}}"""
+    stored, live = read_totals(db), live_totals(db)
+    return {
+        name: {"stored": stored[name], "live": live[name]}
+        for name in COUNTERS if stored[name] != live[name]
+    }
+
+
+def rebuild(db: Session) -> Dict[str, int]:
+    """Reset the counters to the live counts
+
+    The exclusive lock makes writers wait, so every change is either in the
+    live counts or bumped after the reset, never both.
+    """
+    db.execute(text("LOCK TABLE admin_stats IN EXCLUSIVE MODE"))
+    live = live_totals(db)
+    db.execute(delete(models.AdminStat))
+    db.execute(insert(models.AdminStat).values(slot=0, **live))
+    db.commit()
+    return live
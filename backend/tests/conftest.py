@@ -0,0 +1,66 @@
+import pytest
+import os
+import sys
+import uuid
+from contextlib import contextmanager
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest_plugins = ["tests.sql_budget"]
+
+# Tests that talk to the API need a real (throwaway) Postgres database
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+requires_database = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+
+@contextmanager
+def count_statements():
+    """Collect the SQL statements sent to the engine inside the block"""
+    from sqlalchemy import event
+    from database import engine
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture(scope="session")
+def client():
+    """TestClient for the main app bound to TEST_DATABASE_URL"""
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+    os.environ.setdefault("SECRET_KEY", "test-secret")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    from fastapi.testclient import TestClient
+    import setup_db
+    setup_db.setup_database()
+    import main
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def create_user(client):
+    """Factory that signs up a user with a profile and returns (auth headers, profile)"""
+    def _create_user(role, **profile):
+        email = f"{role}-{uuid.uuid4().hex[:12]}@example.com"
+        response = client.post("/api/auth/signup", json={"email": email, "password": "pw", "role": role})
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        response = client.post(f"/api/profiles/{role}", json=profile, headers=headers)
+        assert response.status_code == 200, response.text
+        return headers, response.json()
+    return _create_user
+
+
+@pytest.fixture
+def admin(client):
+    """Auth headers of a freshly signed-up admin"""
+    email = f"admin-{uuid.uuid4().hex[:12]}@example.com"
+    response = client.post("/api/auth/signup", json={"email": email, "password": "pw", "role": "admin"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
@@ -0,0 +1,38 @@
+import pytest
+
+# pytest plugin: @pytest.mark.sql_budget(max_statements) fails a test when any
+# API request it makes runs more SQL statements than that. Pass route="/api/..."
+# (or "GET /api/...") to only hold requests to that route template to the budget.
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "sql_budget(max_statements, route=None): fail when a request runs more SQL statements"
+    )
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    marker = item.get_closest_marker("sql_budget")
+    if marker is None:
+        return (yield)
+
+    import sqlstats
+    budget = marker.args[0]
+    only_route = marker.kwargs.get("route")
+    over = []
+
+    def check(method, route, stats):
+        if only_route in (None, route, f"{method} {route}") and stats.statements > budget:
+            repeated = stats.repeated()
+            hint = f", {max(repeated.values())}x the same statement" if repeated else ""
+            over.append(f"{method} {route}: {stats.statements} statements{hint}")
+
+    sqlstats.request_listeners.append(check)
+    try:
+        result = yield
+    finally:
+        sqlstats.request_listeners.remove(check)
+    if over:
+        pytest.fail(f"SQL statement budget of {budget} exceeded:\n  " + "\n  ".join(over), pytrace=False)
+    return result
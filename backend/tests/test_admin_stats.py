@@ -0,0 +1,126 @@
+import pytest
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import text
+
+from tests.conftest import requires_database
+
+pytestmark = requires_database
+
+
+class TestAdminStats:
+    """Test cases for the incrementally maintained admin dashboard counters"""
+
+    def setup_method(self):
+        from database import SessionLocal
+        import stats
+        self.db = SessionLocal()
+        stats.rebuild(self.db)
+
+    def teardown_method(self):
+        self.db.close()
+
+    def pay(self, client, student_user_id, session_id, amount):
+        import models
+        from payment import PaymentGateway
+
+        reference = f"T{uuid.uuid4().hex[:16]}"
+        self.db.add(models.Transaction(session_id=session_id, user_id=student_user_id, amount=amount,
+                                       transaction_type=models.TransactionType.PAYMENT,
+                                       provider="jazzcash", provider_transaction_id=reference))
+        self.db.commit()
+        callback = {"pp_TxnRefNo": reference, "pp_ResponseCode": "000", "pp_Amount": str(int(amount * 100))}
+        callback["pp_SecureHash"] = PaymentGateway("jazzcash").calculate_hash_jazzcash(callback)
+        return client.post("/api/payment/jazzcash/callback", data=callback)
+
+    def test_counters_follow_write_paths(self, client, create_user, admin):
+        """Test signups, bookings, payments and verifications keep the counters equal to live counts"""
+        import models
+        import stats
+
+        before = client.get("/api/admin/stats", headers=admin).json()
+
+        teacher_headers, teacher = create_user("teacher", name="Teacher", hourly_rate=1000, subjects_taught=["Math"])
+        student, _ = create_user("student", name="Student")
+        booked = []
+        for hour in ("09:00", "11:00"):
+            response = client.post("/api/sessions/book", headers=student, json={
+                "teacher_id": teacher["id"], "subject": "Math",
+                "scheduled_date": "2034-05-01T00:00:00", "scheduled_time": hour, "duration": 1,
+            })
+            booked.append(response.json())
+        client.patch(f"/api/sessions/{booked[1]['id']}", json={"status": "cancelled"}, headers=student)
+
+        student_user_id = self.db.query(models.StudentProfile.user_id).filter(
+            models.StudentProfile.id == booked[0]["student_id"]
+        ).scalar()
+        assert self.pay(client, student_user_id, booked[0]["id"], 1000).json() == {"status": "completed"}
+
+        documents = [
+            client.post("/api/verification/documents", headers=teacher_headers,
+                        json={"document_type": kind, "document_url": f"https://example.com/{kind}"}).json()
+            for kind in ("id_card", "degree")
+        ]
+        client.post(f"/api/admin/verifications/{documents[0]['id']}/review", headers=admin,
+                    json={"status": "verified"})
+
+        after = client.get("/api/admin/stats", headers=admin).json()
+        assert after["total_users"] - before["total_users"] == 2
+        assert after["total_teachers"] - before["total_teachers"] == 1
+        assert after["total_students"] - before["total_students"] == 1
+        assert after["total_sessions"] - before["total_sessions"] == 2
+        assert after["active_sessions"] - before["active_sessions"] == 1
+        assert after["pending_verifications"] - before["pending_verifications"] == 1
+        assert after["total_revenue"] - before["total_revenue"] == pytest.approx(1000)
+        assert stats.reconcile(self.db) == {}
+
+    def test_reconcile_reports_and_fixes_drift(self):
+        """Test reconciliation finds a drifted counter and rebuild resets it"""
+        import stats
+
+        stats.bump(self.db, total_users=5)
+        self.db.commit()
+
+        drift = stats.reconcile(self.db)
+        assert list(drift) == ["total_users"]
+        assert drift["total_users"]["stored"] - drift["total_users"]["live"] == 5
+
+        stats.rebuild(self.db)
+        assert stats.reconcile(self.db) == {}
+
+    def test_concurrent_multi_bump_transactions(self, monkeypatch):
+        """Test two transactions bumping twice each, interleaved, neither deadlock nor lose counts"""
+        from database import SessionLocal
+        import stats
+
+        # Each thread would draw its slots in the opposite order of the other
+        draws = {"first": iter([0, 1]), "second": iter([1, 0])}
+        names = threading.local()
+        monkeypatch.setattr(stats.random, "randrange", lambda stop: next(draws[names.value]))
+        barrier = threading.Barrier(2, timeout=10)
+
+        def transaction(name):
+            names.value = name
+            db = SessionLocal()
+            try:
+                db.execute(text("SET LOCAL lock_timeout = '5s'"))
+                stats.bump(db, total_sessions=1)
+                barrier.wait()
+                stats.bump(db, total_sessions=1)
+                db.commit()
+            finally:
+                db.close()
+
+        before = stats.read_totals(self.db)["total_sessions"]
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            for future in [pool.submit(transaction, name) for name in draws]:
+                future.result()
+
+        self.db.rollback()
+        assert stats.read_totals(self.db)["total_sessions"] - before == 4
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
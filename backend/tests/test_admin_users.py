@@ -0,0 +1,97 @@
+import pytest
+import os
+import time
+import uuid
+
+from tests.conftest import count_statements, requires_database
+
+pytestmark = requires_database
+
+# Synthetic users inserted for the search benchmark
+BENCHMARK_USERS = int(os.getenv("USER_SEARCH_BENCHMARK_ROWS", "50000"))
+
+
+class TestAdminUserSearch:
+    """Test cases for admin user prefix search"""
+
+    def test_prefix_search_on_email_and_names(self, client, create_user, admin):
+        """Test q matches email and profile name prefixes case-insensitively"""
+        tag = uuid.uuid4().hex[:8]
+        create_user("student", name=f"Zelda{tag} Student")
+        create_user("teacher", name=f"zelda{tag} Teacher", hourly_rate=1000, subjects_taught=["Math"])
+        create_user("student", name="Someone Else")
+
+        def search(**params):
+            response = client.get("/api/admin/users", params=params, headers=admin)
+            assert response.status_code == 200
+            return response.json()
+
+        found = search(q=f"ZELDA{tag}")
+        assert sorted(u["profile_name"] for u in found) == [f"Zelda{tag} Student", f"zelda{tag} Teacher"]
+        assert [u["role"] for u in search(q=f"zelda{tag}", role="teacher")] == ["teacher"]
+        assert len(search(q="student-", per_page=100)) > 0
+        assert search(q="%") == []
+        assert search(q="_") == []
+
+    def test_listing_is_a_single_query(self, client, create_user, admin):
+        """Test profile names are joined in rather than looked up per user"""
+        for i in range(5):
+            create_user("student", name=f"Listed {i}")
+
+        with count_statements() as statements:
+            response = client.get("/api/admin/users", params={"per_page": 50}, headers=admin)
+
+        assert response.status_code == 200
+        assert all(u["profile_name"] for u in response.json() if u["role"] == "student")
+        # Auth lookup plus the listing itself
+        assert len(statements) <= 2
+
+    def test_search_uses_prefix_indexes(self, client, admin):
+        """Test a prefix search over many users is answered through the indexes"""
+        from database import engine
+        from sqlalchemy import text
+        from sqlalchemy.dialects import postgresql
+        import exports
+
+        tag = uuid.uuid4().hex[:6]
+        with engine.begin() as conn:
+            conn.execute(text("""
+                INSERT INTO users (id, email, password_hash, role, is_active, is_verified, created_at)
+                SELECT gen_random_uuid(), 'bench' || :tag || '-' || i || '@example.com', 'x',
+                       'STUDENT', true, false, now()
+                FROM generate_series(1, :rows) AS i
+            """), {"tag": tag, "rows": BENCHMARK_USERS})
+            conn.execute(text("""
+                INSERT INTO student_profiles (id, user_id, name)
+                SELECT gen_random_uuid(), id, 'Bench ' || md5(email)
+                FROM users WHERE email LIKE 'bench' || :tag || '-%'
+            """), {"tag": tag})
+            conn.execute(text("ANALYZE users; ANALYZE student_profiles; ANALYZE teacher_profiles"))
+
+        try:
+            query = exports.users_query(search=f"bench{tag}-4242@").limit(20)
+            compiled = str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+            with engine.connect() as conn:
+                plan = "\n".join(row[0] for row in conn.execute(text("EXPLAIN " + compiled)))
+
+            began = time.perf_counter()
+            for _ in range(10):
+                response = client.get("/api/admin/users", params={"q": f"Bench{tag}-4242@"}, headers=admin)
+            per_request = (time.perf_counter() - began) / 10
+        finally:
+            with engine.begin() as conn:
+                conn.execute(text("""
+                    DELETE FROM student_profiles WHERE user_id IN
+                        (SELECT id FROM users WHERE email LIKE 'bench' || :tag || '-%')
+                """), {"tag": tag})
+                conn.execute(text("DELETE FROM users WHERE email LIKE 'bench' || :tag || '-%'"), {"tag": tag})
+
+        print(f"\nSearch over {BENCHMARK_USERS} users: {per_request * 1000:.1f} ms per request")
+        assert [u["email"] for u in response.json()] == [f"bench{tag}-4242@example.com"]
+        assert "ix_users_email_prefix" in plan
+        assert "ix_student_profiles_name_prefix" in plan
+        assert per_request < 0.1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,160 @@
+import pytest
+import asyncio
+import os
+import threading
+import time
+
+# Timing-sensitive, so only run on request
+ADMISSION_BENCHMARK = os.getenv("ADMISSION_BENCHMARK")
+
+
+def make_app(work, **options):
+    """An app with AdmissionMiddleware in front of a sync GET /work running work(), and /metrics"""
+    from fastapi import FastAPI
+    from admission import AdmissionMiddleware
+
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware, **options)
+
+    @app.get("/work")
+    def do_work():
+        work()
+        return {"ok": True}
+
+    @app.get("/metrics")
+    def metrics():
+        return {}
+
+    return app
+
+
+async def offer(app, rate, seconds, threads):
+    """Send GET /work at a steady rate regardless of responses, on a threadpool of this many threads
+
+    Returns (status, latency in seconds) per request.
+    """
+    import httpx
+    from admission import configure_threadpool
+    configure_threadpool(threads)
+
+    async def get(client, delay):
+        await asyncio.sleep(delay)
+        started = time.perf_counter()
+        response = await client.get("/work")
+        return response.status_code, time.perf_counter() - started
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        return await asyncio.gather(*(get(client, i / rate) for i in range(int(rate * seconds))))
+
+
+class TestAdmissionControl:
+    """Test cases for per-route limits and queue-depth load shedding"""
+
+    def test_parse_route_limits(self):
+        """Test limits parse from METHOD path=limit pairs and malformed ones are rejected"""
+        from admission import parse_route_limits
+        assert parse_route_limits("POST /api/auth/login=8, get /api/teachers/search=16") == {
+            ("POST", "/api/auth/login"): 8, ("GET", "/api/teachers/search"): 16,
+        }
+        assert parse_route_limits("") == {}
+        with pytest.raises(ValueError):
+            parse_route_limits("/api/auth/login=8")
+
+    def test_threadpool_size(self):
+        """Test the threadpool keeps anyio's 40 threads unless set, and "pool" sizes it to the pool"""
+        from admission import POOL_CAPACITY, parse_threadpool_size
+        assert parse_threadpool_size("") == 40
+        assert parse_threadpool_size("24") == 24
+        assert parse_threadpool_size("pool") == POOL_CAPACITY
+
+    def test_threadpool_larger_than_pool_warns(self, caplog):
+        """Test more threads than pooled connections is logged"""
+        from admission import POOL_CAPACITY, configure_threadpool
+
+        async def configure(size):
+            return configure_threadpool(size).total_tokens
+
+        with caplog.at_level("WARNING", logger="admission"):
+            assert asyncio.run(configure(POOL_CAPACITY)) == POOL_CAPACITY
+            assert not caplog.records
+            asyncio.run(configure(POOL_CAPACITY + 1))
+        assert "exceeds the connection pool" in caplog.text
+
+    def test_route_limit(self):
+        """Test a route past its concurrency limit gets a 503 with Retry-After, and recovers"""
+        release = threading.Event()
+        app = make_app(lambda: release.wait(5), route_limits={("GET", "/work"): 2}, max_queue=0, retry_after=3)
+
+        async def scenario():
+            import httpx
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                running = [asyncio.create_task(client.get("/work")) for _ in range(2)]
+                await asyncio.sleep(0.2)
+                shed = await client.get("/work")
+                release.set()
+                return shed, await asyncio.gather(*running), await client.get("/work")
+
+        from prometheus_client import REGISTRY
+        labels = {"route": "GET /work", "reason": "route_limit"}
+        rejected = REGISTRY.get_sample_value("admission_rejected_total", labels) or 0
+
+        shed, running, after = asyncio.run(scenario())
+
+        assert shed.status_code == 503
+        assert shed.headers["Retry-After"] == "3"
+        assert REGISTRY.get_sample_value("admission_rejected_total", labels) == rejected + 1
+        assert [response.status_code for response in running] == [200, 200]
+        assert after.status_code == 200
+
+    def test_queue_full(self):
+        """Test requests are shed once max_queue requests wait for a thread, except /metrics"""
+        release = threading.Event()
+        app = make_app(lambda: release.wait(5), route_limits={}, threads=2, max_queue=2)
+
+        async def scenario():
+            import httpx
+            from admission import configure_threadpool
+            configure_threadpool(2)
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                admitted = [asyncio.create_task(client.get("/work")) for _ in range(4)]
+                await asyncio.sleep(0.2)
+                shed, scrape = await client.get("/work"), asyncio.create_task(client.get("/metrics"))
+                release.set()
+                return shed, await asyncio.gather(*admitted), await scrape
+
+        shed, admitted, scrape = asyncio.run(scenario())
+
+        assert shed.status_code == 503
+        assert [response.status_code for response in admitted] == [200] * 4
+        assert scrape.status_code == 200
+
+    @pytest.mark.skipif(not ADMISSION_BENCHMARK, reason="ADMISSION_BENCHMARK is not set")
+    def test_admitted_latency_bounded_past_saturation(self):
+        """Benchmark twice the sustainable rate: shedding keeps admitted latency near the service time"""
+        from loadtest import percentile
+
+        def work():
+            time.sleep(0.02)
+
+        # 4 threads of 20 ms work serve 200 requests/s
+        unbounded = asyncio.run(offer(make_app(work, route_limits={}, threads=4, max_queue=0), 400, 2, threads=4))
+        shedding = asyncio.run(offer(make_app(work, route_limits={}, threads=4, max_queue=4), 400, 2, threads=4))
+
+        def admitted(results):
+            return sorted(seconds * 1000 for status, seconds in results if status == 200)
+
+        shed = sorted(seconds * 1000 for status, seconds in shedding if status == 503)
+        print(f"\n400 req/s for 2 s against 200 req/s of capacity:\n"
+              f"  no shedding: {len(admitted(unbounded))} ok, p50 {percentile(admitted(unbounded), 0.5):.0f} ms, "
+              f"p99 {percentile(admitted(unbounded), 0.99):.0f} ms\n"
+              f"  shedding:    {len(admitted(shedding))} ok, p50 {percentile(admitted(shedding), 0.5):.0f} ms, "
+              f"p99 {percentile(admitted(shedding), 0.99):.0f} ms; {len(shed)} shed, "
+              f"p99 {percentile(shed, 0.99):.0f} ms")
+        assert all(status == 200 for status, _ in unbounded)
+        assert percentile(admitted(unbounded), 0.99) > 500
+        assert len(shed) > 200
+        assert percentile(admitted(shedding), 0.99) < 150
+        assert percentile(shed, 0.99) < 50
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,143 @@
+import pytest
+from datetime import date, datetime, timedelta
+
+from tests.conftest import requires_database
+
+pytestmark = requires_database
+
+
+class TestDailyMetrics:
+    """Test cases for pre-aggregated daily analytics buckets"""
+
+    def setup_method(self):
+        from database import SessionLocal
+        self.db = SessionLocal()
+
+    def teardown_method(self):
+        self.db.close()
+
+    def live_count(self, table, day):
+        from sqlalchemy import text
+        return self.db.execute(
+            text(f"SELECT count(*) FROM {table} WHERE created_at >= :day AND created_at < :next"),
+            {"day": day, "next": day + timedelta(days=1)}
+        ).scalar()
+
+    def test_buckets_match_source_tables(self, client, create_user, admin):
+        """Test aggregated buckets equal the day's live counts and reruns are idempotent"""
+        import analytics
+
+        create_user("student", name="Signup")
+        analytics.aggregate_daily_metrics(self.db)
+        create_user("student", name="Late Signup")
+        analytics.aggregate_daily_metrics(self.db)
+        analytics.aggregate_daily_metrics(self.db)
+
+        today = datetime.utcnow().date()
+        response = client.get("/api/admin/timeseries", headers=admin,
+                              params={"metrics": "signups", "from": str(today), "to": str(today)})
+        assert response.status_code == 200
+        points = response.json()["series"]["signups"]
+        assert points == [{"period": str(today), "value": self.live_count("users", today)}]
+
+    def test_each_metric_resumes_from_its_own_latest_bucket(self, create_user):
+        """Test a metric whose latest bucket is old is rescanned alone, not every metric with it"""
+        import analytics
+        import models
+
+        create_user("student", name="Signup")
+        analytics.aggregate_daily_metrics(self.db)
+        old = date(1990, 1, 1)
+        self.db.query(models.DailyMetric).filter(models.DailyMetric.metric == "revenue").delete()
+        self.db.add_all([
+            models.DailyMetric(metric="revenue", day=old, value=1),
+            models.DailyMetric(metric="signups", day=old, value=1),
+        ])
+        self.db.commit()
+
+        try:
+            analytics.aggregate_daily_metrics(self.db)
+            buckets = dict(self.db.query(models.DailyMetric.metric, models.DailyMetric.value).filter(
+                models.DailyMetric.day == old
+            ).all())
+        finally:
+            self.db.query(models.DailyMetric).filter(models.DailyMetric.day == old).delete()
+            self.db.commit()
+
+        assert buckets == {"signups": 1}
+
+    def test_late_completed_payment_counts_on_completion_day(self, client, create_user):
+        """Test a payment created long before it completes is counted on the day it completes"""
+        import uuid
+        import analytics
+        import models
+        from payment import PaymentGateway
+
+        _, student = create_user("student", name="Student")
+        created = datetime.utcnow() - timedelta(days=10)
+        reference = f"T{uuid.uuid4().hex[:16]}"
+        self.db.add(models.Transaction(user_id=student["user_id"], amount=1234.5, created_at=created,
+                                       transaction_type=models.TransactionType.PAYMENT,
+                                       provider="jazzcash", provider_transaction_id=reference))
+        self.db.commit()
+        analytics.aggregate_daily_metrics(self.db)
+
+        callback = {"pp_TxnRefNo": reference, "pp_ResponseCode": "000", "pp_Amount": "123450"}
+        callback["pp_SecureHash"] = PaymentGateway("jazzcash").calculate_hash_jazzcash(callback)
+        assert client.post("/api/payment/jazzcash/callback", data=callback).json() == {"status": "completed"}
+        analytics.aggregate_daily_metrics(self.db)
+
+        buckets = dict(self.db.query(models.DailyMetric.day, models.DailyMetric.value).filter(
+            models.DailyMetric.metric == "revenue"
+        ).all())
+        today = datetime.utcnow().date()
+        assert buckets[today] == self.live_revenue(today)
+        assert buckets[today] >= 123450
+        assert buckets.get(created.date(), 0) == self.live_revenue(created.date())
+
+    def live_revenue(self, day):
+        from sqlalchemy import text
+        return self.db.execute(text("""
+            SELECT coalesce(round(sum(amount)::numeric * 100), 0) FROM transactions
+            WHERE status = 'COMPLETED' AND transaction_type = 'PAYMENT'
+              AND completed_at >= :day AND completed_at < :next
+        """), {"day": day, "next": day + timedelta(days=1)}).scalar()
+
+    def test_rollups_and_zero_fill(self, client, admin):
+        """Test weekly and monthly rollups sum the daily buckets and empty periods are zero"""
+        import models
+
+        self.db.query(models.DailyMetric).filter(
+            models.DailyMetric.metric == "revenue", models.DailyMetric.day < date(2001, 1, 1)
+        ).delete()
+        self.db.add_all([
+            models.DailyMetric(metric="revenue", day=date(2000, 1, 3), value=150000),
+            models.DailyMetric(metric="revenue", day=date(2000, 1, 5), value=50),
+            models.DailyMetric(metric="revenue", day=date(2000, 2, 1), value=100),
+        ])
+        self.db.commit()
+
+        window = {"metrics": "revenue", "from": "2000-01-01", "to": "2000-12-31"}
+        weekly = client.get("/api/admin/timeseries", headers=admin, params=dict(window, interval="week")).json()
+        monthly = client.get("/api/admin/timeseries", headers=admin, params=dict(window, interval="month")).json()
+        daily = client.get("/api/admin/timeseries", headers=admin, params=window).json()
+
+        assert weekly["series"]["revenue"][:2] == [
+            {"period": "1999-12-27", "value": 0}, {"period": "2000-01-03", "value": 1500.5}
+        ]
+        assert [p["value"] for p in monthly["series"]["revenue"][:3]] == [1500.5, 1, 0]
+        assert len(monthly["series"]["revenue"]) == 12
+        assert len(daily["series"]["revenue"]) == 366
+
+    def test_invalid_parameters(self, client, create_user, admin):
+        """Test unknown metrics, intervals and ranges return 400 and non-admins 403"""
+        student, _ = create_user("student", name="Student")
+
+        assert client.get("/api/admin/timeseries", headers=student).status_code == 403
+        for params in ({"metrics": "profit"}, {"interval": "hour"},
+                       {"from": "2020-01-01", "to": "2019-01-01"}, {"from": "2010-01-01", "to": "2020-01-01"}):
+            assert client.get("/api/admin/timeseries", headers=admin, params=params).status_code == 400
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,229 @@
+import pytest
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime, timedelta
+
+from tests.conftest import requires_database
+
+# Endpoint benchmarks, run in-process against TEST_DATABASE_URL seeded by
+# seed.py with BENCHMARK_SCALE users (1k, 100k, 1m, ...) and their profiles,
+# requests, sessions, payments, reviews, conversations and messages:
+#
+#   BENCHMARK_SCALE=100k pytest tests/test_benchmarks.py -s
+#
+# Results are written to BENCHMARK_OUTPUT as JSON. With BENCHMARK_BASELINE
+# pointing at an earlier result file, the run fails when an endpoint's p95
+# is more than BENCHMARK_MAX_REGRESSION (a fraction) slower than it was.
+BENCHMARK_SCALE = os.getenv("BENCHMARK_SCALE")
+BENCHMARK_SEED = int(os.getenv("BENCHMARK_SEED", 0))
+BENCHMARK_ITERATIONS = int(os.getenv("BENCHMARK_ITERATIONS", 200))
+BENCHMARK_OUTPUT = os.getenv("BENCHMARK_OUTPUT")
+BENCHMARK_BASELINE = os.getenv("BENCHMARK_BASELINE")
+BENCHMARK_MAX_REGRESSION = float(os.getenv("BENCHMARK_MAX_REGRESSION", 0.2))
+# p95 changes smaller than this are timer noise, not regressions
+BENCHMARK_MIN_REGRESSION_MS = float(os.getenv("BENCHMARK_MIN_REGRESSION_MS", 1.0))
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def parse_scale(scale: str) -> int:
+    """Number of users for a scale like 1000, 1k, 100k or 1m"""
+    scale = scale.strip().lower()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(scale[-1:], 1)
+    return int(float(scale.rstrip("km")) * multiplier)
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    return sorted_values[max(math.ceil(fraction * len(sorted_values)), 1) - 1]
+
+
+def summarize(latencies_ms) -> dict:
+    latencies_ms = sorted(latencies_ms)
+    return {
+        "n": len(latencies_ms),
+        "mean_ms": round(sum(latencies_ms) / len(latencies_ms), 3),
+        "p50_ms": round(percentile(latencies_ms, 0.50), 3),
+        "p95_ms": round(percentile(latencies_ms, 0.95), 3),
+        "p99_ms": round(percentile(latencies_ms, 0.99), 3),
+    }
+
+
+def regressions(baseline: dict, current: dict, max_regression: float = BENCHMARK_MAX_REGRESSION,
+                min_regression_ms: float = BENCHMARK_MIN_REGRESSION_MS) -> list:
+    """Endpoints whose p95 got slower than the baseline allows, as readable lines"""
+    slower = []
+    for name, result in current["endpoints"].items():
+        before = baseline["endpoints"].get(name)
+        if before is None:
+            continue
+        allowed = max(before["p95_ms"] * (1 + max_regression), before["p95_ms"] + min_regression_ms)
+        if result["p95_ms"] > allowed:
+            slower.append(f"{name}: p95 {before['p95_ms']:.2f} ms -> {result['p95_ms']:.2f} ms "
+                          f"(+{(result['p95_ms'] / before['p95_ms'] - 1) * 100:.0f}%)")
+    return slower
+
+
+def seed_benchmark_data(users: int):
+    """Load this many users of synthetic data with seed.py, unless the database already holds them"""
+    from sqlalchemy import text
+    from database import get_engine
+    import seed
+
+    with get_engine().connect() as conn:
+        seeded = conn.execute(text("SELECT count(*) FROM users WHERE email LIKE :pattern"),
+                              {"pattern": f"%@{seed.SEED_EMAIL_DOMAIN}"}).scalar()
+    if seeded != users:
+        seed.seed_database(users, seed=BENCHMARK_SEED, truncate_first=True)
+
+
+class TestBenchmarkReport:
+    """Test cases for the benchmark statistics and regression check"""
+
+    def test_parse_scale(self):
+        """Test scales can be given with k and m suffixes"""
+        assert parse_scale("1000") == 1000
+        assert parse_scale("1k") == 1000
+        assert parse_scale("100K") == 100_000
+        assert parse_scale("1m") == 1_000_000
+
+    def test_summarize_percentiles(self):
+        """Test percentiles use the nearest rank"""
+        result = summarize([float(ms) for ms in range(100, 0, -1)])
+
+        assert result["n"] == 100
+        assert result["p50_ms"] == 50
+        assert result["p95_ms"] == 95
+        assert result["p99_ms"] == 99
+        assert result["mean_ms"] == 50.5
+
+    def test_regressions_past_threshold(self):
+        """Test only p95 increases past both the ratio and the noise floor count"""
+        baseline = {"endpoints": {"search": {"p95_ms": 10.0}, "feed": {"p95_ms": 2.0}, "me": {"p95_ms": 1.0}}}
+        current = {"endpoints": {
+            "search": {"p95_ms": 13.0},
+            "feed": {"p95_ms": 2.8},
+            "me": {"p95_ms": 1.1},
+            "new": {"p95_ms": 50.0},
+        }}
+
+        slower = regressions(baseline, current, max_regression=0.2, min_regression_ms=1.0)
+
+        assert slower == ["search: p95 10.00 ms -> 13.00 ms (+30%)"]
+
+
+@requires_database
+@pytest.mark.skipif(not BENCHMARK_SCALE, reason="BENCHMARK_SCALE is not set")
+class TestEndpointBenchmarks:
+    """Benchmarks of the endpoints the frontend calls most, on a seeded database"""
+
+    @pytest.fixture
+    def actors(self, client, create_user):
+        """A student and a teacher with a conversation, plus the most reviewed seeded teacher"""
+        import seed
+        seed_benchmark_data(parse_scale(BENCHMARK_SCALE))
+        student, _ = create_user("student", name="Bench Actor Student")
+        teacher_headers, teacher = create_user(
+            "teacher", name="Bench Actor Teacher", hourly_rate=1000, subjects_taught=["Math"]
+        )
+        first = client.post("/api/messages", headers=student,
+                            json={"receiver_id": teacher["user_id"], "content": "Hi"}).json()
+        conversation_id, student_user_id = first["conversation_id"], first["sender_id"]
+        for i in range(1, 20):
+            if i % 2:
+                client.post("/api/messages", headers=teacher_headers, json={"receiver_id": student_user_id, "content": f"Hi {i}"})
+            else:
+                client.post("/api/messages", headers=student, json={"receiver_id": teacher["user_id"], "content": f"Hi {i}"})
+
+        return {
+            "student": student, "teacher": teacher, "teacher_headers": teacher_headers,
+            "conversation_id": conversation_id,
+            # Bookings follow a power law over the seeded teachers, so the first has the most reviews
+            "reviewed_teacher": seed.teacher_profile_id(BENCHMARK_SEED, 0),
+        }
+
+    def measure(self, call, iterations=BENCHMARK_ITERATIONS, warmup=10):
+        """Latencies in ms of calling call(i) iterations times, after a warmup"""
+        for i in range(warmup):
+            call(-1 - i)
+        latencies = []
+        for i in range(iterations):
+            start = time.perf_counter()
+            response = call(i)
+            latencies.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, response.text
+        return summarize(latencies)
+
+    def test_endpoints(self, client, actors):
+        """Benchmark each endpoint, write the results and compare them with the baseline"""
+        from sqlalchemy import text
+        from database import get_engine
+
+        student, teacher_headers = actors["student"], actors["teacher_headers"]
+        teacher_id = actors["teacher"]["id"]
+        first_day = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=30)
+        booked = []
+
+        def book(i):
+            # Warmup calls (negative i) book days before the measured ones, never the same slot twice
+            day = first_day + timedelta(days=i + 20)
+            response = client.post("/api/sessions/book", headers=student, json={
+                "teacher_id": teacher_id, "subject": "Math", "scheduled_date": day.isoformat(),
+                "scheduled_time": "10:00", "duration": 1,
+            })
+            booked.append(response.json()["id"])
+            return response
+
+        endpoints = {
+            "search": lambda i: client.get("/api/teachers/search?subject=Math"),
+            "feed": lambda i: client.get("/api/requests", headers=teacher_headers),
+            "conversations": lambda i: client.get("/api/conversations", headers=student),
+            "messages": lambda i: client.get(
+                f"/api/conversations/{actors['conversation_id']}/messages", headers=student
+            ),
+            "auth_me": lambda i: client.get("/api/auth/me", headers=student),
+            "teacher_reviews": lambda i: client.get(f"/api/reviews/teacher/{actors['reviewed_teacher']}"),
+            "book_session": book,
+        }
+        results = {name: self.measure(call) for name, call in endpoints.items()}
+
+        # Review the sessions just booked, once each
+        with get_engine().begin() as conn:
+            conn.execute(text("UPDATE sessions SET status = 'COMPLETED' WHERE id = ANY(CAST(:ids AS uuid[]))"),
+                         {"ids": booked})
+        to_review = iter(booked)
+        results["create_review"] = self.measure(lambda i: client.post("/api/reviews", headers=student, json={
+            "session_id": next(to_review), "rating": 5, "review_text": "Clear explanations",
+        }))
+
+        report = {
+            "scale": BENCHMARK_SCALE,
+            "users": parse_scale(BENCHMARK_SCALE),
+            "iterations": BENCHMARK_ITERATIONS,
+            "created_at": datetime.utcnow().isoformat(),
+            "commit": subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                                     capture_output=True, text=True).stdout.strip(),
+            "python": platform.python_version(),
+            "endpoints": results,
+        }
+        output = BENCHMARK_OUTPUT or os.path.join(BACKEND_DIR, "benchmark-results", f"{BENCHMARK_SCALE}.json")
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+
+        print(f"\n{BENCHMARK_SCALE} users, {BENCHMARK_ITERATIONS} iterations, written to {output}")
+        print(f"{'endpoint':<16} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for name, result in results.items():
+            print(f"{name:<16} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f}")
+
+        if BENCHMARK_BASELINE:
+            with open(BENCHMARK_BASELINE) as f:
+                slower = regressions(json.load(f), report)
+            assert not slower, "p95 regressions against the baseline:\n  " + "\n  ".join(slower)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,56 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+
+from tests.conftest import requires_database
+
+pytestmark = requires_database
+
+
+class TestBookingConflicts:
+    """Test cases for database-level booking conflict prevention"""
+
+    def test_parallel_bookings_for_one_slot(self, client, create_user):
+        """Test 100 parallel bookings of the same slot produce exactly one session"""
+        _, teacher = create_user("teacher", name="Teacher", hourly_rate=1000,
+                                 subjects_taught=["Math"])
+        students = [create_user("student", name=f"Student {i}")[0] for i in range(10)]
+        booking = {
+            "teacher_id": teacher["id"],
+            "subject": "Math",
+            "scheduled_date": "2031-03-03T00:00:00",
+            "scheduled_time": "10:00",
+            "duration": 1,
+        }
+
+        def book(i):
+            return client.post("/api/sessions/book", json=booking, headers=students[i % len(students)])
+
+        with ThreadPoolExecutor(max_workers=20) as pool:
+            codes = [r.status_code for r in pool.map(book, range(100))]
+
+        assert codes.count(200) == 1
+        assert codes.count(409) == 99
+
+    def test_overlapping_booking_is_rejected(self, client, create_user):
+        """Test a booking that partly overlaps an existing one returns 409"""
+        _, teacher = create_user("teacher", name="Teacher", hourly_rate=1000,
+                                 subjects_taught=["Math"])
+        student, _ = create_user("student", name="Student")
+        booking = {
+            "teacher_id": teacher["id"],
+            "subject": "Math",
+            "scheduled_date": "2031-03-04T00:00:00",
+            "scheduled_time": "10:00",
+            "duration": 2,
+        }
+
+        assert client.post("/api/sessions/book", json=booking, headers=student).status_code == 200
+
+        overlapping = dict(booking, scheduled_time="11:30", duration=1)
+        adjacent = dict(booking, scheduled_time="12:00", duration=1)
+        assert client.post("/api/sessions/book", json=overlapping, headers=student).status_code == 409
+        assert client.post("/api/sessions/book", json=adjacent, headers=student).status_code == 200
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,82 @@
+import pytest
+import csv
+import io
+import json
+import os
+import time
+import tracemalloc
+
+from tests.conftest import requires_database
+
+pytestmark = requires_database
+
+# Rows inserted for the export benchmark; set EXPORT_BENCHMARK_ROWS=1000000 for the full run
+BENCHMARK_ROWS = int(os.getenv("EXPORT_BENCHMARK_ROWS", "50000"))
+
+
+class TestExports:
+    """Test cases for streaming CSV and NDJSON exports"""
+
+    def test_users_export_formats(self, client, create_user, admin):
+        """Test the user export streams CSV and NDJSON with profile names"""
+        _, teacher = create_user("teacher", name="Export Teacher", hourly_rate=1000, subjects_taught=["Math"])
+
+        response = client.get("/api/admin/users/export", params={"role": "teacher"}, headers=admin)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert "Export Teacher" in {row["profile_name"] for row in rows}
+        assert {row["role"] for row in rows} == {"teacher"}
+
+        response = client.get("/api/admin/users/export", params={"format": "ndjson"}, headers=admin)
+        records = [json.loads(line) for line in response.text.splitlines()]
+        assert any(r["profile_name"] == "Export Teacher" for r in records)
+
+    def test_exports_require_admin(self, client, create_user, admin):
+        """Test non-admins are rejected and bad parameters return 400"""
+        student, _ = create_user("student", name="Student")
+
+        assert client.get("/api/admin/transactions/export", headers=student).status_code == 403
+        assert client.get("/api/admin/users/export", params={"format": "xml"}, headers=admin).status_code == 400
+        assert client.get("/api/admin/users/export", params={"role": "owner"}, headers=admin).status_code == 400
+
+    def test_transaction_export_memory_is_constant(self, client, create_user, admin):
+        """Test exporting many transactions keeps peak memory bounded by the batch size"""
+        from database import SessionLocal, engine
+        from sqlalchemy import text
+        import exports
+        import models
+
+        headers, _ = create_user("student", name="Payer")
+        wallet_id = client.get("/api/wallet", headers=headers).json()["id"]
+        with engine.begin() as conn:
+            conn.execute(text("""
+                INSERT INTO transactions (id, wallet_id, user_id, amount, transaction_type, status,
+                                          provider, description, created_at, updated_at)
+                SELECT gen_random_uuid(), w.id, w.user_id, (i % 5000) + 0.5, 'DEPOSIT', 'COMPLETED',
+                       'jazzcash', 'Benchmark ' || i, now() - make_interval(secs => i), now()
+                FROM wallets w, generate_series(1, :rows) AS i
+                WHERE w.id = :wallet_id
+            """), {"rows": BENCHMARK_ROWS, "wallet_id": wallet_id})
+
+        query = exports.transactions_query(status=models.PaymentStatus.COMPLETED,
+                                           transaction_type=models.TransactionType.DEPOSIT)
+        try:
+            tracemalloc.start()
+            began = time.perf_counter()
+            lines = sum(chunk.count("\n") for chunk in exports.stream_export(SessionLocal, query, "csv"))
+            elapsed = time.perf_counter() - began
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+            with engine.begin() as conn:
+                conn.execute(text("DELETE FROM transactions WHERE wallet_id = :wallet_id"), {"wallet_id": wallet_id})
+
+        print(f"\nExported {BENCHMARK_ROWS} rows in {elapsed:.2f}s "
+              f"({BENCHMARK_ROWS / elapsed:.0f} rows/s), peak {peak / 2**20:.1f} MiB")
+        assert lines >= BENCHMARK_ROWS + 1
+        assert peak < 32 * 2**20
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
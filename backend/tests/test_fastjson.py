@@ -0,0 +1,144 @@
+import pytest
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from tests.conftest import requires_database
+
+# Requests per measurement of the per-page CPU benchmark, and the speedup of the
+# fast path below which it fails (0 only reports it)
+FAST_JSON_BENCHMARK_ITERATIONS = int(os.getenv("FAST_JSON_BENCHMARK_ITERATIONS", 50))
+FAST_JSON_MIN_SPEEDUP = float(os.getenv("FAST_JSON_MIN_SPEEDUP", 0))
+
+
+class TestRowSerializers:
+    """Test cases for building list responses from column tuples"""
+
+    def test_teacher_row_matches_schema(self):
+        """Test a teacher row renders exactly as TeacherProfileResponse would"""
+        import fastjson
+        import schemas
+        values = {
+            "name": "Ayesha", "bio": None, "hourly_rate": 1500.0, "subjects_taught": ["Math"],
+            "experience_years": 4, "certifications": {"BSc": "LUMS"}, "avatar_url": None,
+            "preferred_formats": ["online"], "phone_number": None, "city": "Lahore", "languages": ["Urdu"],
+            "availability": {"monday": ["09:00"]}, "id": uuid.uuid4(), "user_id": uuid.uuid4(),
+            "average_rating": 4.5, "total_reviews": 2, "total_sessions": None, "is_verified": True,
+        }
+        row = tuple(values[name] for name in fastjson.TEACHER_FIELDS) + (0, None, 0, 1, 1)
+
+        rendered = json.loads(fastjson.teacher_list([row]).body)
+
+        expected = schemas.TeacherProfileResponse(
+            **values, rating_histogram={"1": 0, "2": 0, "3": 0, "4": 1, "5": 1}
+        ).model_dump(mode="json")
+        assert rendered == [expected]
+
+    def test_request_row_matches_schema(self):
+        """Test enums and datetimes render the way pydantic renders them"""
+        import fastjson
+        import models
+        import schemas
+        values = {
+            "subject": "Physics", "topic": "Optics", "description": None, "preferred_format": "online",
+            "urgency_level": None, "hourly_rate": 800.0, "duration": None, "id": uuid.uuid4(),
+            "student_id": uuid.uuid4(), "status": models.RequestStatus.ACTIVE,
+            "created_at": datetime(2026, 10, 1, 9, 30, 0, 250), "student_name": "Bilal", "student_grade": None,
+        }
+        row = tuple(values[name] for name in fastjson.REQUEST_FIELDS)
+
+        rendered = json.loads(fastjson.request_list([row]).body)
+
+        assert rendered == [schemas.RequestResponse(**values).model_dump(mode="json")]
+        assert rendered[0]["status"] == "active"
+
+
+@requires_database
+class TestFastJSONEndpoints:
+    """Test cases and CPU benchmark for the fast list path on search, feed and messages"""
+
+    @pytest.fixture
+    def pages(self, client, create_user):
+        """Requests for full 100-row pages of search, feed and messages"""
+        import models
+        import stats
+        from database import SessionLocal
+
+        subject = f"Subject-{uuid.uuid4().hex[:8]}"
+        student_headers, student = create_user("student", name="Fast JSON Student", grade_level="A-Level")
+        teacher_headers, teacher = create_user("teacher", name="Fast JSON Teacher", hourly_rate=900,
+                                               subjects_taught=[subject])
+        student_user_id = client.get("/api/auth/me", headers=student_headers).json()["id"]
+        first = client.post("/api/messages", headers=student_headers,
+                            json={"receiver_id": teacher["user_id"], "content": "Hello"}).json()
+
+        now = datetime.utcnow()
+        db = SessionLocal()
+        try:
+            for i in range(100):
+                user = models.User(email=f"fastjson-{uuid.uuid4().hex[:12]}@example.com", password_hash="x",
+                                   role=models.UserRole.TEACHER)
+                db.add(user)
+                db.flush()
+                stats.user_created(db, user.role)
+                db.add(models.TeacherProfile(
+                    user_id=user.id, name=f"Teacher {i}", hourly_rate=500 + i, subjects_taught=[subject, "Math"],
+                    experience_years=i % 10, languages=["English", "Urdu"], preferred_formats=["online"],
+                    city="Karachi", availability={"monday": ["09:00", "10:00"]}, average_rating=5.0 if i else 0.0,
+                    total_reviews=i, rating_sum=5 * i, rating_count_5=i,
+                ))
+                db.add(models.Request(student_id=student_user_id, subject=subject, topic=f"Topic {i}",
+                                      description="Need help before the exam", hourly_rate=1000,
+                                      created_at=now - timedelta(days=1, seconds=i)))
+                db.add(models.Message(conversation_id=first["conversation_id"], sender_id=student_user_id,
+                                      receiver_id=teacher["user_id"], content=f"Message {i}",
+                                      created_at=now + timedelta(seconds=i)))
+            db.commit()
+        finally:
+            db.close()
+
+        return {
+            "search": lambda: client.get("/api/teachers/search", params={"subject": subject, "per_page": 100}),
+            "feed": lambda: client.get("/api/requests", params={"per_page": 100}, headers=teacher_headers),
+            "messages": lambda: client.get(f"/api/conversations/{first['conversation_id']}/messages",
+                                           params={"per_page": 100}, headers=student_headers),
+        }
+
+    def test_same_json_both_ways(self, pages, monkeypatch):
+        """Test the fast path returns the same full pages as the model path"""
+        import fastjson
+        for name, get in pages.items():
+            monkeypatch.setattr(fastjson, "FAST_JSON_LISTS", False)
+            before = get()
+            monkeypatch.setattr(fastjson, "FAST_JSON_LISTS", True)
+            after = get()
+
+            assert before.status_code == after.status_code == 200, name
+            assert len(after.json()) == 100, name
+            assert after.json() == before.json(), name
+
+    def test_cpu_per_page(self, pages, monkeypatch):
+        """Benchmark the CPU spent in this process per 100-row page, before and after"""
+        import fastjson
+        results = {}
+        for name, get in pages.items():
+            for fast in (False, True):
+                monkeypatch.setattr(fastjson, "FAST_JSON_LISTS", fast)
+                get()
+                started = time.process_time()
+                for _ in range(FAST_JSON_BENCHMARK_ITERATIONS):
+                    get()
+                results[name, fast] = (time.process_time() - started) / FAST_JSON_BENCHMARK_ITERATIONS * 1000
+
+        speedups = {name: results[name, False] / max(results[name, True], 1e-9) for name in pages}
+        print(f"\n{'endpoint':<10} {'models ms':>10} {'fast ms':>10} {'speedup':>8}")
+        for name in pages:
+            print(f"{name:<10} {results[name, False]:>10.2f} {results[name, True]:>10.2f} {speedups[name]:>7.1f}x")
+        for name in pages:
+            assert speedups[name] >= FAST_JSON_MIN_SPEEDUP, name
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,79 @@
+import pytest
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from tests.conftest import TEST_DATABASE_URL, requires_database
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestLoadTestReport:
+    """Test cases for the load-test statistics and options"""
+
+    def test_report_per_step(self):
+        """Test each step gets its percentiles and failures are broken down by cause"""
+        from loadtest import Recorder
+        recorder = Recorder()
+        for ms in range(100, 0, -1):
+            recorder.record("search", ms / 1000)
+        recorder.record("search", 30, "ReadTimeout")
+        recorder.record("book", 0.2, "HTTP 409")
+        recorder.record("book", 0.2, "HTTP 409")
+
+        report = recorder.report()
+
+        assert report["steps"]["search"] == {"ok": 100, "errors": 1, "p50_ms": 50, "p95_ms": 95, "p99_ms": 99}
+        assert report["steps"]["book"] == {"ok": 0, "errors": 2}
+        assert report["errors"] == {"book: HTTP 409": 2, "search: ReadTimeout": 1}
+
+    def test_parse_mix(self):
+        """Test journey weights parse and unknown journeys are rejected"""
+        from loadtest import parse_mix
+        assert parse_mix("student=0.8,teacher=0.2") == {"student": 0.8, "teacher": 0.2}
+        assert parse_mix("teacher") == {"teacher": 1.0}
+        with pytest.raises(ValueError):
+            parse_mix("admin=1")
+
+
+@requires_database
+class TestLoadTestRun:
+    """Test cases for running the journeys against a live server"""
+
+    @pytest.fixture
+    def server(self, client):
+        """A uvicorn server on TEST_DATABASE_URL whose payment providers refuse connections"""
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        env = dict(os.environ, DATABASE_URL=TEST_DATABASE_URL,
+                   JAZZCASH_API_URL="http://127.0.0.1:9", EASYPAISA_API_URL="http://127.0.0.1:9")
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=env,
+        )
+        try:
+            for _ in range(100):
+                try:
+                    socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            yield f"http://127.0.0.1:{port}"
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+
+    def test_journeys_complete(self, server):
+        """Test a short mixed run books, pays for and reviews sessions without errors"""
+        import asyncio
+        from loadtest import run
+
+        report = asyncio.run(run(server, users=4, duration=3, mix={"student": 0.5, "teacher": 0.5},
+                                 think_time=0.05, seed=1))
+
+        assert report["errors"] == {}
+        for step in ("signup", "search", "book", "pay_confirm", "complete_session", "review", "feed", "ws_round_trip"):
+            assert report["steps"][step]["ok"] > 0, step
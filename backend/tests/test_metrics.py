@@ -0,0 +1,149 @@
+import pytest
+import asyncio
+import os
+import time
+
+from prometheus_client import REGISTRY
+
+from tests.conftest import requires_database
+
+# Allowed cost of MetricsMiddleware per request, in microseconds; timing depends on the
+# machine, so the overhead benchmark only runs when a budget is given (e.g. 5)
+METRICS_OVERHEAD_BUDGET_US = float(os.getenv("METRICS_OVERHEAD_BUDGET_US", 0))
+
+
+def sample(name, labels=None):
+    return REGISTRY.get_sample_value(name, labels or {}) or 0
+
+
+class TestRouteMetrics:
+    """Test cases for the per-route latency and status metrics"""
+
+    @pytest.fixture
+    def app_client(self):
+        from fastapi import FastAPI, HTTPException
+        from fastapi.testclient import TestClient
+        import metrics
+
+        app = FastAPI()
+        app.add_middleware(metrics.MetricsMiddleware)
+
+        @app.get("/items/{item_id}")
+        def get_item(item_id: int):
+            if item_id == 0:
+                raise HTTPException(status_code=404, detail="Item not found")
+            return {"id": item_id}
+
+        return TestClient(app)
+
+    def test_latency_recorded_per_route_template(self, app_client):
+        """Test requests to different ids share the route template label"""
+        labels = {"method": "GET", "route": "/items/{item_id}", "status": "200"}
+        before = sample("http_request_seconds_count", labels)
+
+        app_client.get("/items/1")
+        app_client.get("/items/2")
+
+        assert sample("http_request_seconds_count", labels) == before + 2
+        assert sample("http_request_seconds_sum", labels) > 0
+        assert sample("http_request_seconds_bucket", dict(labels, le="+Inf")) == before + 2
+        assert sample("http_request_seconds_bucket", dict(labels, le="10.0")) == before + 2
+
+    def test_responses_counted_by_status(self, app_client):
+        """Test error responses and unmatched paths are counted with their status"""
+        not_found = {"method": "GET", "route": "/items/{item_id}", "status": "404"}
+        unmatched = {"method": "GET", "route": "unmatched", "status": "404"}
+        before = sample("http_request_seconds_count", not_found), sample("http_request_seconds_count", unmatched)
+
+        app_client.get("/items/0")
+        app_client.get("/no/such/path")
+
+        assert sample("http_request_seconds_count", not_found) == before[0] + 1
+        assert sample("http_request_seconds_count", unmatched) == before[1] + 1
+
+    @pytest.mark.skipif(not METRICS_OVERHEAD_BUDGET_US, reason="METRICS_OVERHEAD_BUDGET_US is not set")
+    def test_middleware_overhead(self):
+        """Test the middleware adds less than the budget to each request"""
+        from fastapi import FastAPI
+        import metrics
+
+        app = FastAPI()
+
+        @app.get("/bench")
+        def bench():
+            return {}
+
+        async def endpoint_app(scope, receive, send):
+            scope["endpoint"] = bench
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        async def send(message):
+            pass
+
+        async def run(asgi_app, requests):
+            started = time.perf_counter()
+            for _ in range(requests):
+                await asgi_app({"type": "http", "method": "GET", "path": "/bench", "app": app}, None, send)
+            return time.perf_counter() - started
+
+        async def best_of(asgi_app, rounds=5, requests=20000):
+            return min([await run(asgi_app, requests) for _ in range(rounds)]) / requests
+
+        bare = asyncio.run(best_of(endpoint_app))
+        measured = asyncio.run(best_of(metrics.MetricsMiddleware(endpoint_app)))
+        overhead_us = (measured - bare) * 1e6
+        print(f"\nMetricsMiddleware overhead: {overhead_us:.2f} us per request")
+
+        assert overhead_us < METRICS_OVERHEAD_BUDGET_US
+
+
+class TestRuntimeGauges:
+    """Test cases for the WebSocket and payment provider metrics"""
+
+    def test_websocket_gauges_follow_connection_manager(self, monkeypatch):
+        """Test the gauges read the connection manager's live state"""
+        from websocket import manager
+
+        monkeypatch.setattr(manager, "active_connections", {"a": object(), "b": object()})
+        monkeypatch.setattr(manager, "online_users", {"a", "b"})
+        monkeypatch.setattr(manager, "typing_users", {"conversation": {"a"}})
+
+        assert sample("ws_connections") == 2
+        assert sample("ws_online_users") == 2
+        assert sample("ws_typing_users") == 1
+
+    def test_payment_provider_latency_recorded(self, monkeypatch):
+        """Test provider calls are timed, including ones that fail to connect"""
+        from payment import PaymentGateway
+
+        monkeypatch.setenv("EASYPAISA_API_URL", "http://127.0.0.1:9")
+        labels = {"provider": "easypaisa", "outcome": "error"}
+        before = sample("payment_provider_request_seconds_count", labels)
+
+        result = PaymentGateway("easypaisa").initiate_payment_easypaisa(
+            amount=500, customer_email="student@example.com", customer_mobile="03001234567", description="Session"
+        )
+
+        assert result["status"] == "failed"
+        assert sample("payment_provider_request_seconds_count", labels) == before + 1
+
+
+@requires_database
+class TestMetricsEndpoint:
+    """Test cases for the app's /metrics endpoint"""
+
+    def test_app_requests_exported(self, client, create_user):
+        """Test API requests show up in /metrics under their route template"""
+        headers, _ = create_user("student", name="Student")
+        client.get("/api/wallet", headers=headers)
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert 'http_request_seconds_count{method="GET",route="/api/wallet",status="200"}' in response.text
+        assert "ws_connections" in response.text
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
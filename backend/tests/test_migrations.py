@@ -0,0 +1,134 @@
+import pytest
+import os
+import subprocess
+import sys
+import uuid
+
+from tests.conftest import requires_database, TEST_DATABASE_URL
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestStartup:
+    """Test cases for starting the app without touching the database"""
+
+    def test_import_does_no_database_io(self):
+        """Test the app imports and builds its routes with an unreachable database"""
+        env = dict(os.environ, DATABASE_URL="postgresql://nobody@127.0.0.1:1/unreachable",
+                   SECRET_KEY="test-secret", ALGORITHM="HS256")
+        result = subprocess.run(
+            [sys.executable, "-c", "import main, database; main.app.openapi(); assert database._engine is None"],
+            cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=60
+        )
+        assert result.returncode == 0, result.stderr
+
+
+@requires_database
+class TestMigrations:
+    """Test cases for upgrading a pre-migration database"""
+
+    SCHEMA = "migration_test"
+
+    def setup_method(self):
+        from sqlalchemy import create_engine, text
+        self.engine = create_engine(TEST_DATABASE_URL)
+        with self.engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {self.SCHEMA} CASCADE"))
+            conn.execute(text(f"CREATE SCHEMA {self.SCHEMA}"))
+
+    def teardown_method(self):
+        from sqlalchemy import text
+        with self.engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {self.SCHEMA} CASCADE"))
+        self.engine.dispose()
+
+    def migrate(self, monkeypatch, revision, downgrade=False):
+        from alembic import command
+        from alembic.config import Config
+        separator = "&" if "?" in TEST_DATABASE_URL else "?"
+        monkeypatch.setenv("DATABASE_URL", f"{TEST_DATABASE_URL}{separator}options=-csearch_path%3D{self.SCHEMA}")
+        config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+        (command.downgrade if downgrade else command.upgrade)(config, revision)
+
+    def execute(self, sql, **params):
+        from sqlalchemy import text
+        with self.engine.begin() as conn:
+            conn.execute(text(f"SET LOCAL search_path TO {self.SCHEMA}"))
+            result = conn.execute(text(sql), params)
+            return result.all() if result.returns_rows else None
+
+    def test_upgrade_backfills_existing_data(self, monkeypatch):
+        """Test upgrading from the create_all schema carries balances, ratings and counters over"""
+        self.migrate(monkeypatch, "0001")
+        self.upgrade_with_data(monkeypatch)
+
+    def test_upgrade_after_create_all_added_new_tables(self, monkeypatch):
+        """Test upgrading a database whose app already created the new tables, but no new columns"""
+        import models
+        from sqlalchemy import text
+        self.migrate(monkeypatch, "0001")
+        # What starting the app did before migrations existed: create_all adds missing tables only
+        with self.engine.begin() as conn:
+            conn.execute(text(f"SET LOCAL search_path TO {self.SCHEMA}"))
+            models.Base.metadata.create_all(conn, tables=[
+                models.ReviewVote.__table__, models.LedgerEntry.__table__,
+                models.AdminStat.__table__, models.DailyMetric.__table__,
+            ])
+            conn.execute(text("INSERT INTO admin_stats VALUES (3, 1, 1, 0, 0, 0, 0, 0)"))
+
+        self.upgrade_with_data(monkeypatch)
+
+    def upgrade_with_data(self, monkeypatch):
+        """Insert data in the baseline schema, upgrade to head and check it was carried over"""
+        student, teacher = uuid.uuid4(), uuid.uuid4()
+        teacher_profile, student_profile = uuid.uuid4(), uuid.uuid4()
+        self.execute("""
+            INSERT INTO users (id, email, password_hash, role, created_at) VALUES
+                (:student, 's@example.com', 'x', 'STUDENT', now()), (:teacher, 't@example.com', 'x', 'TEACHER', now());
+            INSERT INTO wallets (id, user_id, balance) VALUES (gen_random_uuid(), :teacher, 150.5),
+                                                              (gen_random_uuid(), :student, 0);
+            INSERT INTO student_profiles (id, user_id, name) VALUES (:student_profile, :student, 'Student');
+            INSERT INTO teacher_profiles (id, user_id, name, hourly_rate, availability) VALUES
+                (:teacher_profile, :teacher, 'Teacher', 1000, '{"monday": ["09:00"]}');
+            INSERT INTO reviews (id, student_id, teacher_id, rating) VALUES
+                (gen_random_uuid(), :student_profile, :teacher_profile, 5),
+                (gen_random_uuid(), :student_profile, :teacher_profile, 3);
+            INSERT INTO verification_documents (id, teacher_id, document_type, document_url, status) VALUES
+                (gen_random_uuid(), :teacher_profile, 'degree', 'https://example.com/d', 'PENDING');
+            INSERT INTO transactions (id, user_id, amount, transaction_type, status, created_at, updated_at) VALUES
+                (gen_random_uuid(), :student, 2000.25, 'PAYMENT', 'COMPLETED', '2026-01-01', '2026-01-05');
+        """, student=student, teacher=teacher, student_profile=student_profile, teacher_profile=teacher_profile)
+
+        self.migrate(monkeypatch, "head")
+
+        assert self.execute("SELECT balance_paisa FROM wallets WHERE user_id = :teacher", teacher=teacher) == [(15050,)]
+        mismatched = self.execute("""
+            SELECT w.id FROM wallets w
+            LEFT JOIN (SELECT wallet_id, sum(amount_paisa) AS total FROM ledger_entries GROUP BY wallet_id) l
+                ON l.wallet_id = w.id
+            WHERE w.balance_paisa <> coalesce(l.total, 0)
+        """)
+        assert mismatched == []
+        assert self.execute("SELECT sum(amount_paisa) FROM ledger_entries") == [(0,)]
+
+        ratings = self.execute("""
+            SELECT total_reviews, rating_sum, rating_count_3, rating_count_5, average_rating,
+                   availability_mask IS NOT NULL
+            FROM teacher_profiles
+        """)
+        assert ratings == [(2, 8, 1, 1, 4.0, True)]
+
+        counters = self.execute("SELECT total_users, total_students, total_teachers, pending_verifications, "
+                                "total_revenue_paisa FROM admin_stats")
+        assert counters == [(2, 1, 1, 1, 200025)]
+
+        revenue = self.execute("SELECT completed_at::date::text, value FROM transactions "
+                               "JOIN daily_metrics ON metric = 'revenue' AND day = completed_at::date")
+        assert revenue == [("2026-01-05", 200025)]
+
+        self.migrate(monkeypatch, "base", downgrade=True)
+        assert self.execute("SELECT count(*) FROM pg_tables WHERE schemaname = :schema", schema=self.SCHEMA) == [(1,)]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,284 @@
+import pytest
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from tests.conftest import TEST_DATABASE_URL, requires_database
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Payments pushed through server and mock provider by the benchmark, and the
+# throughput below which it fails (0 only reports it)
+PAYMENT_BENCHMARK_TRANSACTIONS = int(os.getenv("PAYMENT_BENCHMARK_TRANSACTIONS", 300))
+PAYMENT_BENCHMARK_MIN_PER_MINUTE = float(os.getenv("PAYMENT_BENCHMARK_MIN_PER_MINUTE", 0))
+
+
+@contextmanager
+def serve(app):
+    """Serve an ASGI app on a free local port from a background thread, yielding its URL"""
+    import uvicorn
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{server.servers[0].sockets[0].getsockname()[1]}"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+
+def wait_for_callbacks(provider, timeout=30):
+    deadline = time.perf_counter() + timeout
+    while provider.tasks and time.perf_counter() < deadline:
+        time.sleep(0.02)
+    assert not provider.tasks, "callbacks still pending"
+
+
+@pytest.fixture
+def callbacks():
+    """A stand-in server that checks callback signatures, yielding (its URL, callbacks received)"""
+    from fastapi import FastAPI, Request
+    from payment import PaymentGateway
+
+    received = []
+    receiver = FastAPI()
+
+    @receiver.post("/api/payment/{provider}/callback")
+    async def callback(provider: str, request: Request):
+        data = dict(await request.form()) if provider == "jazzcash" else await request.json()
+        assert PaymentGateway(provider).verify_payment(data)
+        received.append((provider, data))
+        return {"status": "completed"}
+
+    with serve(receiver) as url:
+        yield url, received
+
+
+def gateway(provider, url):
+    from payment import PaymentGateway
+    gateway = PaymentGateway(provider)
+    gateway.base_url = url
+    return gateway
+
+
+def initiate(gateway, i):
+    initiate = gateway.initiate_payment_jazzcash if gateway.provider == "jazzcash" else gateway.initiate_payment_easypaisa
+    return initiate(amount=1000 + i, customer_email="student@example.com",
+                    customer_mobile="03001234567", description="Tutoring session")
+
+
+class TestMockProvider:
+    """Test cases for the mock JazzCash/Easypaisa provider"""
+
+    def test_payments_settled_with_signed_callbacks(self, callbacks, monkeypatch):
+        """Test both providers accept PaymentGateway's requests and call back with valid hashes"""
+        from mockprovider import MockProvider
+        callback_url, received = callbacks
+        monkeypatch.setenv("BACKEND_URL", callback_url)
+        provider = MockProvider(backend_url=callback_url)
+
+        with serve(provider) as url:
+            results = [initiate(gateway(name, url), i) for i in range(3) for name in ("jazzcash", "easypaisa")]
+            wait_for_callbacks(provider)
+
+        assert [result["status"] for result in results] == ["initiated"] * 6
+        assert all(result["payment_url"] for result in results)
+        assert sorted(data.get("pp_TxnRefNo") or data.get("orderRefNum") for _, data in received) == \
+            sorted(result["transaction_id"] for result in results)
+        assert {data.get("pp_ResponseCode") or data.get("responseCode") for _, data in received} == {"000", "00"}
+        assert set(provider.settled) == {result["transaction_id"] for result in results}
+
+    def test_bad_hash_rejected(self, callbacks):
+        """Test an initiate request whose hash does not match is refused without a callback"""
+        import requests
+        from mockprovider import MockProvider
+        callback_url, received = callbacks
+        provider = MockProvider(backend_url=callback_url)
+
+        with serve(provider) as url:
+            response = requests.post(f"{url}/CustomerPortal/transactionmanagement/merchantForm",
+                                     data={"pp_TxnRefNo": "T1", "pp_Amount": "100", "pp_SecureHash": "BAD"})
+            stats = requests.get(f"{url}/mock/stats").json()
+
+        assert response.status_code == 400
+        assert stats == {"rejected": 1, "pending_callbacks": 0}
+        assert received == []
+
+    def test_failures_duplicates_and_reordering(self, callbacks):
+        """Test injected errors, declines, duplicate and held-back callbacks all happen at their rates"""
+        from mockprovider import Behaviour, MockProvider
+        callback_url, received = callbacks
+        behaviour = Behaviour(callback_delay=0, error_rate=0.2, decline_rate=0.3, duplicate_rate=0.3,
+                              reorder_rate=0.3, reorder_delay=0.5, seed=3)
+        provider = MockProvider(behaviour, backend_url=callback_url)
+
+        with serve(provider) as url:
+            jazzcash = gateway("jazzcash", url)
+            results = [initiate(jazzcash, i) for i in range(60)]
+            wait_for_callbacks(provider)
+
+        stats = provider.stats
+        assert sum(result["status"] == "failed" for result in results) == stats["errors"] > 0
+        assert stats["initiated"] + stats["errors"] == 60
+        assert len(received) == stats["initiated"] + stats["duplicated"] == stats["callback_200"]
+        assert stats["duplicated"] > 0 and stats["reordered"] > 0
+        assert {data["pp_ResponseCode"] for _, data in received} == {"000", "999"}
+
+        initiated = [result["transaction_id"] for result in results if result["status"] == "initiated"]
+        delivered = list(dict.fromkeys(data["pp_TxnRefNo"] for _, data in received))
+        assert sorted(delivered) == sorted(initiated)
+        assert delivered != initiated
+
+    def test_callback_retried_until_transaction_exists(self):
+        """Test a callback answered with a 404, as when it beats the transaction's commit, is sent again"""
+        from fastapi import FastAPI, HTTPException
+        from mockprovider import Behaviour, MockProvider
+
+        answers = []
+        receiver = FastAPI()
+
+        @receiver.post("/api/payment/{provider}/callback")
+        async def callback(provider: str):
+            answers.append(404 if not answers else 200)
+            if answers[-1] == 404:
+                raise HTTPException(status_code=404, detail="Transaction not found")
+            return {"status": "completed"}
+
+        with serve(receiver) as callback_url:
+            provider = MockProvider(Behaviour(callback_delay=0, retry_delay=0.05), backend_url=callback_url)
+            with serve(provider) as url:
+                result = initiate(gateway("jazzcash", url), 0)
+                wait_for_callbacks(provider)
+
+        assert answers == [404, 200]
+        assert provider.stats["callback_retries"] == 1
+        assert provider.settled[result["transaction_id"]][0] == "completed"
+
+
+@requires_database
+class TestPaymentThroughput:
+    """Benchmark of initiate -> provider callback -> confirmation through the running server"""
+
+    @pytest.fixture
+    def sessions(self, client, create_user):
+        """A student's auth headers and PAYMENT_BENCHMARK_TRANSACTIONS of their unpaid sessions"""
+        import models
+        import stats
+        from database import SessionLocal
+
+        student_headers, student = create_user("student", name="Payment Bench Student")
+        _, teacher = create_user("teacher", name="Payment Bench Teacher", hourly_rate=1000, subjects_taught=["Math"])
+        start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=400)
+        db = SessionLocal()
+        try:
+            rows = [models.Session(
+                student_id=student["id"], teacher_id=teacher["id"], subject="Math",
+                scheduled_date=start + timedelta(days=i // 12), scheduled_time=f"{8 + i % 12:02d}:00",
+                duration=1, hourly_rate=1000, total_amount=1000,
+            ) for i in range(PAYMENT_BENCHMARK_TRANSACTIONS)]
+            db.add_all(rows)
+            stats.sessions_created(db, len(rows))
+            db.commit()
+            return student_headers, [str(row.id) for row in rows]
+        finally:
+            db.close()
+
+    @contextmanager
+    def server(self, provider_url):
+        """The app in a uvicorn subprocess on TEST_DATABASE_URL, paying through provider_url"""
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        url = f"http://127.0.0.1:{port}"
+        # Callback bursts need more than the default pool: a request checks out its
+        # connection in get_current_user and holds it while it waits for a thread
+        # to run the handler, so the pool must cover the threadpool's 40 threads.
+        # No route limits: this measures payment throughput, not admission control.
+        env = dict(os.environ, DATABASE_URL=TEST_DATABASE_URL, BACKEND_URL=url,
+                   JAZZCASH_API_URL=provider_url, EASYPAISA_API_URL=provider_url,
+                   DB_POOL_SIZE="40", DB_MAX_OVERFLOW="10", ROUTE_CONCURRENCY_LIMITS="")
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=env,
+        )
+        try:
+            for _ in range(100):
+                try:
+                    socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            yield url
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+
+    def test_payment_throughput(self, sessions):
+        """Test every session ends up paid exactly once despite duplicate and reordered callbacks"""
+        import asyncio
+        import httpx
+        from sqlalchemy import func
+        import models
+        from database import SessionLocal
+        from loadtest import percentile
+        from mockprovider import Behaviour, MockProvider
+
+        headers, session_ids = sessions
+        behaviour = Behaviour(latency=0.02, callback_delay=0.05, duplicate_rate=0.1,
+                              reorder_rate=0.1, reorder_delay=0.5, seed=1)
+        provider = MockProvider(behaviour)
+        started = {}
+
+        async def pay(client, queue):
+            while queue:
+                session_id = queue.pop()
+                began = time.perf_counter()
+                response = await client.post("/api/payment/initiate", headers=headers, json={
+                    "amount": 1000, "customer_email": "student@example.com", "customer_mobile": "03001234567",
+                    "description": "Tutoring session", "session_id": session_id,
+                    "provider": "jazzcash" if len(queue) % 2 else "easypaisa",
+                })
+                assert response.status_code == 200, response.text
+                assert response.json()["status"] == "initiated"
+                started[response.json()["transaction_id"]] = began
+
+        async def drive(url):
+            queue = list(session_ids)
+            async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+                await asyncio.gather(*(pay(client, queue) for _ in range(20)))
+
+        with serve(provider) as provider_url, self.server(provider_url) as url:
+            provider.backend_url = url
+            asyncio.run(drive(url))
+            wait_for_callbacks(provider, timeout=60)
+
+        assert set(provider.settled) == set(started), dict(provider.stats)
+        assert {status for status, _ in provider.settled.values()} == {"completed"}
+        latencies = sorted((provider.settled[txn][1] - began) * 1000 for txn, began in started.items())
+        elapsed = max(at for _, at in provider.settled.values()) - min(started.values())
+        per_minute = len(started) / elapsed * 60
+        print(f"\n{len(started)} payments in {elapsed:.1f}s ({per_minute:.0f}/min), initiate to confirmed "
+              f"p50 {percentile(latencies, 0.5):.0f} ms, p95 {percentile(latencies, 0.95):.0f} ms, "
+              f"p99 {percentile(latencies, 0.99):.0f} ms; {dict(provider.stats)}")
+
+        db = SessionLocal()
+        try:
+            paid = db.query(models.Session).filter(
+                models.Session.id.in_(session_ids),
+                models.Session.payment_status == models.PaymentStatus.COMPLETED
+            ).count()
+            notified = db.query(func.count(models.Notification.id)).filter(
+                models.Notification.type == models.NotificationType.PAYMENT_RECEIVED,
+                models.Notification.data["session_id"].as_string().in_(session_ids)
+            ).scalar()
+        finally:
+            db.close()
+        assert paid == notified == len(session_ids)
+        assert per_minute >= PAYMENT_BENCHMARK_MIN_PER_MINUTE
@@ -37,6 +37,13 @@ class TestJazzCashPayment:
         assert transaction_id.startswith('T')
         assert len(transaction_id) > 10
 
+    def test_transaction_ids_unique_within_a_second(self):
+        """Test IDs generated back to back differ and fit pp_TxnRefNo"""
+        transaction_ids = [self.gateway.generate_transaction_id() for _ in range(1000)]
+
+        assert len(set(transaction_ids)) == 1000
+        assert all(len(transaction_id) <= 20 for transaction_id in transaction_ids)
+
     def test_hash_calculation(self):
         """Test HMAC-SHA256 hash calculation for JazzCash"""
         data = {
@@ -0,0 +1,186 @@
+import pytest
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tests.conftest import requires_database, TEST_DATABASE_URL
+
+# Set to run the pool saturation benchmark, e.g. POOL_BENCHMARK_REQUESTS=400
+POOL_BENCHMARK_REQUESTS = int(os.getenv("POOL_BENCHMARK_REQUESTS", 0))
+
+POOL_BENCHMARK_CONCURRENCY = [1, 2, 4, 8, 16, 32, 64]
+
+
+def sample(name, labels=None):
+    from prometheus_client import REGISTRY
+    return REGISTRY.get_sample_value(name, labels or {}) or 0
+
+
+class TestPoolSettings:
+    """Test cases for configuring the connection pool"""
+
+    def test_pool_configured_from_environment(self, monkeypatch):
+        """Test pool size, overflow, timeout and recycle come from the environment"""
+        import database
+
+        monkeypatch.delenv("SERVERLESS", raising=False)
+        monkeypatch.setenv("DB_POOL_SIZE", "12")
+        monkeypatch.setenv("DB_MAX_OVERFLOW", "3")
+        monkeypatch.setenv("DB_POOL_TIMEOUT", "2.5")
+        monkeypatch.setenv("DB_POOL_RECYCLE", "1800")
+
+        engine = database.build_engine("postgresql://nobody@127.0.0.1:1/unreachable")
+
+        assert isinstance(engine.pool, database.InstrumentedQueuePool)
+        assert (engine.pool.size(), engine.pool._max_overflow) == (12, 3)
+        assert (engine.pool.timeout(), engine.pool._recycle) == (2.5, 1800)
+
+    def test_serverless_uses_null_pool(self, monkeypatch):
+        """Test serverless mode keeps no connections of its own"""
+        import database
+        from sqlalchemy.pool import NullPool
+
+        monkeypatch.setenv("SERVERLESS", "1")
+        engine = database.build_engine("postgresql://nobody@127.0.0.1:1/unreachable")
+
+        assert isinstance(engine.pool, NullPool)
+
+    def test_engine_created_once_under_concurrency(self, monkeypatch):
+        """Test threads racing for the first get_engine share one engine"""
+        import database
+
+        built = []
+
+        def slow_build_engine(url, **overrides):
+            time.sleep(0.05)
+            built.append(object())
+            return built[-1]
+
+        monkeypatch.setenv("SERVERLESS", "1")
+        monkeypatch.setenv("DATABASE_URL", "postgresql://nobody@127.0.0.1:1/unreachable")
+        monkeypatch.setattr(database, "_engine", None)
+        monkeypatch.setattr(database, "build_engine", slow_build_engine)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            engines = list(pool.map(lambda _: database.get_engine(), range(8)))
+
+        assert len(built) == 1
+        assert all(engine is built[0] for engine in engines)
+
+
+@requires_database
+class TestPoolTelemetry:
+    """Test cases for the connection pool metrics"""
+
+    def test_overflow_and_timeouts_are_counted(self, monkeypatch):
+        """Test checkouts beyond pool_size and checkouts that time out show up in the metrics"""
+        import database
+        from sqlalchemy import exc
+
+        monkeypatch.delenv("SERVERLESS", raising=False)
+        engine = database.build_engine(TEST_DATABASE_URL, pool_size=1, max_overflow=1, pool_timeout=0.2)
+        overflow = sample("db_pool_overflow_connections_total")
+        timeouts = sample("db_pool_checkout_timeouts_total")
+        waits = sample("db_pool_checkout_seconds_count")
+
+        first, second = engine.connect(), engine.connect()
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+        first.close()
+        second.close()
+        engine.dispose()
+
+        assert sample("db_pool_overflow_connections_total") == overflow + 1
+        assert sample("db_pool_checkout_timeouts_total") == timeouts + 1
+        assert sample("db_pool_checkout_seconds_count") == waits + 3
+        assert sample("db_pool_checkout_seconds_sum") >= 0.2
+
+    def test_overflow_counted_after_dispose(self, monkeypatch):
+        """Test the replacement pool dispose() installs still counts overflow connections"""
+        import database
+
+        monkeypatch.delenv("SERVERLESS", raising=False)
+        engine = database.build_engine(TEST_DATABASE_URL, pool_size=1, max_overflow=1)
+        engine.dispose()
+        overflow = sample("db_pool_overflow_connections_total")
+
+        first, second = engine.connect(), engine.connect()
+        first.close()
+        second.close()
+        engine.dispose()
+
+        assert sample("db_pool_overflow_connections_total") == overflow + 1
+
+    def test_metrics_endpoint_reports_pool(self, client, create_user):
+        """Test /metrics exposes the live pool state of the app's engine"""
+        create_user("student", name="Student")
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert "db_pool_checked_out" in response.text
+        assert "db_pool_size" in response.text
+        assert "db_pool_checkout_seconds_bucket" in response.text
+
+
+@requires_database
+@pytest.mark.skipif(not POOL_BENCHMARK_REQUESTS, reason="POOL_BENCHMARK_REQUESTS is not set")
+class TestPoolSaturation:
+    """Benchmark for the concurrency at which the pool becomes the bottleneck"""
+
+    def endpoint_mix(self, client, create_user):
+        """A read-heavy mix of the endpoints the frontend calls most"""
+        _, teacher = create_user("teacher", name="Teacher", hourly_rate=1000, subjects_taught=["Math"])
+        student, _ = create_user("student", name="Student")
+        return [
+            lambda: client.get("/api/teachers/search?subject=Math"),
+            lambda: client.get(f"/api/teachers/{teacher['id']}"),
+            lambda: client.get(f"/api/reviews/teacher/{teacher['id']}"),
+            lambda: client.get("/api/requests", headers=student),
+            lambda: client.get("/api/wallet", headers=student),
+        ]
+
+    def test_find_saturation_point(self, client, create_user):
+        """Test throughput levels off as concurrency grows, and report where"""
+        mix = self.endpoint_mix(client, create_user)
+        rows = []
+        for concurrency in POOL_BENCHMARK_CONCURRENCY:
+            waits_sum = sample("db_pool_checkout_seconds_sum")
+            waits = sample("db_pool_checkout_seconds_count")
+            timeouts = sample("db_pool_checkout_timeouts_total")
+
+            def timed(i):
+                start = time.perf_counter()
+                assert mix[i % len(mix)]().status_code == 200
+                return time.perf_counter() - start
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                latencies = sorted(pool.map(timed, range(POOL_BENCHMARK_REQUESTS)))
+            elapsed = time.perf_counter() - start
+
+            checkouts = sample("db_pool_checkout_seconds_count") - waits
+            rows.append({
+                "concurrency": concurrency,
+                "rps": POOL_BENCHMARK_REQUESTS / elapsed,
+                "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+                "wait_ms": (sample("db_pool_checkout_seconds_sum") - waits_sum) / max(checkouts, 1) * 1000,
+                "timeouts": sample("db_pool_checkout_timeouts_total") - timeouts,
+            })
+
+        # Saturated once doubling the concurrency adds less than 10% throughput
+        saturation = next(
+            (b for a, b in zip(rows, rows[1:]) if b["rps"] < a["rps"] * 1.1), rows[-1]
+        )["concurrency"]
+        print(f"\nPool size {os.getenv('DB_POOL_SIZE', 5)}, max overflow {os.getenv('DB_MAX_OVERFLOW', 10)}")
+        print(f"{'concurrency':>11} {'req/s':>8} {'p95 ms':>8} {'wait ms':>8} {'timeouts':>8}")
+        for row in rows:
+            print(f"{row['concurrency']:>11} {row['rps']:>8.1f} {row['p95_ms']:>8.1f} "
+                  f"{row['wait_ms']:>8.2f} {row['timeouts']:>8.0f}")
+        print(f"Saturation at concurrency {saturation}")
+
+        assert all(row["timeouts"] == 0 for row in rows)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,120 @@
+import pytest
+
+from tests.conftest import count_statements, requires_database
+
+pytestmark = requires_database
+
+
+class TestRecurringSessions:
+    """Test cases for lazily expanded recurring sessions"""
+
+    def book_weekly(self, client, create_user):
+        _, teacher = create_user("teacher", name="Teacher", hourly_rate=1000, subjects_taught=["Math"])
+        student, _ = create_user("student", name="Student")
+        response = client.post("/api/sessions/book", headers=student, json={
+            "teacher_id": teacher["id"],
+            "subject": "Math",
+            "scheduled_date": "2032-01-05T00:00:00",
+            "scheduled_time": "16:00",
+            "duration": 1,
+            "is_recurring": True,
+            "recurring_frequency": "weekly",
+        })
+        assert response.status_code == 200, response.text
+        return student, teacher, response.json()
+
+    def test_year_listing_uses_constant_queries(self, client, create_user):
+        """Test listing a year of weekly occurrences stays within a fixed query count"""
+        student, _, series = self.book_weekly(client, create_user)
+        window = {"from": "2032-01-01T00:00:00", "to": "2032-12-31T00:00:00", "per_page": 100}
+
+        with count_statements() as statements:
+            response = client.get("/api/sessions", params=window, headers=student)
+
+        assert response.status_code == 200
+        sessions = response.json()
+        assert len(sessions) == 52
+        assert sum(1 for s in sessions if not s["is_materialized"]) == 51
+        assert all(s["series_id"] == series["id"] for s in sessions if not s["is_materialized"])
+        assert len(statements) <= 6
+
+    def test_occurrences_block_bookings(self, client, create_user):
+        """Test an expanded occurrence conflicts with a new booking"""
+        _, teacher, _ = self.book_weekly(client, create_user)
+        other, _ = create_user("student", name="Other")
+        response = client.post("/api/sessions/book", headers=other, json={
+            "teacher_id": teacher["id"],
+            "subject": "Math",
+            "scheduled_date": "2032-03-01T00:00:00",
+            "scheduled_time": "16:30",
+            "duration": 1,
+        })
+
+        assert response.status_code == 409
+
+    def test_series_conflicting_in_a_later_week_is_rejected(self, client, create_user):
+        """Test a weekly series is refused when its third week collides with an existing session"""
+        _, teacher = create_user("teacher", name="Teacher", hourly_rate=1000, subjects_taught=["Math"])
+        student, _ = create_user("student", name="Student")
+        booking = {"teacher_id": teacher["id"], "subject": "Math", "scheduled_time": "16:00", "duration": 1}
+        single = client.post("/api/sessions/book", headers=student, json=dict(booking, scheduled_date="2032-01-19T00:00:00"))
+        assert single.status_code == 200, single.text
+
+        series = dict(booking, scheduled_date="2032-01-05T00:00:00", is_recurring=True, recurring_frequency="weekly")
+        response = client.post("/api/sessions/book", headers=student, json=series)
+        assert response.status_code == 409
+        assert "2032-01-19" in response.json()["detail"]
+
+        ended = client.post("/api/sessions/book", headers=student, json=dict(series, recurring_until="2032-01-18T00:00:00"))
+        assert ended.status_code == 200, ended.text
+
+    def test_occurrence_of_another_teacher_is_not_materialized(self, client, create_user):
+        """Test a teacher outside the series gets 403 without the occurrence being given a row"""
+        student, _, series = self.book_weekly(client, create_user)
+        stranger, _ = create_user("teacher", name="Stranger", hourly_rate=1000, subjects_taught=["Math"])
+        response = client.patch(
+            f"/api/sessions/{series['id']}/occurrences/2032-01-12T16:00:00",
+            json={"status": "cancelled"}, headers=stranger
+        )
+        assert response.status_code == 403
+
+        window = {"from": "2032-01-12T00:00:00", "to": "2032-01-13T00:00:00"}
+        sessions = client.get("/api/sessions", params=window, headers=student).json()
+        assert [s["is_materialized"] for s in sessions] == [False]
+
+    def test_modifying_an_occurrence_materializes_it(self, client, create_user):
+        """Test cancelling one occurrence gives it a row and frees that slot only"""
+        student, teacher, series = self.book_weekly(client, create_user)
+        response = client.patch(
+            f"/api/sessions/{series['id']}/occurrences/2032-01-12T16:00:00",
+            json={"status": "cancelled"}, headers=student
+        )
+        assert response.status_code == 200, response.text
+        assert response.json()["is_materialized"] is True
+        assert response.json()["status"] == "cancelled"
+
+        window = {"from": "2032-01-01T00:00:00", "to": "2032-01-31T00:00:00", "per_page": 100}
+        sessions = client.get("/api/sessions", params=window, headers=student).json()
+        assert len(sessions) == 4
+        assert [s["status"] for s in sessions if s["scheduled_date"].startswith("2032-01-12")] == ["cancelled"]
+
+        other, _ = create_user("student", name="Other")
+        booking = {"teacher_id": teacher["id"], "subject": "Math", "scheduled_time": "16:00", "duration": 1}
+        freed = client.post("/api/sessions/book", headers=other, json=dict(booking, scheduled_date="2032-01-12T00:00:00"))
+        taken = client.post("/api/sessions/book", headers=other, json=dict(booking, scheduled_date="2032-01-19T00:00:00"))
+        assert freed.status_code == 200
+        assert taken.status_code == 409
+
+    def test_unknown_occurrence_is_404(self, client, create_user):
+        """Test patching a date that is not part of the series returns 404"""
+        student, _, series = self.book_weekly(client, create_user)
+        response = client.patch(
+            f"/api/sessions/{series['id']}/occurrences/2032-01-13T16:00:00",
+            json={"status": "cancelled"}, headers=student
+        )
+
+        assert response.status_code == 404
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,132 @@
+import pytest
+import os
+
+from tests.conftest import requires_database, TEST_DATABASE_URL
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestReplicaHealth:
+    """Test cases for deciding when the replica may serve reads"""
+
+    def test_lag_is_measured_once_per_interval(self):
+        """Test the replica lag is cached between checks and over max_lag disables the replica"""
+        import replicas
+
+        measured = []
+        def probe(engine):
+            measured.append(engine)
+            return 3.0
+
+        router = replicas.ReplicaRouter("replica", max_lag=5, check_interval=60, probe=probe)
+        assert router.healthy() and router.healthy()
+        assert measured == ["replica"]
+
+        router = replicas.ReplicaRouter("replica", max_lag=2, check_interval=60, probe=probe)
+        assert not router.healthy()
+
+    def test_unreachable_replica_is_unhealthy(self):
+        """Test a failing lag check takes the replica out of rotation"""
+        import replicas
+
+        def probe(engine):
+            raise OSError("connection refused")
+
+        assert not replicas.ReplicaRouter("replica", probe=probe).healthy()
+
+
+@requires_database
+class TestReplicaRouting:
+    """Test cases for routing reads, using a migrated schema of the test database as a stand-in replica"""
+
+    SCHEMA = "replica_standin"
+
+    def setup_method(self):
+        from alembic import command
+        from alembic.config import Config
+        from sqlalchemy import create_engine, text
+
+        self.engine = create_engine(TEST_DATABASE_URL)
+        with self.engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {self.SCHEMA} CASCADE"))
+            conn.execute(text(f"CREATE SCHEMA {self.SCHEMA}"))
+        separator = "&" if "?" in TEST_DATABASE_URL else "?"
+        self.replica_url = f"{TEST_DATABASE_URL}{separator}options=-csearch_path%3D{self.SCHEMA}"
+
+        primary_url = os.environ.get("DATABASE_URL")
+        os.environ["DATABASE_URL"] = self.replica_url
+        try:
+            command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+        finally:
+            os.environ["DATABASE_URL"] = primary_url or TEST_DATABASE_URL
+
+    def teardown_method(self):
+        from sqlalchemy import text
+        with self.engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {self.SCHEMA} CASCADE"))
+        self.engine.dispose()
+
+    def route_to_standin(self, monkeypatch, lag=0.0):
+        import database
+        import replicas
+
+        def probe(engine):
+            if isinstance(lag, Exception):
+                raise lag
+            return lag
+
+        replica = database.build_engine(self.replica_url)
+        monkeypatch.setattr(replicas, "_router", replicas.ReplicaRouter(replica, max_lag=5, probe=probe))
+        return replica
+
+    def test_reads_go_to_replica(self, client, create_user, monkeypatch):
+        """Test GET endpoints read from the replica, which has not seen the new teacher"""
+        _, teacher = create_user("teacher", name="Teacher", hourly_rate=1000, subjects_taught=["Math"])
+        replica = self.route_to_standin(monkeypatch)
+
+        assert client.get(f"/api/teachers/{teacher['id']}").status_code == 404
+        assert client.get("/api/teachers/search?subject=Math").json() == []
+
+        replica.dispose()
+
+    def test_writer_reads_own_writes(self, client, create_user, monkeypatch):
+        """Test a client that just wrote reads from the primary until the window passes"""
+        import replicas
+
+        headers, _ = create_user("student", name="Student")
+        replica = self.route_to_standin(monkeypatch)
+
+        response = client.post("/api/requests", headers=headers, json={
+            "subject": "Math", "topic": "Algebra", "hourly_rate": 500
+        })
+        assert response.status_code == 200, response.text
+        until = response.headers[replicas.READ_AFTER_WRITE_HEADER]
+
+        sticky = {replicas.READ_AFTER_WRITE_HEADER: until}
+        feed = client.get("/api/requests?per_page=100", headers=sticky).json()
+        assert response.json()["id"] in [r["id"] for r in feed]
+
+        expired = {replicas.READ_AFTER_WRITE_HEADER: str(float(until) - 3600)}
+        assert client.get("/api/requests", headers=expired).json() == []
+        assert replicas.READ_AFTER_WRITE_HEADER not in client.get("/api/requests").headers
+
+        replica.dispose()
+
+    @pytest.mark.parametrize("lag", [30.0, OSError("replica is down")])
+    def test_lagging_replica_falls_back_to_primary(self, client, create_user, monkeypatch, lag):
+        """Test reads go to the primary while the replica is too far behind or unreachable"""
+        _, teacher = create_user("teacher", name="Teacher", hourly_rate=1000, subjects_taught=["Math"])
+        replica = self.route_to_standin(monkeypatch, lag=lag)
+
+        assert client.get(f"/api/teachers/{teacher['id']}").status_code == 200
+
+        replica.dispose()
+
+    def test_lag_of_standin_is_zero(self):
+        """Test a database that is not a standby reports no lag"""
+        import replicas
+        assert replicas.measure_lag(self.engine) == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,119 @@
+import pytest
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from tests.conftest import requires_database
+
+pytestmark = requires_database
+
+
+class TestRatingAggregates:
+    """Test cases for incrementally maintained teacher rating aggregates"""
+
+    def completed_sessions(self, client, create_user, count):
+        _, teacher = create_user("teacher", name="Teacher", hourly_rate=1000, subjects_taught=["Math"])
+        sessions = []
+        for i in range(count):
+            student, _ = create_user("student", name=f"Student {i}")
+            response = client.post("/api/sessions/book", headers=student, json={
+                "teacher_id": teacher["id"],
+                "subject": "Math",
+                "scheduled_date": "2033-02-01T00:00:00",
+                "scheduled_time": "%02d:00" % i,
+                "duration": 1,
+            })
+            assert response.status_code == 200, response.text
+            session_id = response.json()["id"]
+            response = client.patch(f"/api/sessions/{session_id}", json={"status": "completed"}, headers=student)
+            assert response.status_code == 200, response.text
+            sessions.append((student, session_id))
+        return teacher, sessions
+
+    def test_parallel_reviews_are_all_counted(self, client, create_user):
+        """Test concurrent reviews update sum, count and histogram without lost updates"""
+        teacher, sessions = self.completed_sessions(client, create_user, 20)
+
+        def review(i):
+            student, session_id = sessions[i]
+            return client.post("/api/reviews", headers=student, json={
+                "session_id": session_id, "rating": i % 5 + 1, "review_text": "Good"
+            })
+
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            codes = [r.status_code for r in pool.map(review, range(len(sessions)))]
+        assert codes == [200] * 20
+
+        profile = client.get(f"/api/teachers/{teacher['id']}").json()
+        assert profile["total_reviews"] == 20
+        assert profile["rating_histogram"] == {"1": 4, "2": 4, "3": 4, "4": 4, "5": 4}
+        assert profile["average_rating"] == pytest.approx(3.0)
+
+    def test_rebuild_repairs_drift(self, client, create_user):
+        """Test the repair job recomputes aggregates from the reviews table"""
+        from database import SessionLocal
+        import models
+        import ratings
+
+        teacher, sessions = self.completed_sessions(client, create_user, 2)
+        for (student, session_id), rating in zip(sessions, [5, 2]):
+            client.post("/api/reviews", headers=student, json={"session_id": session_id, "rating": rating})
+
+        db = SessionLocal()
+        try:
+            db.query(models.TeacherProfile).filter(models.TeacherProfile.id == teacher["id"]).update(
+                {"rating_sum": 99, "total_reviews": 7, "rating_count_5": 0, "average_rating": 1.0}
+            )
+            db.commit()
+            assert ratings.rebuild_rating_aggregates(db) >= 1
+        finally:
+            db.close()
+
+        profile = client.get(f"/api/teachers/{teacher['id']}").json()
+        assert profile["total_reviews"] == 2
+        assert profile["rating_histogram"] == {"1": 0, "2": 1, "3": 0, "4": 0, "5": 1}
+        assert profile["average_rating"] == pytest.approx(3.5)
+
+
+class TestHelpfulVotes:
+    """Test cases for deduplicated, buffered helpful votes"""
+
+    def test_votes_are_deduplicated_and_flushed(self, client, create_user):
+        """Test repeated parallel votes count once per user and reach the counter in one flush"""
+        from database import SessionLocal
+        import models
+        import votes
+
+        teacher, sessions = TestRatingAggregates().completed_sessions(client, create_user, 1)
+        student, session_id = sessions[0]
+        review = client.post("/api/reviews", headers=student, json={"session_id": session_id, "rating": 4}).json()
+        voters = [create_user("student", name=f"Voter {i}")[0] for i in range(10)]
+
+        def vote(i):
+            return client.post(f"/api/reviews/{review['id']}/helpful", headers=voters[i % len(voters)])
+
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            responses = list(pool.map(vote, range(50)))
+        assert all(r.status_code == 200 for r in responses)
+        assert max(r.json()["helpful_votes"] for r in responses) == 10
+
+        db = SessionLocal()
+        try:
+            assert votes.helpful_vote_buffer.flush(db) >= 1
+            assert votes.helpful_vote_buffer.pending(uuid.UUID(review["id"])) == 0
+            stored = db.query(models.Review).filter(models.Review.id == review["id"]).one()
+            assert stored.helpful_votes == 10
+
+            stored.helpful_votes = 3
+            db.commit()
+            assert votes.rebuild_helpful_votes(db) >= 1
+            db.refresh(stored)
+            assert stored.helpful_votes == 10
+        finally:
+            db.close()
+
+        listed = client.get(f"/api/reviews/teacher/{teacher['id']}").json()
+        assert listed[0]["helpful_votes"] == 10
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,232 @@
+import pytest
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scheduling
+from scheduling import SlotCache
+
+
+# 2024-01-01 is a Monday
+MONDAY = datetime(2024, 1, 1)
+
+
+class TestAvailabilityParsing:
+    """Test cases for turning availability JSON into weekly intervals"""
+
+    def test_hour_slots_are_merged(self):
+        """Test consecutive hourly slots collapse into one interval"""
+        template = scheduling.parse_availability({"monday": ["09:00", "10:00", "11:00"]})
+
+        assert template == [(9 * 60, 12 * 60)]
+
+    def test_ranges_and_day_offsets(self):
+        """Test explicit ranges and day offsets within the week"""
+        template = scheduling.parse_availability({"Tuesday": ["18:00-20:30"]})
+
+        day = scheduling.MINUTES_PER_DAY
+        assert template == [(day + 18 * 60, day + 20 * 60 + 30)]
+
+    def test_malformed_entries_are_ignored(self):
+        """Test unknown days and bad times do not raise"""
+        template = scheduling.parse_availability({
+            "funday": ["09:00"],
+            "monday": ["nonsense", "25:00", "10:00-09:00", "08:00"],
+        })
+
+        assert template == [(8 * 60, 9 * 60)]
+
+    def test_empty_availability(self):
+        """Test missing availability produces no intervals"""
+        assert scheduling.parse_availability(None) == []
+        assert scheduling.parse_availability({}) == []
+
+
+class TestIntervalArithmetic:
+    """Test cases for interval merge and subtraction"""
+
+    def test_subtract_splits_free_interval(self):
+        """Test a busy block in the middle splits a free interval"""
+        free = [(0, 100)]
+        busy = [(20, 30), (50, 60)]
+
+        assert scheduling.subtract_intervals(free, busy) == [(0, 20), (30, 50), (60, 100)]
+
+    def test_subtract_busy_spanning_intervals(self):
+        """Test a busy block overlapping two free intervals trims both"""
+        free = [(0, 10), (20, 30)]
+        busy = [(5, 25)]
+
+        assert scheduling.subtract_intervals(free, busy) == [(0, 5), (25, 30)]
+
+    def test_session_interval(self):
+        """Test a session's interval is built from date, time and duration"""
+        start, end = scheduling.session_interval(datetime(2024, 1, 1, 19, 0), "09:30", 1.5)
+
+        assert start == datetime(2024, 1, 1, 9, 30)
+        assert end == datetime(2024, 1, 1, 11, 0)
+
+
+class TestFreeSlots:
+    """Test cases for free-slot computation with caching"""
+
+    def setup_method(self):
+        self.cache = SlotCache()
+        self.availability = {"monday": ["09:00", "10:00", "11:00"], "wednesday": ["14:00"]}
+        self.busy = [(MONDAY + timedelta(hours=10), MONDAY + timedelta(hours=11))]
+        self.load_calls = 0
+
+    def load_busy(self, start, end):
+        self.load_calls += 1
+        return [b for b in self.busy if b[0] < end and b[1] > start]
+
+    def test_booked_sessions_are_removed(self):
+        """Test booked time is subtracted from the weekly template"""
+        slots = scheduling.free_slots("t1", self.availability, MONDAY, MONDAY + timedelta(days=7),
+                                      self.load_busy, cache=self.cache)
+
+        assert slots == [
+            (MONDAY + timedelta(hours=9), MONDAY + timedelta(hours=10)),
+            (MONDAY + timedelta(hours=11), MONDAY + timedelta(hours=12)),
+            (MONDAY + timedelta(days=2, hours=14), MONDAY + timedelta(days=2, hours=15)),
+        ]
+
+    def test_month_window_loads_busy_once(self):
+        """Test a multi-week window issues a single busy lookup and then hits the cache"""
+        start, end = MONDAY, MONDAY + timedelta(days=31)
+        first = scheduling.free_slots("t1", self.availability, start, end, self.load_busy, cache=self.cache)
+        second = scheduling.free_slots("t1", self.availability, start, end, self.load_busy, cache=self.cache)
+
+        assert first == second
+        assert self.load_calls == 1
+        # 5 Mondays and 5 Wednesdays fall in the window; the first Monday is split by a booking
+        assert len(first) == 11
+
+    def test_invalidate_recomputes(self):
+        """Test invalidating a teacher forces a fresh busy lookup"""
+        window = (MONDAY, MONDAY + timedelta(days=7))
+        scheduling.free_slots("t1", self.availability, *window, self.load_busy, cache=self.cache)
+        self.busy.append((MONDAY + timedelta(hours=9), MONDAY + timedelta(hours=10)))
+        self.cache.invalidate("t1")
+        slots = scheduling.free_slots("t1", self.availability, *window, self.load_busy, cache=self.cache)
+
+        assert self.load_calls == 2
+        assert (MONDAY + timedelta(hours=9), MONDAY + timedelta(hours=10)) not in slots
+
+    def test_window_is_clipped(self):
+        """Test slots are clipped to the requested window"""
+        start = MONDAY + timedelta(hours=9, minutes=30)
+        slots = scheduling.free_slots("t1", self.availability, start, MONDAY + timedelta(hours=12),
+                                      self.load_busy, cache=self.cache)
+
+        assert slots[0][0] == start
+        assert scheduling.is_slot_free(slots, MONDAY + timedelta(hours=11), MONDAY + timedelta(hours=12))
+        assert not scheduling.is_slot_free(slots, MONDAY + timedelta(hours=9, minutes=30),
+                                           MONDAY + timedelta(hours=11))
+
+    def test_no_availability_means_no_slots(self):
+        """Test teachers without an availability template have no slots"""
+        slots = scheduling.free_slots("t1", None, MONDAY, MONDAY + timedelta(days=7),
+                                      self.load_busy, cache=self.cache)
+
+        assert slots == []
+        assert self.load_calls == 0
+
+    def test_cache_entries_expire(self):
+        """Test cached weeks expire after the TTL"""
+        cache = SlotCache(ttl_seconds=0)
+        cache.set("t1", MONDAY, [])
+        time.sleep(0.001)
+
+        assert cache.get("t1", MONDAY) is None
+
+    def test_month_window_is_fast(self):
+        """Test a cached month window answers well within single-digit milliseconds"""
+        start, end = MONDAY, MONDAY + timedelta(days=31)
+        availability = {day: ["%02d:00" % h for h in range(8, 22)] for day in scheduling.WEEKDAYS}
+        scheduling.free_slots("t1", availability, start, end, self.load_busy, cache=self.cache)
+
+        began = time.perf_counter()
+        for _ in range(100):
+            scheduling.free_slots("t1", availability, start, end, self.load_busy, cache=self.cache)
+        per_call = (time.perf_counter() - began) / 100
+
+        assert per_call < 0.005
+
+
+class TestRecurrenceExpansion:
+    """Test cases for lazy expansion of recurring sessions"""
+
+    def test_weekly_year(self):
+        """Test a year of a weekly series expands to 52 repeat occurrences"""
+        first = MONDAY + timedelta(hours=9)
+        occurrences = scheduling.expand_occurrences(first, "weekly", MONDAY, MONDAY + timedelta(days=365))
+
+        assert len(occurrences) == 52
+        assert occurrences[0] == first + timedelta(days=7)
+        assert first not in occurrences
+
+    def test_window_far_from_series_start(self):
+        """Test expansion jumps straight to a window years after the series began"""
+        first = MONDAY + timedelta(hours=9)
+        window_start = datetime(2030, 6, 1)
+        occurrences = scheduling.expand_occurrences(first, "bi-weekly", window_start,
+                                                    window_start + timedelta(days=28))
+
+        assert len(occurrences) == 2
+        assert all(o >= window_start and (o - first).days % 14 == 0 for o in occurrences)
+
+    def test_monthly_clamps_day(self):
+        """Test monthly series on the 31st fall on the last day of shorter months"""
+        first = datetime(2024, 1, 31, 9)
+        occurrences = scheduling.expand_occurrences(first, "monthly", datetime(2024, 2, 1), datetime(2024, 5, 1))
+
+        assert occurrences == [datetime(2024, 2, 29, 9), datetime(2024, 3, 31, 9), datetime(2024, 4, 30, 9)]
+
+    def test_until_and_unknown_frequency(self):
+        """Test the series end date is honoured and unknown frequencies expand to nothing"""
+        first = MONDAY + timedelta(hours=9)
+        until = first + timedelta(days=14)
+
+        assert scheduling.expand_occurrences(first, "weekly", MONDAY, MONDAY + timedelta(days=60), until) == [
+            first + timedelta(days=7), first + timedelta(days=14)
+        ]
+        assert scheduling.expand_occurrences(first, "daily", MONDAY, MONDAY + timedelta(days=60)) == []
+
+
+class TestAvailabilityMask:
+    """Test cases for the hour-of-week availability bitmap"""
+
+    def test_mask_from_availability(self):
+        """Test available hours set the matching bits"""
+        mask = scheduling.availability_mask({"monday": ["09:00"], "tuesday": ["18:30-20:00"]})
+
+        assert len(mask) == 168
+        assert [i for i, bit in enumerate(mask) if bit == "1"] == [9, 24 + 18, 24 + 19]
+
+    def test_filter_day_parts(self):
+        """Test day and day-part tokens map to hour ranges"""
+        mask = scheduling.parse_availability_filter("tuesday:evening")
+
+        assert [i for i, bit in enumerate(mask) if bit == "1"] == list(range(24 + 17, 24 + 22))
+
+    def test_filter_groups_and_ranges(self):
+        """Test day groups and explicit hour ranges"""
+        mask = scheduling.parse_availability_filter("weekends:9-11, monday")
+
+        hours = [i for i, bit in enumerate(mask) if bit == "1"]
+        assert hours == list(range(24)) + [5 * 24 + 9, 5 * 24 + 10, 6 * 24 + 9, 6 * 24 + 10]
+
+    def test_filter_rejects_garbage(self):
+        """Test unknown days and parts raise ValueError"""
+        for value in ["someday", "monday:brunch", "monday:20-18", ""]:
+            with pytest.raises(ValueError):
+                scheduling.parse_availability_filter(value)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,113 @@
+import pytest
+import statistics
+import uuid
+from collections import Counter
+from datetime import date
+
+from tests.conftest import TEST_DATABASE_URL, requires_database
+
+
+def generate(users, seed=7):
+    """Every batch a generator yields, flattened into table -> rows"""
+    from seed import COLUMNS, Generator
+    generator = Generator(users, seed=seed, as_of=date(2026, 10, 1))
+    tables = {table: [] for table in COLUMNS}
+    for phase in (generator.teacher_batches(100), generator.student_batches(100)):
+        for batch in phase:
+            for table, rows in batch.items():
+                tables[table].extend(rows)
+    return tables
+
+
+class TestGenerator:
+    """Test cases for the synthetic data generator"""
+
+    def test_same_seed_same_rows(self):
+        """Test the rows are a function of the seed alone"""
+        assert generate(500, seed=7) == generate(500, seed=7)
+        assert generate(500, seed=7)["sessions"] != generate(500, seed=8)["sessions"]
+
+    def test_rows_match_copy_columns(self):
+        """Test every row has one value per COPY column and ids are unique"""
+        from seed import COLUMNS
+        tables = generate(500)
+
+        for table, rows in tables.items():
+            assert all(len(row) == len(COLUMNS[table]) for row in rows), table
+            assert len({row[0] for row in rows}) == len(rows), table
+        assert len(tables["users"]) == 500
+        assert len(tables["teacher_profiles"]) == 50
+
+    def test_distributions(self):
+        """Test the rating skew, teacher popularity and conversation size tail"""
+        tables = generate(3000)
+
+        ratings = Counter(row[4] for row in tables["reviews"])
+        assert ratings[5] > ratings[4] > ratings[3] > ratings[1]
+
+        bookings = Counter(row[2] for row in tables["sessions"]).most_common()
+        assert bookings[0][1] > 10 * statistics.median(count for _, count in bookings)
+
+        sizes = Counter(row[1] for row in tables["messages"]).values()
+        assert max(sizes) > 10 * statistics.median(sizes)
+
+
+@pytest.fixture
+def own_database(client, monkeypatch):
+    """Point the app at a freshly migrated database of its own, dropped afterwards
+
+    Loading drops foreign keys and rebuilds derived tables, which other tests
+    sharing TEST_DATABASE_URL must not see.
+    """
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.engine import make_url
+    import database
+    import metrics
+    import setup_db
+
+    url = make_url(TEST_DATABASE_URL)
+    name = f"{url.database}_seed_{uuid.uuid4().hex[:8]}"
+    server = create_engine(url, isolation_level="AUTOCOMMIT")
+    with server.connect() as conn:
+        conn.execute(text(f'CREATE DATABASE "{name}"'))
+    previous = database._engine
+    monkeypatch.setenv("DATABASE_URL", url.set(database=name).render_as_string(hide_password=False))
+    monkeypatch.setattr(database, "_engine", None)
+    try:
+        setup_db.setup_database()
+        yield
+    finally:
+        if database._engine is not None:
+            database._engine.dispose()
+        if previous is not None:
+            metrics.watch_pool(previous.pool, database.pool_settings()["max_overflow"])
+        with server.connect() as conn:
+            conn.execute(text(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)'))
+        server.dispose()
+
+
+@requires_database
+class TestSeedDatabase:
+    """Test cases for loading generated data with COPY"""
+
+    def test_seeded_data_is_usable(self, own_database, client, admin):
+        """Test the loaded rows satisfy the schema and the app can serve them"""
+        import seed
+
+        loaded = seed.seed_database(400, seed=3, batch_size=50, progress=lambda line: None)
+
+        token = client.post("/api/auth/login", json={"email": f"student0@{seed.SEED_EMAIL_DOMAIN}",
+                                                    "password": "password"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        assert loaded["users"] == 400
+        assert len(client.get("/api/teachers/search?per_page=100").json()) == 40
+        assert client.get("/api/sessions", headers=headers).status_code == 200
+        assert client.get("/api/conversations", headers=headers).status_code == 200
+
+        stats = client.get("/api/admin/stats", headers=admin).json()
+        assert stats["total_users"] == 401
+        assert stats["total_sessions"] == loaded["sessions"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,76 @@
+import pytest
+import json
+import os
+import subprocess
+import sys
+
+from tests.conftest import requires_database, TEST_DATABASE_URL
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Time importing api/index.py may add on top of FastAPI itself
+COLD_START_BUDGET_MS = float(os.getenv("COLD_START_BUDGET_MS", 100))
+
+# Modules a cold start must not import before a request needs them
+DEFERRED_MODULES = ["models", "schemas", "auth", "database", "sqlalchemy", "passlib", "jose", "api.routes"]
+
+
+def run_python(code, **env):
+    """Run code in a fresh interpreter next to api/index.py and return what it prints, parsed as JSON"""
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=os.path.join(BACKEND_DIR, "api"),
+        env=dict(os.environ, SECRET_KEY="test-secret", ALGORITHM="HS256", **env),
+        capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+class TestServerlessColdStart:
+    """Test cases for the Vercel entry point's cold start"""
+
+    def test_import_stays_within_budget(self):
+        """Test importing the entry point defers the app stack and adds little to FastAPI's own import"""
+        code = f"""
+import json, sys, time
+import fastapi, fastapi.middleware.cors
+start = time.perf_counter()
+import index
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({{"ms": elapsed, "loaded": [m for m in {DEFERRED_MODULES!r} if m in sys.modules]}}))
+"""
+        # Best of three, to keep a noisy CI machine from failing the build
+        runs = [run_python(code, DATABASE_URL="postgresql://nobody@127.0.0.1:1/unreachable") for _ in range(3)]
+
+        assert runs[0]["loaded"] == []
+        assert min(run["ms"] for run in runs) < COLD_START_BUDGET_MS
+
+    def test_precomputed_openapi_is_current(self):
+        """Test api/openapi.json matches the routes (regenerate with: python api/index.py)"""
+        schema = run_python("import index, json; print(json.dumps(index.build_openapi()))",
+                            DATABASE_URL="postgresql://nobody@127.0.0.1:1/unreachable")
+        with open(os.path.join(BACKEND_DIR, "api", "openapi.json")) as f:
+            assert json.load(f) == schema
+
+    @requires_database
+    def test_routes_load_on_first_request(self, client):
+        """Test an API request loads the routes and is served over a NullPool engine"""
+        code = """
+import json, sys, uuid
+from fastapi.testclient import TestClient
+import index
+client = TestClient(index.app)
+health = client.get("/api/health").status_code
+deferred = "api.routes" not in sys.modules
+email = f"student-{uuid.uuid4().hex[:12]}@example.com"
+signup = client.post("/api/auth/signup", json={"email": email, "password": "pw", "role": "student"}).status_code
+import database
+print(json.dumps({"health": health, "deferred": deferred, "signup": signup,
+                  "pool": type(database.get_engine().pool).__name__}))
+"""
+        result = run_python(code, DATABASE_URL=TEST_DATABASE_URL)
+        assert result == {"health": 200, "deferred": True, "signup": 200, "pool": "NullPool"}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
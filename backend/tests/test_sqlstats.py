@@ -0,0 +1,119 @@
+import pytest
+import os
+import subprocess
+import sys
+import textwrap
+
+from tests.conftest import requires_database
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestSqlBudgetPlugin:
+    """Test cases for the sql_budget pytest plugin"""
+
+    def test_request_over_budget_fails_the_test(self, tmp_path):
+        """Test a request over its statement budget fails the test and names the route"""
+        test_file = tmp_path / "test_budget_example.py"
+        test_file.write_text(textwrap.dedent("""
+            import pytest
+            import sqlstats
+
+            def serve(route, statements):
+                stats = sqlstats.RequestStats()
+                stats.statements = statements
+                stats.shapes["SELECT 1"] = statements
+                for listener in sqlstats.request_listeners:
+                    listener("GET", route, stats)
+
+            @pytest.mark.sql_budget(3)
+            def test_within_budget():
+                serve("/api/teachers/search", 3)
+
+            @pytest.mark.sql_budget(3)
+            def test_over_budget():
+                serve("/api/requests", 12)
+
+            @pytest.mark.sql_budget(3, route="/api/teachers/search")
+            def test_other_route_ignored():
+                serve("/api/requests", 12)
+        """))
+
+        result = subprocess.run(
+            [sys.executable, "-m", "pytest", "-q", "-p", "tests.sql_budget", "-p", "no:cacheprovider", str(test_file)],
+            cwd=BACKEND_DIR, env=dict(os.environ, PYTHONPATH=BACKEND_DIR), capture_output=True, text=True, timeout=120
+        )
+
+        assert "1 failed, 2 passed" in result.stdout, result.stdout + result.stderr
+        assert "GET /api/requests: 12 statements, 12x the same statement" in result.stdout
+
+
+@requires_database
+class TestRequestSqlStats:
+    """Test cases for per-request SQL statement counting"""
+
+    def test_headers_report_statements(self, client, create_user, monkeypatch):
+        """Test the dev headers carry the statement count and SQL time of the request"""
+        import sqlstats
+
+        monkeypatch.setattr(sqlstats, "SQL_STATS_HEADERS", True)
+        headers, _ = create_user("student", name="Student")
+
+        response = client.get("/api/wallet", headers=headers)
+
+        assert int(response.headers["x-db-statements"]) >= 2
+        assert float(response.headers["x-db-time-ms"]) > 0
+        assert response.headers["x-db-repeated-statements"] == "0"
+
+    def test_repeated_statement_shape_is_flagged(self, monkeypatch, caplog):
+        """Test one statement shape run past the threshold counts as an N+1 on its route"""
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from prometheus_client import REGISTRY
+        from sqlalchemy import text
+        from database import SessionLocal
+        import sqlstats
+
+        monkeypatch.setattr(sqlstats, "SQL_STATS_HEADERS", True)
+        app = FastAPI()
+        app.add_middleware(sqlstats.SQLStatsMiddleware)
+
+        @app.get("/n-plus-one/{count}")
+        def n_plus_one(count: int):
+            db = SessionLocal()
+            try:
+                return [db.execute(text("SELECT :i"), {"i": i}).scalar() for i in range(count)]
+            finally:
+                db.close()
+
+        def flagged():
+            return REGISTRY.get_sample_value("http_request_n_plus_one_total", {"route": "/n-plus-one/{count}"}) or 0
+
+        before = flagged()
+        client = TestClient(app)
+        assert client.get("/n-plus-one/2").headers["x-db-repeated-statements"] == "0"
+        with caplog.at_level("WARNING", logger="sqlstats"):
+            response = client.get(f"/n-plus-one/{sqlstats.N_PLUS_ONE_THRESHOLD}")
+
+        assert response.headers["x-db-repeated-statements"] == "1"
+        assert int(response.headers["x-db-statements"]) >= sqlstats.N_PLUS_ONE_THRESHOLD
+        assert flagged() == before + 1
+        assert "Possible N+1 in GET /n-plus-one/{count}" in caplog.text
+
+    @pytest.mark.sql_budget(2, route="GET /api/requests")
+    def test_feed_does_not_query_per_request(self, client, create_user):
+        """Test the request feed loads student profiles with the requests"""
+        for i in range(3):
+            headers, _ = create_user("student", name=f"Student {i}")
+            for topic in ("Algebra", "Geometry", "Calculus"):
+                client.post("/api/requests", headers=headers,
+                            json={"subject": "Math", "topic": topic, "hourly_rate": 500})
+
+        feed = client.get("/api/requests?per_page=9").json()
+
+        assert len(feed) == 9
+        assert all(item["student_name"] for item in feed)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
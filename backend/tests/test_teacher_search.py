@@ -0,0 +1,52 @@
+import pytest
+import uuid
+
+from tests.conftest import requires_database
+
+pytestmark = requires_database
+
+
+class TestAvailabilitySearch:
+    """Test cases for filtering teachers by weekly availability"""
+
+    def test_availability_filter_combines_with_other_filters(self, client, create_user):
+        """Test the availability mask filter applies together with subject and rate filters"""
+        subject = f"Subject-{uuid.uuid4().hex[:8]}"
+        evening = {"tuesday": ["18:00", "19:00"]}
+        morning = {"tuesday": ["08:00", "09:00"]}
+        _, evening_cheap = create_user("teacher", name="Evening", hourly_rate=500,
+                                       subjects_taught=[subject], availability=evening)
+        create_user("teacher", name="Evening Pricey", hourly_rate=5000,
+                    subjects_taught=[subject], availability=evening)
+        create_user("teacher", name="Morning", hourly_rate=500,
+                    subjects_taught=[subject], availability=morning)
+
+        response = client.get("/api/teachers/search", params={
+            "subject": subject, "availability": "tuesday:evening", "max_rate": 1000
+        })
+
+        assert response.status_code == 200
+        assert [t["id"] for t in response.json()] == [evening_cheap["id"]]
+
+    def test_mask_follows_profile_updates(self, client, create_user):
+        """Test saving a new availability template updates the search mask"""
+        subject = f"Subject-{uuid.uuid4().hex[:8]}"
+        headers, teacher = create_user("teacher", name="Teacher", hourly_rate=500,
+                                       subjects_taught=[subject], availability={"monday": ["09:00"]})
+        params = {"subject": subject, "availability": "weekends"}
+        assert client.get("/api/teachers/search", params=params).json() == []
+
+        update = {"name": "Teacher", "hourly_rate": 500, "availability": {"sunday": ["10:00"]}}
+        assert client.patch(f"/api/profiles/teacher/{teacher['id']}", json=update, headers=headers).status_code == 200
+
+        assert [t["id"] for t in client.get("/api/teachers/search", params=params).json()] == [teacher["id"]]
+
+    def test_invalid_filter_is_400(self, client):
+        """Test a malformed availability filter is rejected"""
+        response = client.get("/api/teachers/search", params={"availability": "someday:evening"})
+
+        assert response.status_code == 400
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
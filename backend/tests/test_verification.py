@@ -0,0 +1,232 @@
+from datetime import datetime, timedelta
+import pytest
+import uuid
+
+from tests.conftest import count_statements, requires_database
+
+pytestmark = requires_database
+
+
+class TestBulkVerificationReview:
+    """Test cases for reviewing many verification documents in one request"""
+
+    def setup_method(self):
+        from database import SessionLocal
+        self.db = SessionLocal()
+
+    def teardown_method(self):
+        self.db.close()
+
+    def create_documents(self, teacher_id, count):
+        from database import engine
+        from sqlalchemy import text
+        with engine.begin() as conn:
+            return [row[0] for row in conn.execute(text("""
+                INSERT INTO verification_documents (id, teacher_id, document_type, document_url, status, created_at)
+                SELECT gen_random_uuid(), :teacher_id, 'certificate', 'https://example.com/doc/' || i, 'PENDING', now()
+                FROM generate_series(1, :count) AS i
+                RETURNING id
+            """), {"teacher_id": teacher_id, "count": count})]
+
+    def teacher(self, teacher_id):
+        import models
+        self.db.expire_all()
+        return self.db.query(models.TeacherProfile).filter(models.TeacherProfile.id == teacher_id).one()
+
+    def test_backlog_cleared_in_one_request(self, client, create_user, admin):
+        """Test 500 decisions apply in one request with a constant number of statements"""
+        import models
+        import stats
+
+        teachers = [create_user("teacher", name=f"Teacher {i}", hourly_rate=1000, subjects_taught=["Math"])[1]
+                    for i in range(3)]
+        documents = {t["id"]: self.create_documents(t["id"], n) for t, n in zip(teachers, (300, 150, 50))}
+        stats.rebuild(self.db)
+
+        decisions = [{"document_id": str(d), "status": "verified"} for d in documents[teachers[0]["id"]]]
+        decisions += [{"document_id": str(d), "status": "verified"} for d in documents[teachers[1]["id"]][1:]]
+        decisions.append({"document_id": str(documents[teachers[1]["id"]][0]), "status": "rejected",
+                          "admin_notes": "Blurry scan"})
+        decisions += [{"document_id": str(d), "status": "verified"} for d in documents[teachers[2]["id"]][1:]]
+        assert len(decisions) == 499
+
+        with count_statements() as statements:
+            response = client.post("/api/admin/verifications/review", json={"decisions": decisions}, headers=admin)
+
+        assert response.status_code == 200, response.text
+        assert response.json() == {"reviewed": 499, "teachers_updated": 3}
+        assert len(statements) <= 8
+
+        verified, rejected, pending = (self.teacher(t["id"]) for t in teachers)
+        assert verified.is_verified and verified.verification_status == models.VerificationStatus.VERIFIED
+        assert not rejected.is_verified and rejected.verification_status == models.VerificationStatus.PENDING
+        assert not pending.is_verified and pending.verification_status == models.VerificationStatus.PENDING
+        assert stats.reconcile(self.db) == {}
+
+    def test_batch_is_all_or_nothing(self, client, create_user, admin):
+        """Test an unknown or repeated document rejects the whole batch"""
+        import models
+
+        _, teacher = create_user("teacher", name="Teacher", hourly_rate=1000, subjects_taught=["Math"])
+        document_id = str(self.create_documents(teacher["id"], 1)[0])
+
+        unknown = [{"document_id": document_id, "status": "verified"},
+                   {"document_id": str(uuid.uuid4()), "status": "verified"}]
+        repeated = [{"document_id": document_id, "status": "verified"},
+                    {"document_id": document_id, "status": "rejected"}]
+        invalid = [{"document_id": document_id, "status": "approved"}]
+
+        url = "/api/admin/verifications/review"
+        assert client.post(url, json={"decisions": unknown}, headers=admin).status_code == 404
+        assert client.post(url, json={"decisions": repeated}, headers=admin).status_code == 400
+        assert client.post(url, json={"decisions": invalid}, headers=admin).status_code == 400
+        assert client.post(url, json={"decisions": []}, headers=admin).status_code == 422
+
+        status = self.db.query(models.VerificationDocument.status).filter(
+            models.VerificationDocument.id == document_id
+        ).scalar()
+        assert status == models.VerificationStatus.PENDING
+
+    def test_single_review_recomputes_teacher(self, client, create_user, admin):
+        """Test the single-document endpoint shares the bulk path"""
+        _, teacher = create_user("teacher", name="Teacher", hourly_rate=1000, subjects_taught=["Math"])
+        document_id = self.create_documents(teacher["id"], 1)[0]
+
+        response = client.post(f"/api/admin/verifications/{document_id}/review",
+                               json={"status": "verified"}, headers=admin)
+
+        assert response.json() == {"message": "Document verified"}
+        assert self.teacher(teacher["id"]).is_verified
+        assert client.post(f"/api/admin/verifications/{uuid.uuid4()}/review",
+                           json={"status": "verified"}, headers=admin).status_code == 404
+
+    def test_rejection_keeps_verified_teacher_verified(self, client, create_user, admin):
+        """Test rejecting a later document does not revoke a teacher's verification"""
+        import models
+
+        _, teacher = create_user("teacher", name="Teacher", hourly_rate=1000, subjects_taught=["Math"])
+        first = self.create_documents(teacher["id"], 1)[0]
+        client.post(f"/api/admin/verifications/{first}/review", json={"status": "verified"}, headers=admin)
+        second = self.create_documents(teacher["id"], 1)[0]
+
+        response = client.post("/api/admin/verifications/review", headers=admin,
+                               json={"decisions": [{"document_id": str(second), "status": "rejected"}]})
+
+        assert response.status_code == 200, response.text
+        profile = self.teacher(teacher["id"])
+        assert profile.is_verified and profile.verification_status == models.VerificationStatus.VERIFIED
+
+
+class TestVerificationClaims:
+    """Test cases for leasing the verification queue to concurrent reviewers"""
+
+    def setup_method(self):
+        from database import SessionLocal
+        self.db = SessionLocal()
+        self.documents = []
+
+    def teardown_method(self):
+        import models
+        self.db.rollback()
+        self.db.query(models.VerificationDocument).filter(
+            models.VerificationDocument.id.in_(self.documents)
+        ).delete(synchronize_session=False)
+        self.db.commit()
+        self.db.close()
+
+    def create_documents(self, teacher_id, count):
+        """Pending documents older than anything else in the queue, so they are claimed first"""
+        from database import engine
+        from sqlalchemy import text
+        with engine.begin() as conn:
+            self.documents += [row[0] for row in conn.execute(text("""
+                INSERT INTO verification_documents (id, teacher_id, document_type, document_url, status, created_at)
+                SELECT gen_random_uuid(), :teacher_id, 'certificate', 'https://example.com/doc/' || i, 'PENDING',
+                       timestamp '2000-01-01' + i * interval '1 second'
+                FROM generate_series(1, :count) AS i
+                RETURNING id
+            """), {"teacher_id": teacher_id, "count": count})]
+        return self.documents[-count:]
+
+    def second_admin(self, client):
+        email = f"admin-{uuid.uuid4().hex[:12]}@example.com"
+        response = client.post("/api/auth/signup", json={"email": email, "password": "pw", "role": "admin"})
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    def claim(self, client, headers, limit):
+        response = client.post("/api/admin/verifications/claim", json={"limit": limit}, headers=headers)
+        assert response.status_code == 200, response.text
+        return [uuid.UUID(d["id"]) for d in response.json()]
+
+    def test_reviewers_get_disjoint_documents(self, client, create_user, admin):
+        """Test each reviewer gets the next unclaimed documents and keeps their own on re-claim"""
+        _, teacher = create_user("teacher", name="Teacher", hourly_rate=1000, subjects_taught=["Math"])
+        documents = self.create_documents(teacher["id"], 6)
+        other = self.second_admin(client)
+
+        first = self.claim(client, admin, 3)
+        second = self.claim(client, other, 3)
+
+        assert first == documents[:3]
+        assert second == documents[3:]
+        assert self.claim(client, admin, 3) == first
+
+    def test_claim_skips_rows_locked_by_another_reviewer(self, client, create_user, admin):
+        """Test a claim in flight elsewhere is skipped instead of waited on"""
+        import verification
+
+        _, teacher = create_user("teacher", name="Teacher", hourly_rate=1000, subjects_taught=["Math"])
+        documents = self.create_documents(teacher["id"], 4)
+        reviewer = uuid.UUID(teacher["user_id"])
+
+        # Left uncommitted, so its rows stay locked
+        in_flight = verification.claim_documents(self.db, reviewer, 2)
+        assert [d.id for d in in_flight] == documents[:2]
+
+        assert self.claim(client, admin, 2) == documents[2:]
+
+    def test_review_respects_other_reviewers_lease(self, client, create_user, admin):
+        """Test a leased document can only be reviewed by its holder until the lease runs out"""
+        import models
+        import verification
+
+        _, teacher = create_user("teacher", name="Teacher", hourly_rate=1000, subjects_taught=["Math"])
+        document_id = self.create_documents(teacher["id"], 1)[0]
+        other = self.second_admin(client)
+        assert self.claim(client, other, 1) == [document_id]
+
+        url = f"/api/admin/verifications/{document_id}/review"
+        assert client.post(url, json={"status": "verified"}, headers=admin).status_code == 409
+
+        self.db.query(models.VerificationDocument).filter(models.VerificationDocument.id == document_id).update(
+            {"claim_expires_at": datetime.utcnow() - timedelta(minutes=1)}
+        )
+        self.db.commit()
+        assert verification.expire_claims(self.db) >= 1
+        assert self.claim(client, admin, 1) == [document_id]
+
+        assert client.post(url, json={"status": "verified"}, headers=admin).status_code == 200
+        document = self.db.query(models.VerificationDocument).filter(
+            models.VerificationDocument.id == document_id
+        ).one()
+        assert document.claimed_by is None and document.claim_expires_at is None
+
+    def test_release_returns_documents_to_queue(self, client, create_user, admin):
+        """Test released documents can be claimed by someone else"""
+        _, teacher = create_user("teacher", name="Teacher", hourly_rate=1000, subjects_taught=["Math"])
+        documents = self.create_documents(teacher["id"], 2)
+        other = self.second_admin(client)
+        assert self.claim(client, admin, 2) == documents
+
+        response = client.post("/api/admin/verifications/release",
+                               json={"document_ids": [str(d) for d in documents]}, headers=other)
+        assert response.json() == {"released": 0}
+        response = client.post("/api/admin/verifications/release",
+                               json={"document_ids": [str(documents[1])]}, headers=admin)
+        assert response.json() == {"released": 1}
+
+        assert self.claim(client, other, 1) == [documents[1]]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,125 @@
+import pytest
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from tests.conftest import requires_database
+
+pytestmark = requires_database
+
+
+class TestWalletLedger:
+    """Test cases for the append-only wallet ledger"""
+
+    def setup_method(self):
+        from database import SessionLocal
+        self.db = SessionLocal()
+
+    def teardown_method(self):
+        self.db.close()
+
+    def funded_wallet(self, client, create_user, rupees):
+        import ledger
+        import models
+
+        headers, _ = create_user("teacher", name="Teacher", hourly_rate=1000, subjects_taught=["Math"])
+        wallet = client.get("/api/wallet", headers=headers).json()
+        account = client.post("/api/wallet/bank-accounts", headers=headers, json={
+            "account_title": "Teacher", "account_number": "0123456789", "bank_name": "HBL"
+        }).json()
+
+        user_id = self.db.query(models.Wallet.user_id).filter(models.Wallet.id == wallet["id"]).scalar()
+        deposit = models.Transaction(wallet_id=wallet["id"], user_id=user_id, amount=rupees,
+                                     transaction_type=models.TransactionType.DEPOSIT,
+                                     status=models.PaymentStatus.COMPLETED, provider="jazzcash")
+        self.db.add(deposit)
+        self.db.flush()
+        ledger.credit_wallet(self.db, deposit.id, uuid.UUID(wallet["id"]), ledger.to_paisa(rupees),
+                             ledger.provider_account("jazzcash"))
+        self.db.commit()
+        return headers, wallet["id"], account["id"]
+
+    def test_parallel_withdrawals_never_overdraw(self, client, create_user):
+        """Test 1000 parallel withdrawals against a balance covering 500 of them"""
+        import ledger
+        import models
+
+        headers, wallet_id, account_id = self.funded_wallet(client, create_user, 500)
+
+        def withdraw(_):
+            return client.post("/api/wallet/withdraw", headers=headers,
+                               json={"amount": 1, "bank_account_id": account_id}).status_code
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            codes = list(pool.map(withdraw, range(1000)))
+
+        assert codes.count(200) == 500
+        assert codes.count(400) == 500
+        assert client.get("/api/wallet", headers=headers).json()["balance"] == 0
+
+        entries = self.db.query(models.LedgerEntry).filter(
+            models.LedgerEntry.transaction_id.in_(
+                self.db.query(models.Transaction.id).filter(models.Transaction.wallet_id == wallet_id)
+            )
+        ).all()
+        assert sum(e.amount_paisa for e in entries) == 0
+        assert sum(e.amount_paisa for e in entries if e.wallet_id is not None) == 0
+        assert len(entries) == 2 * 501
+        assert ledger.mismatched_wallets(self.db) == []
+
+    def test_duplicate_deposit_callbacks_credit_once(self, client, create_user):
+        """Test repeated provider callbacks on one event loop all return and credit the deposit once"""
+        from fastapi.testclient import TestClient
+        import main
+        import models
+        from payment import PaymentGateway
+
+        headers, wallet_id, _ = self.funded_wallet(client, create_user, 0)
+        user_id = self.db.query(models.Wallet.user_id).filter(models.Wallet.id == wallet_id).scalar()
+        reference = f"T{uuid.uuid4().hex[:12].upper()}"
+        self.db.add(models.Transaction(wallet_id=wallet_id, user_id=user_id, amount=250,
+                                       transaction_type=models.TransactionType.DEPOSIT,
+                                       status=models.PaymentStatus.PENDING, provider="jazzcash",
+                                       provider_transaction_id=reference))
+        self.db.commit()
+
+        callback = {"pp_TxnRefNo": reference, "pp_Amount": "25000", "pp_ResponseCode": "000"}
+        callback["pp_SecureHash"] = PaymentGateway("jazzcash").calculate_hash_jazzcash(callback)
+
+        # Entered, so every request shares one event loop: a callback blocking on the
+        # transaction's row lock must not stop the one holding it from finishing
+        with TestClient(main.app) as shared, ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [pool.submit(shared.post, "/api/payment/jazzcash/callback", data=callback) for _ in range(4)]
+            responses = [future.result(timeout=30) for future in futures]
+
+        assert [response.json()["status"] for response in responses] == ["completed"] * 4
+        assert client.get("/api/wallet", headers=headers).json()["balance"] == 250
+
+    def test_amounts_are_exact_in_paisa(self, client, create_user):
+        """Test fractional rupee amounts add up without float drift"""
+        headers, _, account_id = self.funded_wallet(client, create_user, 0.3)
+
+        for _ in range(3):
+            response = client.post("/api/wallet/withdraw", headers=headers,
+                                   json={"amount": 0.1, "bank_account_id": account_id})
+            assert response.status_code == 200
+        assert client.get("/api/wallet", headers=headers).json()["balance"] == 0
+
+        response = client.post("/api/wallet/withdraw", headers=headers,
+                               json={"amount": -5, "bank_account_id": account_id})
+        assert response.status_code == 422
+
+
+class TestPaisaConversion:
+    """Test cases for rupee to paisa conversion"""
+
+    def test_to_paisa(self):
+        import ledger
+
+        assert ledger.to_paisa(0.1) == 10
+        assert ledger.to_paisa(19.99) == 1999
+        assert ledger.to_paisa(0.005) == 1
+        assert ledger.to_paisa(1500) == 150000
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
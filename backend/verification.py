@@ -0,0 +1,185 @@
+from datetime import datetime, timedelta
+from typing import List, Optional, Set, Tuple
+import os
+import uuid
+
+from sqlalchemy import Text, case, column, func, or_, select, update, values
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Session
+
+import models
+import stats
+
+# (document id, new status, admin notes)
+Decision = Tuple[uuid.UUID, models.VerificationStatus, Optional[str]]
+
+# How long a claimed document stays reserved for its reviewer
+CLAIM_LEASE_MINUTES = int(os.getenv("VERIFICATION_CLAIM_LEASE_MINUTES", 15))
+
+
+class DocumentsNotFound(LookupError):
+    """Raised when some reviewed documents do not exist"""
+
+    def __init__(self, missing: List[uuid.UUID]):
+        super().__init__(f"Documents not found: {', '.join(str(d) for d in missing)}")
+        self.missing = missing
+
+
+class DocumentsClaimed(LookupError):
+    """Raised when some reviewed documents are leased to another reviewer"""
+
+    def __init__(self, claimed: List[uuid.UUID]):
+        super().__init__(f"Documents claimed by another reviewer: {', '.join(str(d) for d in claimed)}")
+        self.claimed = claimed
+
+
+def _lease(db: Session, reviewer_id: uuid.UUID, limit: int, expires_at: datetime,
+           *criteria) -> List[models.VerificationDocument]:
+    """Lease the oldest pending documents matching criteria, skipping rows locked by others"""
+    document = models.VerificationDocument
+    candidates = select(document.id).where(
+        document.status == models.VerificationStatus.PENDING, *criteria
+    ).order_by(
+        document.created_at, document.id
+    ).limit(limit).with_for_update(skip_locked=True).scalar_subquery()
+
+    return db.execute(
+        update(document)
+        .where(document.id.in_(candidates))
+        .values(claimed_by=reviewer_id, claim_expires_at=expires_at)
+        .returning(document)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+
+
+def claim_documents(db: Session, reviewer_id: uuid.UUID, limit: int,
+                    lease: timedelta = timedelta(minutes=CLAIM_LEASE_MINUTES)) -> List[models.VerificationDocument]:
+    """Lease the oldest claimable pending documents to reviewer_id, up to limit
+
+    Rows another reviewer is claiming at the same moment are skipped rather
+    than waited on (SKIP LOCKED), so concurrent reviewers never block each
+    other and never receive the same document. Documents the reviewer
+    already holds come back first with their lease renewed. The caller commits.
+
+    Held and free documents are leased in two statements, each a plain
+    oldest-first walk of the pending queue index.
+    """
+    document = models.VerificationDocument
+    now = datetime.utcnow()
+    claimed = _lease(db, reviewer_id, limit, now + lease,
+                     document.claimed_by == reviewer_id, document.claim_expires_at >= now)
+    if len(claimed) < limit:
+        claimed += _lease(db, reviewer_id, limit - len(claimed), now + lease,
+                          or_(document.claimed_by == None, document.claim_expires_at < now))
+    return sorted(claimed, key=lambda d: (d.created_at, d.id))
+
+
+def release_claims(db: Session, reviewer_id: uuid.UUID, document_ids: List[uuid.UUID]) -> int:
+    """Hand documents held by reviewer_id back to the queue. The caller commits."""
+    document = models.VerificationDocument
+    return db.execute(
+        update(document)
+        .where(document.id.in_(document_ids), document.claimed_by == reviewer_id)
+        .values(claimed_by=None, claim_expires_at=None)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def expire_claims(db: Session) -> int:
+    """Clear leases that have run out; returns how many were cleared
+
+    Expired leases are already claimable, this just keeps claimed_by honest
+    for anything that reads it.
+    """
+    document = models.VerificationDocument
+    expired = db.execute(
+        update(document)
+        .where(document.claim_expires_at < datetime.utcnow())
+        .values(claimed_by=None, claim_expires_at=None)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return expired
+
+
+def apply_reviews(db: Session, decisions: List[Decision],
+                  reviewer_id: Optional[uuid.UUID] = None) -> Set[uuid.UUID]:
+    """Apply review decisions to many documents at once and return the affected teacher ids
+
+    Runs a fixed number of statements however many documents are reviewed:
+    one locking read of the current statuses, one UPDATE from a VALUES list,
+    and one grouped recompute of the affected teachers. Documents leased to
+    another reviewer are refused; reviewed documents are released. The
+    caller commits.
+    """
+    document = models.VerificationDocument
+    ids = sorted(document_id for document_id, _, _ in decisions)
+    current = db.query(
+        document.id, document.status, document.teacher_id, document.claimed_by, document.claim_expires_at
+    ).filter(document.id.in_(ids)).order_by(document.id).with_for_update().all()
+
+    found = {row.id for row in current}
+    missing = [document_id for document_id in ids if document_id not in found]
+    if missing:
+        raise DocumentsNotFound(missing)
+
+    now = datetime.utcnow()
+    claimed = [
+        row.id for row in current
+        if row.claimed_by is not None and row.claimed_by != reviewer_id and row.claim_expires_at >= now
+    ]
+    if claimed:
+        raise DocumentsClaimed(claimed)
+
+    # Postgres stores the enum by member name
+    reviewed = values(
+        column("id", UUID(as_uuid=True)), column("status", Text), column("admin_notes", Text), name="reviewed"
+    ).data([(document_id, status.name, notes) for document_id, status, notes in decisions])
+    new_status = reviewed.c.status.cast(document.status.type)
+    db.execute(
+        update(document)
+        .where(document.id == reviewed.c.id)
+        .values({
+            document.status: new_status,
+            document.admin_notes: reviewed.c.admin_notes,
+            document.claimed_by: None,
+            document.claim_expires_at: None,
+            document.verified_at: case(
+                (reviewed.c.status == models.VerificationStatus.VERIFIED.name, datetime.utcnow()),
+                else_=document.verified_at
+            ),
+        })
+        .execution_options(synchronize_session=False)
+    )
+
+    pending = models.VerificationStatus.PENDING
+    was_pending = sum(1 for row in current if row.status == pending)
+    is_pending = sum(1 for _, status, _ in decisions if status == pending)
+    stats.bump(db, pending_verifications=is_pending - was_pending)
+
+    teacher_ids = {row.teacher_id for row in current}
+    recompute_teacher_verification(db, teacher_ids)
+    return teacher_ids
+
+
+def recompute_teacher_verification(db: Session, teacher_ids: Set[uuid.UUID]):
+    """Verify each teacher whose documents are now all verified, in one grouped UPDATE
+
+    Only ever promotes, as reviewing one document always has: a rejected or
+    newly uploaded document does not take a teacher's verification away.
+    """
+    if not teacher_ids:
+        return
+    document = models.VerificationDocument
+    teacher = models.TeacherProfile
+    statuses = db.query(
+        document.teacher_id.label("teacher_id"),
+        func.bool_and(document.status == models.VerificationStatus.VERIFIED).label("all_verified"),
+    ).filter(document.teacher_id.in_(teacher_ids)).group_by(document.teacher_id).subquery()
+
+    db.execute(
+        update(teacher)
+        .where(teacher.id == statuses.c.teacher_id, statuses.c.all_verified)
+        .values(is_verified=True, verification_status=models.VerificationStatus.VERIFIED)
+        .execution_options(synchronize_session=False)
+    )
@@ -0,0 +1,112 @@
+from collections import defaultdict
+from threading import Lock
+from typing import Dict
+import os
+import uuid
+
+from sqlalchemy import Integer, column, func, select, update, values
+from sqlalchemy.dialects.postgresql import UUID, insert
+from sqlalchemy.orm import Session
+
+import models
+
+# How often the API process writes buffered helpful votes to the reviews table
+FLUSH_INTERVAL_SECONDS = float(os.getenv("HELPFUL_VOTE_FLUSH_SECONDS", "5"))
+
+
+class HelpfulVoteBuffer:
+    """In-process buffer of helpful-vote increments per review
+
+    Votes are deduplicated by the review_votes table as they arrive; only the
+    counter increments are buffered and written in one UPDATE per flush, so a
+    popular review is updated a few times a minute rather than once per vote.
+    """
+
+    def __init__(self):
+        self._pending: Dict[uuid.UUID, int] = defaultdict(int)
+        self._lock = Lock()
+
+    def add(self, review_id: uuid.UUID, count: int = 1):
+        """Buffer count new votes for a review"""
+        with self._lock:
+            self._pending[review_id] += count
+
+    def pending(self, review_id: uuid.UUID) -> int:
+        """Votes for a review that are not yet written to its counter"""
+        with self._lock:
+            return self._pending.get(review_id, 0)
+
+    def drain(self) -> Dict[uuid.UUID, int]:
+        """Take every buffered increment, leaving the buffer empty"""
+        with self._lock:
+            drained, self._pending = dict(self._pending), defaultdict(int)
+        return drained
+
+    def flush(self, db: Session) -> int:
+        """Apply buffered increments in a single batched UPDATE and return the number of reviews touched
+
+        Increments are put back if the UPDATE fails, so a failed flush is retried
+        by the next one.
+        """
+        drained = self.drain()
+        if not drained:
+            return 0
+
+        review = models.Review
+        # Sorted ids make concurrent flushes from several workers lock rows in the same order
+        deltas = values(
+            column("review_id", UUID(as_uuid=True)), column("delta", Integer), name="deltas"
+        ).data(sorted(drained.items()))
+        try:
+            db.execute(
+                update(review)
+                .where(review.id == deltas.c.review_id)
+                .values({
+                    review.helpful_votes: func.coalesce(review.helpful_votes, 0) + deltas.c.delta,
+                    review.updated_at: review.updated_at,
+                })
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            for review_id, count in drained.items():
+                self.add(review_id, count)
+            raise
+        return len(drained)
+
+
+def record_vote(db: Session, review_id: uuid.UUID, user_id: uuid.UUID) -> bool:
+    """Store a user's helpful vote; returns False when the user already voted"""
+    inserted = db.execute(
+        insert(models.ReviewVote)
+        .values(review_id=review_id, user_id=user_id)
+        .on_conflict_do_nothing()
+        .returning(models.ReviewVote.review_id)
+    ).first()
+    db.commit()
+    return inserted is not None
+
+
+def rebuild_helpful_votes(db: Session) -> int:
+    """Reset every review's helpful_votes to its number of stored votes
+
+    Repairs counters after a process died with unflushed increments. Increments
+    still buffered in running API processes are added on top, so run it while
+    the API is stopped or idle.
+    """
+    review = models.Review
+    vote = models.ReviewVote
+    counts = select(func.count()).where(vote.review_id == review.id).scalar_subquery()
+    updated = db.execute(
+        update(review)
+        .where(func.coalesce(review.helpful_votes, 0) != counts)
+        .values({review.helpful_votes: counts, review.updated_at: review.updated_at})
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return updated
+
+
+# Global buffer used by the API process
+helpful_vote_buffer = HelpfulVoteBuffer()
@@ -3,6 +3,8 @@ from typing import Dict, List, Set
 import json
 from datetime import datetime
 
+import metrics
+
 
 class ConnectionManager:
     def __init__(self):
@@ -35,8 +37,10 @@ class ConnectionManager:
         if user_id in self.active_connections:
             try:
                 await self.active_connections[user_id].send_json(message)
+                metrics.WS_MESSAGES_SENT_TOTAL.labels(message["type"]).inc()
                 return True
             except Exception:
+                metrics.WS_SEND_FAILURES_TOTAL.inc()
                 self.disconnect(user_id)
                 return False
         return False
@@ -48,7 +52,9 @@ class ConnectionManager:
             if user_id != exclude_user:
                 try:
                     await connection.send_json(message)
+                    metrics.WS_MESSAGES_SENT_TOTAL.labels(message["type"]).inc()
                 except Exception:
+                    metrics.WS_SEND_FAILURES_TOTAL.inc()
                     disconnected.append(user_id)
         
         # Clean up disconnected users
@@ -123,6 +129,7 @@ class ConnectionManager:
 
 # Global connection manager instance
 manager = ConnectionManager()
+metrics.watch_connections(manager)
 
 
 async def websocket_endpoint(websocket: WebSocket, user_id: str):
@@ -10,6 +10,10 @@ const api = axios.create({
   },
 });
 
+// After a write the API asks us to read from the primary database for a
+// few seconds (until this Unix time), so we see our own changes
+let readAfterWriteUntil = null;
+
 // Request interceptor to add auth token
 api.interceptors.request.use(
   (config) => {
@@ -17,6 +21,9 @@ api.interceptors.request.use(
     if (token) {
       config.headers.Authorization = `Bearer ${token}`;
     }
+    if (readAfterWriteUntil && Date.now() / 1000 < Number(readAfterWriteUntil)) {
+      config.headers['X-Read-After-Write'] = readAfterWriteUntil;
+    }
     return config;
   },
   (error) => {
@@ -26,7 +33,13 @@ api.interceptors.request.use(
 
 // Response interceptor for error handling
 api.interceptors.response.use(
-  (response) => response,
+  (response) => {
+    const until = response.headers['x-read-after-write'];
+    if (until) {
+      readAfterWriteUntil = until;
+    }
+    return response;
+  },
   (error) => {
     // Handle 401 Unauthorized
     if (error.response?.status === 401) {
@@ -1,7 +1,7 @@
 import { useState, useEffect } from 'react';
 import api from '../api';
 
-function ReviewSystem({ teacherId, userId, canReview, sessionId }) {
+function ReviewSystem({ teacherId, userId, canReview, sessionId, summary, onReviewPosted }) {
   const [reviews, setReviews] = useState([]);
   const [loading, setLoading] = useState(true);
   const [showForm, setShowForm] = useState(false);
@@ -42,6 +42,7 @@ function ReviewSystem({ teacherId, userId, canReview, sessionId }) {
 
       // Refresh reviews
       await fetchReviews();
+      if (onReviewPosted) onReviewPosted();
       setShowForm(false);
       setRating(0);
       setReviewText('');
@@ -100,16 +101,25 @@ function ReviewSystem({ teacherId, userId, canReview, sessionId }) {
     );
   };
 
+  // Totals come from the teacher's stored aggregates when available,
+  // since the fetched reviews are only the first page
+  const histogram = summary?.rating_histogram;
+  const totalReviews = histogram ? summary.total_reviews || 0 : reviews.length;
+
   // Calculate rating distribution
   const ratingDistribution = [5, 4, 3, 2, 1].map(star => {
-    const count = reviews.filter(r => r.rating === star).length;
-    const percentage = reviews.length > 0 ? (count / reviews.length) * 100 : 0;
+    const count = histogram
+      ? histogram[star] || 0
+      : reviews.filter(r => r.rating === star).length;
+    const percentage = totalReviews > 0 ? (count / totalReviews) * 100 : 0;
     return { star, count, percentage };
   });
 
-  const averageRating = reviews.length > 0
-    ? (reviews.reduce((sum, r) => sum + r.rating, 0) / reviews.length).toFixed(1)
-    : '0.0';
+  const averageRating = histogram
+    ? (summary.average_rating || 0).toFixed(1)
+    : reviews.length > 0
+      ? (reviews.reduce((sum, r) => sum + r.rating, 0) / reviews.length).toFixed(1)
+      : '0.0';
 
   if (loading) {
     return (
@@ -139,7 +149,7 @@ function ReviewSystem({ teacherId, userId, canReview, sessionId }) {
               {renderStars(Math.round(parseFloat(averageRating)))}
             </div>
             <p className="text-[var(--color-text-secondary)]">
-              Based on {reviews.length} review{reviews.length !== 1 ? 's' : ''}
+              Based on {totalReviews} review{totalReviews !== 1 ? 's' : ''}
             </p>
           </div>
 
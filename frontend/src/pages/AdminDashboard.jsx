@@ -3,6 +3,9 @@ import { useNavigate } from 'react-router-dom';
 import Navbar from '../components/Navbar';
 import api from '../api';
 
+// Documents leased to this reviewer at a time, so admins work disjoint parts of the queue
+const VERIFICATION_BATCH_SIZE = 20;
+
 function AdminDashboard({ user }) {
   const navigate = useNavigate();
   const [stats, setStats] = useState(null);
@@ -11,6 +14,10 @@ function AdminDashboard({ user }) {
   const [activeTab, setActiveTab] = useState('overview');
   const [loading, setLoading] = useState(true);
   const [userFilter, setUserFilter] = useState('');
+  const [userSearch, setUserSearch] = useState('');
+  const [selectedDocuments, setSelectedDocuments] = useState([]);
+  const [timeseries, setTimeseries] = useState(null);
+  const [timeseriesInterval, setTimeseriesInterval] = useState('day');
 
   useEffect(() => {
     if (user.role !== 'admin') {
@@ -25,7 +32,7 @@ function AdminDashboard({ user }) {
       const [statsRes, usersRes, verificationsRes] = await Promise.all([
         api.get('/admin/stats'),
         api.get('/admin/users'),
-        api.get('/admin/verifications?status=pending')
+        api.post('/admin/verifications/claim', { limit: VERIFICATION_BATCH_SIZE })
       ]);
       setStats(statsRes.data);
       setUsers(usersRes.data);
@@ -37,10 +44,33 @@ function AdminDashboard({ user }) {
     }
   };
 
-  const fetchUsers = async (role = '') => {
+  useEffect(() => {
+    if (activeTab === 'analytics') {
+      fetchTimeseries(timeseriesInterval);
+    }
+  }, [activeTab, timeseriesInterval]);
+
+  const fetchTimeseries = async (selectedInterval) => {
+    try {
+      const response = await api.get(`/admin/timeseries?interval=${selectedInterval}`);
+      setTimeseries(response.data);
+    } catch (error) {
+      console.error('Error fetching analytics:', error);
+    }
+  };
+
+  useEffect(() => {
+    if (activeTab !== 'users') return;
+    const timer = setTimeout(() => fetchUsers(userFilter, userSearch), 250);
+    return () => clearTimeout(timer);
+  }, [userSearch]);
+
+  const fetchUsers = async (role = '', search = '') => {
     try {
-      const params = role ? `?role=${role}` : '';
-      const response = await api.get(`/admin/users${params}`);
+      const params = new URLSearchParams();
+      if (role) params.append('role', role);
+      if (search.trim()) params.append('q', search.trim());
+      const response = await api.get(`/admin/users?${params.toString()}`);
       setUsers(response.data);
     } catch (error) {
       console.error('Error fetching users:', error);
@@ -53,8 +83,8 @@ function AdminDashboard({ user }) {
         status,
         admin_notes: notes
       });
-      // Refresh verifications
-      const response = await api.get('/admin/verifications?status=pending');
+      // Refresh verifications (renews our claims and tops the batch up)
+      const response = await api.post('/admin/verifications/claim', { limit: VERIFICATION_BATCH_SIZE });
       setVerifications(response.data);
       // Refresh stats
       const statsRes = await api.get('/admin/stats');
@@ -65,6 +95,30 @@ function AdminDashboard({ user }) {
     }
   };
 
+  const toggleDocument = (documentId) => {
+    setSelectedDocuments(prev =>
+      prev.includes(documentId) ? prev.filter(id => id !== documentId) : [...prev, documentId]
+    );
+  };
+
+  const handleBulkApprove = async () => {
+    try {
+      await api.post('/admin/verifications/review', {
+        decisions: selectedDocuments.map(id => ({ document_id: id, status: 'verified' }))
+      });
+      setSelectedDocuments([]);
+      const [verificationsRes, statsRes] = await Promise.all([
+        api.post('/admin/verifications/claim', { limit: VERIFICATION_BATCH_SIZE }),
+        api.get('/admin/stats')
+      ]);
+      setVerifications(verificationsRes.data);
+      setStats(statsRes.data);
+    } catch (error) {
+      console.error('Error approving verifications:', error);
+      alert(error.response?.data?.detail || 'Failed to approve selected documents');
+    }
+  };
+
   const formatCurrency = (amount) => {
     return new Intl.NumberFormat('en-PK', {
       style: 'currency',
@@ -103,7 +157,7 @@ function AdminDashboard({ user }) {
 
         {/* Tabs */}
         <div className="flex gap-4 mb-6 border-b border-[var(--color-border)]">
-          {['overview', 'users', 'verifications', 'transactions'].map((tab) => (
+          {['overview', 'analytics', 'users', 'verifications', 'transactions'].map((tab) => (
             <button
               key={tab}
               onClick={() => setActiveTab(tab)}
@@ -236,7 +290,7 @@ function AdminDashboard({ user }) {
                   value={userFilter}
                   onChange={(e) => {
                     setUserFilter(e.target.value);
-                    fetchUsers(e.target.value);
+                    fetchUsers(e.target.value, userSearch);
                   }}
                   className="input-field w-auto"
                 >
@@ -244,6 +298,13 @@ function AdminDashboard({ user }) {
                   <option value="student">Students</option>
                   <option value="teacher">Teachers</option>
                 </select>
+                <input
+                  type="search"
+                  value={userSearch}
+                  onChange={(e) => setUserSearch(e.target.value)}
+                  placeholder="Search by email or name..."
+                  className="input-field flex-1 min-w-[200px]"
+                />
               </div>
             </div>
 
@@ -315,9 +376,34 @@ function AdminDashboard({ user }) {
                 </p>
               </div>
             ) : (
-              verifications.map((doc) => (
+              <>
+              <div className="card-static flex items-center justify-between">
+                <label className="flex items-center gap-2 text-sm text-[var(--color-text-secondary)]">
+                  <input
+                    type="checkbox"
+                    checked={selectedDocuments.length === verifications.length}
+                    onChange={(e) => setSelectedDocuments(e.target.checked ? verifications.map(d => d.id) : [])}
+                  />
+                  Select all ({selectedDocuments.length} selected)
+                </label>
+                <button
+                  onClick={handleBulkApprove}
+                  disabled={selectedDocuments.length === 0}
+                  className="btn-primary px-4 py-2 text-sm"
+                >
+                  Approve selected
+                </button>
+              </div>
+              {verifications.map((doc) => (
                 <div key={doc.id} className="card-static">
                   <div className="flex items-start justify-between">
+                    <div className="flex items-start gap-3">
+                    <input
+                      type="checkbox"
+                      className="mt-1"
+                      checked={selectedDocuments.includes(doc.id)}
+                      onChange={() => toggleDocument(doc.id)}
+                    />
                     <div>
                       <h3 className="font-semibold text-[var(--color-text-primary)]">
                         Document Type: {doc.document_type}
@@ -334,6 +420,7 @@ function AdminDashboard({ user }) {
                         View Document →
                       </a>
                     </div>
+                    </div>
                     <div className="flex gap-2">
                       <button
                         onClick={() => handleVerificationReview(doc.id, 'verified')}
@@ -355,7 +442,64 @@ function AdminDashboard({ user }) {
                     </div>
                   </div>
                 </div>
-              ))
+              ))}
+              </>
+            )}
+          </div>
+        )}
+
+        {/* Analytics Tab */}
+        {activeTab === 'analytics' && (
+          <div className="space-y-6">
+            <div className="flex justify-end">
+              <select
+                value={timeseriesInterval}
+                onChange={(e) => setTimeseriesInterval(e.target.value)}
+                className="input-field w-40"
+              >
+                <option value="day">Daily</option>
+                <option value="week">Weekly</option>
+                <option value="month">Monthly</option>
+              </select>
+            </div>
+
+            {!timeseries ? (
+              <div className="flex justify-center py-12">
+                <div className="spinner"></div>
+              </div>
+            ) : (
+              <div className="grid grid-cols-1 lg:grid-cols-2 gap-6">
+                {[
+                  ['revenue', 'Revenue'],
+                  ['sessions_booked', 'Sessions Booked'],
+                  ['signups', 'Signups'],
+                  ['messages', 'Messages']
+                ].map(([metric, label]) => {
+                  const points = timeseries.series[metric] || [];
+                  const total = points.reduce((sum, p) => sum + p.value, 0);
+                  const peak = Math.max(1, ...points.map(p => p.value));
+                  return (
+                    <div key={metric} className="card-static">
+                      <div className="flex items-baseline justify-between mb-4">
+                        <p className="text-[var(--color-text-secondary)] text-sm">{label}</p>
+                        <p className="text-2xl font-bold text-[var(--color-text-primary)]">
+                          {metric === 'revenue' ? formatCurrency(total) : total}
+                        </p>
+                      </div>
+                      <div className="flex items-end gap-px h-32">
+                        {points.map((point) => (
+                          <div
+                            key={point.period}
+                            title={`${formatDate(point.period)}: ${metric === 'revenue' ? formatCurrency(point.value) : point.value}`}
+                            className="flex-1 bg-[var(--color-primary)] opacity-80 hover:opacity-100 rounded-t"
+                            style={{ height: `${(point.value / peak) * 100}%` }}
+                          />
+                        ))}
+                      </div>
+                    </div>
+                  );
+                })}
+              </div>
             )}
           </div>
         )}
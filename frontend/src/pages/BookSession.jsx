@@ -20,6 +20,7 @@ function BookSession({ user }) {
   const [subject, setSubject] = useState('');
   const [topic, setTopic] = useState('');
   const [notes, setNotes] = useState('');
+  const [openSlots, setOpenSlots] = useState(null);
 
   const timeSlots = [
     '09:00', '09:30', '10:00', '10:30', '11:00', '11:30',
@@ -41,6 +42,30 @@ function BookSession({ user }) {
     fetchTeacher();
   }, [teacherId]);
 
+  useEffect(() => {
+    fetchOpenSlots();
+  }, [teacherId, selectedDate]);
+
+  // Naive local "YYYY-MM-DDTHH:MM:00" string, matching how the API stores schedules
+  const toLocalDateTime = (date, time = '00:00') => {
+    const pad = (n) => String(n).padStart(2, '0');
+    return `${date.getFullYear()}-${pad(date.getMonth() + 1)}-${pad(date.getDate())}T${time}:00`;
+  };
+
+  const fetchOpenSlots = async () => {
+    const nextDay = new Date(selectedDate);
+    nextDay.setDate(nextDay.getDate() + 1);
+    try {
+      const response = await api.get(`/teachers/${teacherId}/slots`, {
+        params: { from: toLocalDateTime(selectedDate), to: toLocalDateTime(nextDay) }
+      });
+      setOpenSlots(response.data);
+    } catch (error) {
+      console.error('Error fetching open slots:', error);
+      setOpenSlots(null);
+    }
+  };
+
   const fetchTeacher = async () => {
     try {
       const response = await api.get(`/teachers/${teacherId}`);
@@ -55,6 +80,16 @@ function BookSession({ user }) {
     }
   };
 
+  const isTimeAvailable = (time) => {
+    // Teachers without an availability template can be booked at any time
+    if (!teacher?.availability || Object.keys(teacher.availability).length === 0 || !openSlots) {
+      return true;
+    }
+    const start = new Date(toLocalDateTime(selectedDate, time));
+    const end = new Date(start.getTime() + duration * 60 * 60 * 1000);
+    return openSlots.some((slot) => new Date(slot.start) <= start && end <= new Date(slot.end));
+  };
+
   const calculateTotal = () => {
     if (!teacher) return 0;
     return teacher.hourly_rate * duration;
@@ -81,7 +116,7 @@ function BookSession({ user }) {
         teacher_id: teacherId,
         subject,
         topic,
-        scheduled_date: selectedDate.toISOString(),
+        scheduled_date: toLocalDateTime(selectedDate, selectedTime),
         scheduled_time: selectedTime,
         duration,
         is_recurring: recurring,
@@ -101,6 +136,9 @@ function BookSession({ user }) {
     } catch (error) {
       console.error('Error booking session:', error);
       alert(error.response?.data?.detail || 'Failed to book session');
+      if (error.response?.status === 409) {
+        fetchOpenSlots();
+      }
     } finally {
       setSubmitting(false);
     }
@@ -219,7 +257,8 @@ function BookSession({ user }) {
                     <button
                       key={time}
                       onClick={() => setSelectedTime(time)}
-                      className={`p-3 rounded-lg border-2 transition-all text-sm font-medium ${
+                      disabled={!isTimeAvailable(time)}
+                      className={`p-3 rounded-lg border-2 transition-all text-sm font-medium disabled:opacity-40 disabled:cursor-not-allowed ${
                         selectedTime === time
                           ? 'border-[var(--color-primary)] bg-[var(--color-primary-light)] text-[var(--color-primary)]'
                           : 'border-[var(--color-border)] hover:border-[var(--color-primary)]'
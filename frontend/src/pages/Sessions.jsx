@@ -15,8 +15,19 @@ function Sessions({ user }) {
   }, []);
 
   const fetchSessions = async () => {
+    // Rolling window so recurring series come back expanded into occurrences
+    const from = new Date();
+    from.setDate(from.getDate() - 90);
+    const to = new Date();
+    to.setDate(to.getDate() + 180);
     try {
-      const response = await api.get('/sessions');
+      const response = await api.get('/sessions', {
+        params: {
+          from: from.toISOString().slice(0, 19),
+          to: to.toISOString().slice(0, 19),
+          per_page: 100
+        }
+      });
       setSessions(response.data);
       setLoading(false);
     } catch (error) {
@@ -25,9 +36,16 @@ function Sessions({ user }) {
     }
   };
 
-  const updateSessionStatus = async (sessionId, status) => {
+  // Occurrences of a recurring series without their own row are patched through the series
+  const sessionUrl = (session) => (
+    session.is_materialized === false
+      ? `/sessions/${session.series_id}/occurrences/${session.occurrence_date}`
+      : `/sessions/${session.id}`
+  );
+
+  const updateSessionStatus = async (session, status) => {
     try {
-      await api.patch(`/sessions/${sessionId}`, { status });
+      await api.patch(sessionUrl(session), { status });
       fetchSessions();
     } catch (error) {
       console.error('Error updating session:', error);
@@ -204,7 +222,7 @@ function Sessions({ user }) {
 
                 {/* Actions */}
                 <div className="flex flex-wrap gap-3 mt-4 pt-4 border-t border-[var(--color-border)]">
-                  {session.status === 'pending' && session.payment_status === 'pending' && user.role === 'student' && (
+                  {session.status === 'pending' && session.payment_status === 'pending' && session.is_materialized !== false && user.role === 'student' && (
                     <button
                       onClick={() => navigate('/payment', { 
                         state: { 
@@ -221,13 +239,13 @@ function Sessions({ user }) {
                   {session.status === 'pending' && user.role === 'teacher' && (
                     <>
                       <button
-                        onClick={() => updateSessionStatus(session.id, 'confirmed')}
+                        onClick={() => updateSessionStatus(session, 'confirmed')}
                         className="btn-primary text-sm"
                       >
                         Accept
                       </button>
                       <button
-                        onClick={() => updateSessionStatus(session.id, 'cancelled')}
+                        onClick={() => updateSessionStatus(session, 'cancelled')}
                         className="btn-danger text-sm"
                       >
                         Decline
@@ -252,7 +270,7 @@ function Sessions({ user }) {
                           onClick={() => {
                             const link = prompt('Enter meeting link:');
                             if (link) {
-                              api.patch(`/sessions/${session.id}`, { meeting_link: link })
+                              api.patch(sessionUrl(session), { meeting_link: link })
                                 .then(fetchSessions);
                             }
                           }}
@@ -262,7 +280,7 @@ function Sessions({ user }) {
                         </button>
                       )}
                       <button
-                        onClick={() => updateSessionStatus(session.id, 'completed')}
+                        onClick={() => updateSessionStatus(session, 'completed')}
                         className="btn-secondary text-sm"
                       >
                         Mark Complete
@@ -283,7 +301,7 @@ function Sessions({ user }) {
                     <button
                       onClick={() => {
                         if (confirm('Are you sure you want to cancel this session?')) {
-                          updateSessionStatus(session.id, 'cancelled');
+                          updateSessionStatus(session, 'cancelled');
                         }
                       }}
                       className="text-[var(--color-error)] hover:underline text-sm"
@@ -297,6 +297,8 @@ function TeacherDetail({ user }) {
             teacherId={teacher.id}
             userId={user.id}
             canReview={user.role === 'student'}
+            summary={teacher}
+            onReviewPosted={fetchTeacher}
           />
         </div>
       </div>
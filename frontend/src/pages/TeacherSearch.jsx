@@ -16,6 +16,7 @@ function TeacherSearch({ user }) {
     language: '',
     city: '',
     experience_level: '',
+    availability: '',
     sort_by: 'rating'
   });
 
@@ -42,6 +43,7 @@ function TeacherSearch({ user }) {
       if (filters.language) params.language = filters.language;
       if (filters.city) params.city = filters.city;
       if (filters.experience_level) params.experience_level = filters.experience_level;
+      if (filters.availability) params.availability = filters.availability;
       if (filters.sort_by) params.sort_by = filters.sort_by;
 
       const response = await api.get('/teachers/search', { params });
@@ -71,6 +73,7 @@ function TeacherSearch({ user }) {
       language: '',
       city: '',
       experience_level: '',
+      availability: '',
       sort_by: 'rating'
     });
   };
@@ -197,6 +200,24 @@ function TeacherSearch({ user }) {
                   </select>
                 </div>
 
+                {/* Availability */}
+                <div>
+                  <label className="block text-sm font-medium text-[var(--color-text-secondary)] mb-2">
+                    Availability
+                  </label>
+                  <select
+                    value={filters.availability}
+                    onChange={(e) => handleFilterChange('availability', e.target.value)}
+                    className="input-field"
+                  >
+                    <option value="">Any Time</option>
+                    <option value="weekdays:morning">Weekday Mornings</option>
+                    <option value="weekdays:afternoon">Weekday Afternoons</option>
+                    <option value="weekdays:evening">Weekday Evenings</option>
+                    <option value="weekends">Weekends</option>
+                  </select>
+                </div>
+
                 {/* Teaching Format */}
                 <div>
                   <label className="block text-sm font-medium text-[var(--color-text-secondary)] mb-2">